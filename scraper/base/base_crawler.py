@@ -18,12 +18,19 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Protocol
 
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
+from tools.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from tools.work_queue import RedisWorkQueue
+
 
 class AbstractCrawler(ABC):
+    # whether the crawler implements WorkQueueCrawler and runs as a distributed work queue worker
+    supports_work_queue = False
 
     @abstractmethod
     async def start(self):
@@ -64,6 +71,18 @@ class AbstractCrawler(ABC):
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
 
+class WorkQueueCrawler(Protocol):
+    """Optional protocol of the crawlers with supports_work_queue, their start() also runs the worker role"""
+
+    async def enqueue_work(self, queue: "RedisWorkQueue") -> int:
+        """
+        Put the units of work of the configured crawl into the distributed work queue
+        :param queue: tools.work_queue.RedisWorkQueue
+        :return: number of items enqueued
+        """
+        ...
+
+
 class AbstractLogin(ABC):
 
     @abstractmethod
@@ -99,6 +118,24 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def store_contents(self, content_items: List[Dict]):
+        """Store a batch of contents, e.g. one API page; backends override it with a single storage operation"""
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """Store a batch of comments, e.g. one API page; backends override it with a single storage operation"""
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
+    async def open(self):
+        """Called once by the store registry before the store gets its first record"""
+        pass
+
+    async def close(self):
+        """Called once by the store registry on shutdown"""
+        pass
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
@@ -122,6 +159,14 @@ class AbstractApiClient(ABC):
     async def request(self, method, url, **kwargs):
         pass
 
+    @property
+    def single_flight(self) -> SingleFlight:
+        """Coalesces this client's identical in-flight requests, used by @coalesce_requests"""
+        group = self.__dict__.get("_single_flight")
+        if group is None:
+            group = self.__dict__["_single_flight"] = SingleFlight()
+        return group
+
     @abstractmethod
     async def update_cookies(self, browser_context: BrowserContext):
         pass
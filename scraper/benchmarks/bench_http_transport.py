@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_http_transport.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Per-call httpx.AsyncClient vs pooled HttpTransport against a local stand-in API server
+#
+# Usage: python -m benchmarks.bench_http_transport [--requests 500] [--concurrency 10]
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, Tuple
+
+import httpx
+
+from tools.http_transport import HttpTransport
+
+_BODY = b'{"success":true,"code":0,"data":{"has_more":true,"cursor":"abc","comments":[]}}'
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_BODY)))
+        self.end_headers()
+        self.wfile.write(_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in_server() -> Tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/sns/web/v2/comment/page"
+
+
+async def _run(fetch: Callable[[], Awaitable[None]], total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one():
+        async with semaphore:
+            await fetch()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[_one() for _ in range(total)])
+    return time.perf_counter() - start
+
+
+async def bench(total: int, concurrency: int) -> None:
+    server, url = start_stand_in_server()
+    try:
+        async def per_call_client():
+            # What every platform client did before: a fresh client (and TCP connection) per call
+            async with httpx.AsyncClient() as client:
+                (await client.request("GET", url, timeout=10)).raise_for_status()
+
+        transport = HttpTransport(timeout=10)
+
+        async def pooled_transport():
+            (await transport.request("GET", url, timeout=10)).raise_for_status()
+
+        # warm up both paths once
+        await per_call_client()
+        await pooled_transport()
+
+        before = await _run(per_call_client, total, concurrency)
+        after = await _run(pooled_transport, total, concurrency)
+        await transport.aclose()
+
+        print(f"requests={total} concurrency={concurrency}")
+        print(f"  per-call AsyncClient : {before:.3f}s  {total / before:8.1f} req/s")
+        print(f"  pooled HttpTransport : {after:.3f}s  {total / after:8.1f} req/s")
+        print(f"  speedup              : {before / after:.2f}x")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency))
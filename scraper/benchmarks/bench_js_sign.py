@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_js_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : execjs per-call signing vs the persistent node sign worker pool
+#
+# Usage: python -m benchmarks.bench_js_sign [--signs 200] [--workers 2]
+
+import argparse
+import asyncio
+import time
+
+import execjs
+
+from tools.js_sign_worker import JsSignWorkerPool
+
+_UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+_CASES = {
+    "douyin": ("libs/douyin.js", "sign_datail", lambda i: (f"device_platform=webapp&aid=6383&aweme_id={7400000000000000000 + i}", _UA)),
+    "zhihu": ("libs/zhihu.js", "get_sign", lambda i: (f"/api/v4/search_v3?q=shanghai&offset={i}", "d_c0=AEBxxx|1700000000")),
+}
+
+
+def bench_execjs(lib_path: str, fn: str, make_args, total: int) -> float:
+    with open(lib_path, mode="r", encoding="utf-8-sig") as f:
+        ctx = execjs.compile(f.read())
+    ctx.call(fn, *make_args(0))  # warm up
+    start = time.perf_counter()
+    for i in range(total):
+        ctx.call(fn, *make_args(i))
+    return time.perf_counter() - start
+
+
+async def bench_worker_pool(lib_path: str, fn: str, make_args, total: int, workers: int) -> float:
+    pool = JsSignWorkerPool(lib_path, size=workers)
+    await pool.call(fn, *make_args(0))  # start the workers
+    start = time.perf_counter()
+    await asyncio.gather(*[pool.call(fn, *make_args(i)) for i in range(total)])
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    return elapsed
+
+
+def main(total: int, workers: int) -> None:
+    print(f"signs={total} workers={workers}")
+    for name, (lib_path, fn, make_args) in _CASES.items():
+        before = bench_execjs(lib_path, fn, make_args, total)
+        after = asyncio.run(bench_worker_pool(lib_path, fn, make_args, total, workers))
+        print(f"  {name}")
+        print(f"    execjs per call   : {before:.3f}s  {total / before:8.1f} signs/s")
+        print(f"    node worker pool  : {after:.3f}s  {total / after:8.1f} signs/s")
+        print(f"    speedup           : {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--signs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    main(args.signs, args.workers)
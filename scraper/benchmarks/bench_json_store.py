@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_json_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Read-modify-write json store vs append-only jsonl store (plus compaction) for growing record counts
+#
+# Usage: python -m benchmarks.bench_json_store [--sizes 250,500,1000,2000]
+#
+# The json store rewrites the whole day's file for every record (every SAVE_BUFFER_FLUSH_RECORDS
+# records since writes are buffered), so the time per record grows with the file; the jsonl
+# store's time per record stays flat.
+
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import config
+from tools.async_file_writer import AsyncFileWriter
+
+
+def _comment(i: int) -> dict:
+    return {
+        "comment_id": str(i),
+        "note_id": "65a1b2c3d4e5f6a7b8c9d0e1",
+        "content": "评论内容" * 10,
+        "create_time": 1700000000000 + i,
+        "like_count": str(i % 100),
+        "sub_comment_count": str(i % 7),
+        "nickname": f"user_{i}",
+        "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/abc.jpg",
+        "ip_location": "上海",
+    }
+
+
+async def _write(json_lines: bool, total: int) -> float:
+    writer = AsyncFileWriter(platform="xhs", crawler_type="bench", json_lines=json_lines)
+    start = time.perf_counter()
+    for i in range(total):
+        await writer.write_single_item_to_json(_comment(i), "comments")
+    if json_lines:
+        await writer.compact_jsonl_files()
+    return time.perf_counter() - start
+
+
+async def bench(sizes: List[int]) -> None:
+    config.ENABLE_GET_WORDCLOUD = False
+    print(f"{'records':>8} {'json s':>9} {'json ms/rec':>12} {'jsonl s':>9} {'jsonl ms/rec':>13}")
+    for total in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            config.SAVE_DATA_PATH = data_path
+            json_time = await _write(False, total)
+        with tempfile.TemporaryDirectory() as data_path:
+            config.SAVE_DATA_PATH = data_path
+            jsonl_time = await _write(True, total)
+        print(
+            f"{total:>8} {json_time:>9.2f} {json_time * 1000 / total:>12.3f}"
+            f" {jsonl_time:>9.2f} {jsonl_time * 1000 / total:>13.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="250,500,1000,2000", help="comma separated record counts")
+    args = parser.parse_args()
+    asyncio.run(bench([int(size) for size in args.sizes.split(",")]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_xhs_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Microbenchmarks for the Xiaohongshu sign primitives run on every signed request
+#
+# Usage: python -m benchmarks.bench_xhs_sign [--number 20000]
+
+import argparse
+import json
+import timeit
+
+from media_platform.xhs.playwright_sign import _build_xs_common, _build_xs_payload
+from media_platform.xhs.xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
+
+_A1 = "18c5d5b8f0bzzhbbbb2f2fcc4e2gk8mr5f1a2x3y4z"
+_B1 = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMPYJJ=="
+_X_T = "1700000000000"
+_X3 = "mns0301_" + "A" * 160
+_X_S = _build_xs_payload(_X3)
+_COMMON_JSON = json.dumps({"x5": _A1, "x6": _X_T, "x7": _X_S, "x8": _B1, "x11": "normal"}, separators=(",", ":"))
+_COMMON_BYTES = encode_utf8(_COMMON_JSON)
+
+_CASES = {
+    "encode_utf8": lambda: encode_utf8(_COMMON_JSON),
+    "b64_encode": lambda: b64_encode(_COMMON_BYTES),
+    "mrc": lambda: mrc(_X_T + _X_S + _B1),
+    "get_trace_id": get_trace_id,
+    "_build_xs_payload": lambda: _build_xs_payload(_X3),
+    "_build_xs_common": lambda: _build_xs_common(_A1, _B1, _X_S, _X_T),
+}
+
+
+def main(number: int) -> None:
+    print(f"number={number} (best of 5)")
+    for name, func in _CASES.items():
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"  {name:<18}: {best / number * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.number)
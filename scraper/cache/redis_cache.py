@@ -25,7 +25,7 @@
 # @Desc    : RedisCache implementation
 import pickle
 import time
-from typing import Any, List
+from typing import Any, Dict, List
 
 from redis import Redis
 
@@ -33,6 +33,16 @@ from cache.abs_cache import AbstractCache
 from config import db_config
 
 
+def redis_connection_kwargs() -> Dict[str, Any]:
+    """Redis connection settings from db_config, shared by the cache and the distributed work queue"""
+    return dict(
+        host=db_config.REDIS_DB_HOST,
+        port=db_config.REDIS_DB_PORT,
+        db=db_config.REDIS_DB_NUM,
+        password=db_config.REDIS_DB_PWD,
+    )
+
+
 class RedisCache(AbstractCache):
 
     def __init__(self) -> None:
@@ -45,12 +55,7 @@ class RedisCache(AbstractCache):
         Connect to redis, return redis client, configure redis connection information as needed
         :return:
         """
-        return Redis(
-            host=db_config.REDIS_DB_HOST,
-            port=db_config.REDIS_DB_PORT,
-            db=db_config.REDIS_DB_NUM,
-            password=db_config.REDIS_DB_PWD,
-        )
+        return Redis(**redis_connection_kwargs())
 
     def get(self, key: str) -> Any:
         """
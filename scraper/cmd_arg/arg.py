@@ -70,6 +70,7 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
     MONGODB = "mongodb"
     EXCEL = "excel"
@@ -212,7 +213,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
+                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | jsonl=append-only JSON Lines file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
                 rich_help_panel="Storage Configuration",
             ),
         ] = _coerce_enum(
@@ -274,6 +275,31 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="Storage Configuration",
             ),
         ] = config.SAVE_DATA_PATH,
+        incremental: Annotated[
+            str,
+            typer.Option(
+                "--incremental",
+                help="Incremental crawl: skip detail, media and comments of posts crawled recently and unchanged since, supports yes/true/t/y/1 or no/false/f/n/0",
+                rich_help_panel="Performance Configuration",
+                show_default=True,
+            ),
+        ] = str(config.INCREMENTAL_CRAWL_ENABLED),
+        resume: Annotated[
+            bool,
+            typer.Option(
+                "--resume",
+                help="Continue from the checkpoint left by an interrupted run of the same platform and crawler type",
+                rich_help_panel="Runtime Configuration",
+            ),
+        ] = config.CRAWLER_RESUME,
+        queue_role: Annotated[
+            str,
+            typer.Option(
+                "--queue_role",
+                help="Distributed work queue role (coordinator=enqueue the crawl into Redis | worker=process queued work), empty for a single process crawl",
+                rich_help_panel="Runtime Configuration",
+            ),
+        ] = config.CRAWLER_WORK_QUEUE_ROLE,
     ) -> SimpleNamespace:
         """MediaCrawler 命令行入口"""
 
@@ -301,6 +327,11 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = max_comments_count_singlenotes
         config.MAX_CONCURRENCY_NUM = max_concurrency_num
         config.SAVE_DATA_PATH = save_data_path
+        config.INCREMENTAL_CRAWL_ENABLED = _to_bool(incremental)
+        config.CRAWLER_RESUME = resume
+        if queue_role not in ("", "coordinator", "worker"):
+            raise typer.BadParameter("--queue_role must be coordinator or worker")
+        config.CRAWLER_WORK_QUEUE_ROLE = queue_role
 
         # Set platform-specific ID lists for detail/creator mode
         if specified_id_list:
@@ -341,6 +372,9 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             cookies=config.COOKIES,
             specified_id=specified_id,
             creator_id=creator_id,
+            incremental=config.INCREMENTAL_CRAWL_ENABLED,
+            resume=config.CRAWLER_RESUME,
+            queue_role=config.CRAWLER_WORK_QUEUE_ROLE,
         )
 
     command = typer.main.get_command(app)
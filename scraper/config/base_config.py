@@ -71,25 +71,110 @@ BROWSER_LAUNCH_TIMEOUT = 60
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持六种类型：csv、db、json、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite or excel or postgres
+# 数据保存类型选项配置,支持以下类型：csv、db、json、jsonl、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
+# jsonl 每条记录追加一行，写入开销不随文件增大；结束时压缩生成与 json 相同格式的数组文件
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite or excel or postgres
+
+# jsonl 保存方式下，爬取结束时把当天的 jsonl 文件压缩为 data/<平台>/json 下的 JSON 数组文件，
+# 供 scripts/process-xhs-posts.mjs 和词云使用；也可随时手动执行 python -m tools.jsonl_compact <文件>
+JSONL_COMPACT_ON_FINISH = True
 
 # 数据保存路径,默认不指定,则保存到data文件夹下
 SAVE_DATA_PATH = ""
 
+# csv/json/jsonl 文件写入缓冲：同一文件的所有写入共用一个常驻句柄和锁，记录先缓存在内存，
+# 累计到指定条数、超过指定秒数以及程序退出时批量写入；检查点等待其依赖的记录写入后再保存
+SAVE_BUFFER_FLUSH_RECORDS = 100
+SAVE_BUFFER_FLUSH_INTERVAL_SEC = 5
+
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
 
 # 爬取开始页数 默认从第一页开始
 START_PAGE = 1
 
+# 断点续爬：运行过程中把已完成的搜索页、search_id、评论游标、创作者分页游标原子写入检查点文件，
+# 进程中断后使用 --resume 从上次停止的位置继续，已完成的请求不会重复；全部完成后自动删除检查点
+CRAWLER_CHECKPOINT_ENABLED = True
+
+# 检查点目录，为空时保存到数据保存路径下的 checkpoints 目录
+CRAWLER_CHECKPOINT_DIR = ""
+
+# 检查点合并写入间隔（秒），间隔内的多次进度变化只写一次文件，写入在后台线程完成
+CRAWLER_CHECKPOINT_SAVE_INTERVAL_SEC = 2
+
+# 是否从上次的检查点继续爬取（命令行 --resume）
+CRAWLER_RESUME = False
+
+# 增量爬取模式：用本地 SQLite 索引记录已爬取的内容（更新时间、互动数、上次爬取时间），
+# 搜索模式下对近期已爬取或未发生变化的帖子跳过详情、媒体和评论的抓取（目前支持 xhs、wb）
+INCREMENTAL_CRAWL_ENABLED = False
+
+# 增量索引文件路径，为空时保存到数据保存路径下的 seen_index.db
+INCREMENTAL_INDEX_PATH = ""
+
+# 刷新策略：never 已爬取过即跳过；interval 距上次爬取超过刷新间隔才重新爬取；
+# changed 超过刷新间隔，或搜索结果中的互动数/更新时间发生变化时重新爬取
+INCREMENTAL_REFRESH_POLICY = "changed"
+
+# 刷新间隔（小时），0 表示不按时间刷新
+INCREMENTAL_REFRESH_INTERVAL_HOURS = 72
+
+# 互动数（点赞、收藏、评论等）相对变化超过该比例时视为内容已变化
+INCREMENTAL_INTERACTION_CHANGE_RATIO = 0.2
+
+# 增量模式下的评论增量抓取（目前支持 xhs）：记录每个帖子最新的评论ID与时间，
+# 再次抓取时遇到整页都是已抓取过的评论即停止翻页，只展开回复数发生变化的二级评论
+INCREMENTAL_COMMENT_DELTA = True
+
+# 每个帖子保留的最新评论ID数量
+INCREMENTAL_COMMENT_DELTA_KNOWN_IDS = 200
+
 # 爬取视频/帖子的数量控制
 # Can be overridden per-platform via CRAWLER_MAX_NOTES_COUNT env var
 CRAWLER_MAX_NOTES_COUNT = int(os.environ.get("CRAWLER_MAX_NOTES_COUNT", "40"))
 
-# 并发爬虫数量控制
+# 单个关键词的帖子数量配额，未配置的关键词使用 CRAWLER_MAX_NOTES_COUNT
+# 示例：{"上海探店": 100, "Shanghai": 20}
+CRAWLER_KEYWORD_NOTE_QUOTAS = {}
+
+# 同时爬取的关键词数量，各关键词共享平台限流与并发预算，搜索页按轮转公平分配
+CRAWLER_KEYWORD_CONCURRENCY = 3
+
+# 分布式工作队列（Redis，连接配置见 db_config 中的 REDIS_*）：为空时单进程爬取；
+# coordinator 把搜索页、帖子、创作者等工作单元写入队列，worker 进程（可在多台机器上）租约领取、处理并确认，
+# 处理中发现的帖子和评论线程会继续入队（目前支持 xhs）
+CRAWLER_WORK_QUEUE_ROLE = ""  # "" | coordinator | worker
+
+# 队列 key 前缀
+CRAWLER_WORK_QUEUE_PREFIX = "mediacrawler:queue"
+
+# 租约时长（秒），worker 处理期间会定期续约，进程崩溃后超时的工作单元会重新投递
+CRAWLER_WORK_QUEUE_LEASE_SECONDS = 300
+
+# 单个工作单元最多投递次数，超过后进入死信队列
+CRAWLER_WORK_QUEUE_MAX_ATTEMPTS = 3
+
+# 单个 worker 进程同时处理的工作单元数
+CRAWLER_WORK_QUEUE_WORKER_CONCURRENCY = 4
+
+# 并发爬虫数量控制（开启自适应并发时为初始并发数）
 MAX_CONCURRENCY_NUM = 1
 
+# 自适应并发（AIMD）：详情/评论抓取的并发数在请求健康时逐步加一，
+# 遇到 IPBlockError / DataFetchError / 461、471 验证码 / p95 延迟上升时按比例减半
+ADAPTIVE_CONCURRENCY_ENABLED = True
+
+# 自适应并发的下限与上限
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 8
+
+# 触发降速时并发数乘以该系数
+ADAPTIVE_CONCURRENCY_DECREASE_FACTOR = 0.5
+
+# 窗口 p95 延迟超过健康基线的倍数时视为延迟上升
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = 2.0
+
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = True
 
@@ -107,6 +192,9 @@ CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10
 # 老版本项目使用了 db, 则需参考 schema/tables.sql line 287 增加表字段
 ENABLE_GET_SUB_COMMENTS = False
 
+# 单个帖子同时展开的二级评论线程数（即同时进行中的二级评论请求数），各线程内部仍按顺序翻页
+CRAWLER_SUB_COMMENT_CONCURRENCY = 3
+
 # 词云相关
 # 是否开启生成评论词云图
 ENABLE_GET_WORDCLOUD = False
@@ -123,9 +211,57 @@ STOP_WORDS_FILE = "./docs/hit_stopwords.txt"
 # 中文字体文件路径
 FONT_PATH = "./docs/STZHONGS.TTF"
 
-# 爬取间隔时间
+# 模拟用户浏览时的页面停留时间（秒），仅用于登录前的页面跳转，接口请求频率由下方限流配置控制
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# 请求限流配置：按 平台 + 接口类型 使用令牌桶限流，取代以前每次请求后固定 sleep 的方式
+# 接口类型：search(搜索) / detail(详情) / comments(评论) / media(图片视频CDN)
+# 取值为 (每秒请求数, 突发容量)，每秒请求数 <= 0 表示不限流
+# "default" 为所有平台的默认值，可按平台覆盖，平台名与 PLATFORM 一致：xhs | dy | ks | bili | wb | tieba | zhihu
+CRAWLER_RATE_LIMITS = {
+    "default": {
+        "search": (0.5, 1),
+        "detail": (1.0, 2),
+        "comments": (1.0, 2),
+        "media": (5.0, 10),
+    },
+    # 示例：小红书详情接口更严格
+    # "xhs": {"detail": (0.5, 1)},
+}
+
+# 搜索流水线配置：搜索页 -> 详情 -> 存储/媒体/评论 各阶段独立并发，结果完成即处理，不再按页等待
+# 各阶段队列容量（背压），队列满时上游阶段会等待
+CRAWLER_PIPELINE_QUEUE_SIZE = 40
+
+# 媒体下载阶段的并发数
+CRAWLER_PIPELINE_MEDIA_CONCURRENCY = 2
+
+# ==================== HTTP 连接池配置 ====================
+# 各平台 API 客户端在整个生命周期内复用同一个连接池（keep-alive），避免每次请求重新握手
+# 是否启用 HTTP/2（需要额外安装 h2: pip install h2），未安装时自动回退到 HTTP/1.1
+HTTP_ENABLE_HTTP2 = False
+
+# 连接池最大连接数
+HTTP_MAX_CONNECTIONS = 100
+
+# 连接池最大保持空闲的 keep-alive 连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# keep-alive 连接空闲过期时间（秒）
+HTTP_KEEPALIVE_EXPIRY = 30
+
+# 请求合并（single-flight）：同一客户端中方法、URL、参数都相同的进行中请求共享一次网络请求与结果，
+# 关键词重叠时同一帖子的详情、评论请求不会重复发出
+REQUEST_COALESCING_ENABLED = True
+
+# 已完成请求结果的短期复用时长（秒），覆盖同一次爬取中几乎同时的重复请求，0 表示只合并进行中的请求
+REQUEST_MEMO_TTL_SEC = 30
+
+# ==================== JS 签名进程池配置 ====================
+# 抖音(a_bogus)、知乎(x-zse-96) 的 JS 签名由常驻 node 进程执行，签名库只加载一次
+# 每个签名库启动的 node 进程数量，未安装 node 时自动回退到 execjs
+JS_SIGN_WORKER_NUM = 2
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
@@ -54,6 +54,9 @@ BILI_SEARCH_MODE = "normal"
 # 注意：更高清晰度需要账号/视频本身支持
 BILI_QN = 80
 
+# WBI 签名密钥(img_key/sub_key)缓存时间（秒），密钥大约每天轮换一次，签名被拒绝时会立即刷新
+BILI_WBI_KEY_TTL = 3600
+
 # 是否爬取用户信息
 CREATOR_MODE = True
 
@@ -20,6 +20,9 @@
 # 抖音平台配置
 PUBLISH_TIME_TYPE = 0
 
+# 请求公共参数（msToken、webid 等）快照的有效时间（秒），过期或更新 cookie 后重新从浏览器读取
+DY_PARAM_CONTEXT_TTL = 300
+
 # 指定DY视频URL列表 (支持多种格式)
 # 支持格式:
 # 1. 完整视频URL: "https://www.douyin.com/video/7525538910311632128"
@@ -19,6 +19,16 @@
 
 # 贴吧平台配置
 
+# 贴吧页面抓取使用的浏览器标签页数量，默认与并发数 MAX_CONCURRENCY_NUM 保持一致
+TIEBA_PAGE_POOL_SIZE = 0
+
+# 单个标签页的页面导航超时时间（秒）
+TIEBA_PAGE_NAV_TIMEOUT = 30
+
+# 是否启用免渲染抓取：通过浏览器上下文的 request 接口（携带真实 cookie 与 UA）直接获取页面 HTML，
+# 不执行脚本、不加载图片与布局；遇到安全验证或空白页面时自动回退到标签页完整加载
+TIEBA_RENDER_FREE_FETCH = True
+
 # 指定贴吧ID列表
 TIEBA_SPECIFIED_ID_LIST = []
 
@@ -35,3 +35,9 @@ XHS_CREATOR_ID_LIST = [
     "https://www.xiaohongshu.com/user/profile/5f58bd990000000001003753?xsec_token=ABYVg1evluJZZzpMX-VWzchxQ1qSNVW3r-jOEnKqMcgZw=&xsec_source=pc_search"
     # ........................
 ]
+
+# 单次 page.evaluate 最多合并签名的请求数量（并发签名请求会被合并为一次 CDP 调用）
+XHS_SIGN_BATCH_SIZE = 32
+
+# 签名页面池大小：开启多个加载了 window.mnsv2 的页面并发签名，建议不小于 MAX_CONCURRENCY_NUM
+XHS_SIGN_PAGE_POOL_SIZE = 1
@@ -31,6 +31,7 @@ if str(project_root) not in sys.path:
 
 from tools import utils
 from database.db_session import create_tables
+from database.migrations import migrate_unique_keys
 
 async def init_table_schema(db_type: str):
     """
@@ -41,6 +42,8 @@ async def init_table_schema(db_type: str):
     """
     utils.logger.info(f"[init_table_schema] begin init {db_type} table schema ...")
     await create_tables(db_type)
+    # tables created by older versions get their natural keys made unique
+    await migrate_unique_keys(db_type)
     utils.logger.info(f"[init_table_schema] {db_type} table schema init successful")
 
 async def init_db(db_type: str = None):
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/migrations.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Migration of tables created before the natural keys (note_id, comment_id, user_id ...) were unique.
+
+For every unique index of the models that an existing table lacks, rows duplicating a key are
+removed (the most recently inserted one is kept) and the plain index of the same name is
+replaced by the unique one. Runs from --init_db and when a SQL store is opened; tables that
+are up to date are left alone.
+"""
+from typing import List, Set
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import DropIndex
+
+import config
+from tools import utils
+
+from .db_session import get_async_engine
+from .models import Base
+
+_migrated: Set[str] = set()
+
+
+def _delete_duplicates(conn: Connection, table: Table, columns: List[str]) -> int:
+    preparer = conn.dialect.identifier_preparer
+    table_name = preparer.quote(table.name)
+    key = ", ".join(preparer.quote(column) for column in columns)
+    not_null = " AND ".join(f"{preparer.quote(column)} IS NOT NULL" for column in columns)
+    # the derived table lets MySQL select from the table it deletes from
+    result = conn.execute(text(
+        f"DELETE FROM {table_name} WHERE {not_null} AND id NOT IN ("
+        f"SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM {table_name} WHERE {not_null} GROUP BY {key}) AS keep_rows)"
+    ))
+    return result.rowcount or 0
+
+
+def _migrate_unique_keys(conn: Connection) -> List[str]:
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    migrated = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {index["name"]: index for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if not index.unique:
+                continue
+            current = existing_indexes.get(index.name)
+            if current is not None and current.get("unique"):
+                continue
+            columns = [column.name for column in index.columns]
+            deleted = _delete_duplicates(conn, table, columns)
+            if current is not None:
+                conn.execute(DropIndex(index))
+            index.create(conn)
+            migrated.append(index.name)
+            utils.logger.info(
+                f"[migrate_unique_keys] {table.name}({', '.join(columns)}) is unique now, {deleted} duplicate rows removed"
+            )
+    return migrated
+
+
+async def migrate_unique_keys(db_type: str = None) -> List[str]:
+    """
+    Give existing tables the unique natural key indexes the upserts rely on, once per process
+    Returns:
+        names of the indexes made unique
+    """
+    db_type = db_type or config.SAVE_DATA_OPTION
+    if db_type in _migrated:
+        return []
+    engine = get_async_engine(db_type)
+    if engine is None:
+        return []
+    async with engine.begin() as conn:
+        migrated = await conn.run_sync(_migrate_unique_keys)
+    _migrated.add(db_type)
+    return migrated
@@ -20,6 +20,7 @@
 import asyncio
 from typing import Dict, List, Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import UpdateOne
 from config import db_config
 from tools import utils
 
@@ -112,6 +113,23 @@ class MongoDBStoreBase:
             utils.logger.error(f"[MongoDBStoreBase] Save failed ({self.collection_prefix}_{collection_suffix}): {e}")
             return False
 
+    async def save_or_update_many(self, collection_suffix: str, key: str, items: List[Dict]) -> bool:
+        """Save or update a batch of data with one bulk_write, upserted on item[key]; items without the key are skipped"""
+        # a key seen twice keeps its last item
+        keyed_items = {item[key]: item for item in items if item and item.get(key)}
+        if not keyed_items:
+            return True
+        try:
+            collection = await self.get_collection(collection_suffix)
+            await collection.bulk_write(
+                [UpdateOne({key: value}, {"$set": item}, upsert=True) for value, item in keyed_items.items()],
+                ordered=False,
+            )
+            return True
+        except Exception as e:
+            utils.logger.error(f"[MongoDBStoreBase] Bulk save failed ({self.collection_prefix}_{collection_suffix}): {e}")
+            return False
+
     async def find_one(self, collection_suffix: str, query: Dict) -> Optional[Dict]:
         """Query a single record"""
         try:
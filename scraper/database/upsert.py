@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""Dialect native upserts on the models' unique natural keys"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# bound parameters per statement, below SQLite's historical limit of 999
+_MAX_PARAMS_PER_STATEMENT = 900
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+    "mysql": mysql.insert,
+}
+
+
+async def upsert(
+    session: AsyncSession,
+    model,
+    rows: Iterable[Dict],
+    key_columns: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    insert_only_columns: Sequence[str] = ("add_ts",),
+) -> None:
+    """
+    Insert the rows, or update them where their natural key already exists, in one round trip:
+    INSERT ... ON CONFLICT DO UPDATE on SQLite / PostgreSQL, INSERT ... ON DUPLICATE KEY UPDATE on MySQL.
+    The key columns need a unique index (see database/migrations.py).
+    Args:
+        session: db session
+        model: ORM model
+        rows: column -> value dicts, keys that are not columns of the model are ignored
+        key_columns: the natural key the unique index covers
+        update_columns: columns refreshed on an existing row, defaults to every given column
+        insert_only_columns: columns only written on insert
+    """
+    insert = _INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        raise ValueError(f"[upsert] Unsupported database dialect: {session.get_bind().dialect.name}")
+
+    table = model.__table__
+    columns = set(table.columns.keys()) - {"id"}
+    # rows with the same columns share a multi-row statement; a key seen twice keeps its last row,
+    # PostgreSQL refuses to update the same row twice in one statement
+    groups: Dict[Tuple[str, ...], Dict[Tuple, Dict]] = {}
+    for row in rows:
+        values = {name: value for name, value in row.items() if name in columns}
+        groups.setdefault(tuple(sorted(values)), {})[tuple(values.get(key) for key in key_columns)] = values
+
+    for names, keyed_rows in groups.items():
+        update_names = [
+            name for name in (update_columns or names)
+            if name in names and name not in key_columns and name not in insert_only_columns
+        ]
+        group_rows: List[Dict] = list(keyed_rows.values())
+        chunk_size = max(1, _MAX_PARAMS_PER_STATEMENT // max(len(names), 1))
+        for start in range(0, len(group_rows), chunk_size):
+            stmt = insert(table).values(group_rows[start:start + chunk_size])
+            if session.get_bind().dialect.name == "mysql":
+                if update_names:
+                    stmt = stmt.on_duplicate_key_update({name: stmt.inserted[name] for name in update_names})
+                else:
+                    stmt = stmt.prefix_with("IGNORE")
+            elif update_names:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=list(key_columns), set_={name: stmt.excluded[name] for name in update_names}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=list(key_columns))
+            await session.execute(stmt)
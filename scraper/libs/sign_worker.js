@@ -0,0 +1,55 @@
+// Long-lived JS signing worker used by tools/js_sign_worker.py
+// 仅供学习交流使用，严禁用于商业用途
+//
+// Usage: node libs/sign_worker.js <sign lib path>
+//
+// Protocol: one JSON object per line (newline framed) on stdin/stdout.
+//   request : {"id": 1, "fn": "sign_datail", "args": ["a=1", "Mozilla/5.0 ..."]}
+//   response: {"id": 1, "result": "..."}  or  {"id": 1, "error": "message"}
+// Requests are independent, so the caller may pipeline as many as it likes.
+
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+const libPath = process.argv[2];
+if (!libPath) {
+    process.stderr.write('sign_worker: missing sign lib path\n');
+    process.exit(2);
+}
+
+// Same global scope semantics as execjs.compile: top level functions become globals
+globalThis.require = require;
+let source = fs.readFileSync(libPath, 'utf-8');
+if (source.charCodeAt(0) === 0xFEFF) {
+    source = source.slice(1);
+}
+vm.runInThisContext(source, { filename: libPath });
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + '\n');
+}
+
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        reply({ id: null, error: 'invalid request: ' + e.message });
+        return;
+    }
+    try {
+        const fn = globalThis[request.fn];
+        if (typeof fn !== 'function') {
+            throw new Error('function not found: ' + request.fn);
+        }
+        reply({ id: request.id, result: fn.apply(null, request.args || []) });
+    } catch (e) {
+        reply({ id: request.id, error: String(e && e.stack || e) });
+    }
+});
+rl.on('close', () => process.exit(0));
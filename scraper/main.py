@@ -30,12 +30,12 @@ if sys.stderr and hasattr(sys.stderr, 'buffer'):
         sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 import asyncio
-from typing import Optional, Type
+from typing import Optional, Type, cast
 
 import cmd_arg
 import config
 from database import db
-from base.base_crawler import AbstractCrawler
+from base.base_crawler import AbstractCrawler, WorkQueueCrawler
 from media_platform.bilibili import BilibiliCrawler
 from media_platform.douyin import DouYinCrawler
 from media_platform.kuaishou import KuaishouCrawler
@@ -43,7 +43,15 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from store.store_registry import close_stores
+from tools.adaptive_concurrency import concurrency_metrics
 from tools.async_file_writer import AsyncFileWriter
+from tools.buffered_writer import close_record_writers, flush_record_writers
+from tools.checkpoint import close_checkpoint, complete_checkpoint
+from tools.http_transport import close_all_transports
+from tools.js_sign_worker import close_all_sign_worker_pools
+from tools.seen_index import close_seen_index
+from tools.work_queue import close_work_queues, get_work_queue
 from var import crawler_type_var
 
 
@@ -83,8 +91,22 @@ def _flush_excel_if_needed() -> None:
         print(f"[Main] Error flushing Excel data: {e}")
 
 
+async def _compact_jsonl_if_needed() -> None:
+    if config.SAVE_DATA_OPTION != "jsonl" or not config.JSONL_COMPACT_ON_FINISH:
+        return
+
+    try:
+        file_writer = AsyncFileWriter(
+            platform=config.PLATFORM,
+            crawler_type=crawler_type_var.get(),
+        )
+        await file_writer.compact_jsonl_files()
+    except Exception as e:
+        print(f"[Main] Error compacting jsonl files: {e}")
+
+
 async def _generate_wordcloud_if_needed() -> None:
-    if config.SAVE_DATA_OPTION != "json" or not config.ENABLE_GET_WORDCLOUD:
+    if config.SAVE_DATA_OPTION not in ("json", "jsonl") or not config.ENABLE_GET_WORDCLOUD:
         return
 
     try:
@@ -107,12 +129,29 @@ async def main() -> None:
         return
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+    if config.CRAWLER_WORK_QUEUE_ROLE and not crawler.supports_work_queue:
+        raise ValueError(f"Platform {config.PLATFORM} does not support the distributed work queue yet")
+    if config.CRAWLER_WORK_QUEUE_ROLE == "coordinator":
+        queue = get_work_queue(config.PLATFORM)
+        await cast(WorkQueueCrawler, crawler).enqueue_work(queue)
+        print(f"[Main] Work queue {queue.name}: {await queue.stats()}")
+        return
+
     await crawler.start()
 
+    for name, metrics in concurrency_metrics().items():
+        print(f"[Main] Concurrency {name}: {metrics}")
+
     _flush_excel_if_needed()
+    await flush_record_writers()
+    # only a crawl that returned normally may drop its checkpoint, its records are on disk now
+    await complete_checkpoint()
+
+    # The wordcloud reads the JSON array files, compact the jsonl files first
+    await _compact_jsonl_if_needed()
 
     # Generate wordcloud after crawling is complete
-    # Only for JSON save mode
+    # Only for JSON save modes
     await _generate_wordcloud_if_needed()
 
 
@@ -135,6 +174,42 @@ async def async_cleanup() -> None:
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] Error closing browser context: {e}")
 
+    try:
+        await close_all_transports()
+    except Exception as e:
+        print(f"[Main] Error closing http connection pools: {e}")
+
+    try:
+        await close_all_sign_worker_pools()
+    except Exception as e:
+        print(f"[Main] Error stopping js sign workers: {e}")
+
+    try:
+        await close_work_queues()
+    except Exception as e:
+        print(f"[Main] Error closing work queue connections: {e}")
+
+    try:
+        await close_stores()
+    except Exception as e:
+        print(f"[Main] Error closing stores: {e}")
+
+    try:
+        await close_record_writers()
+    except Exception as e:
+        print(f"[Main] Error flushing buffered store files: {e}")
+
+    try:
+        # after the store files, so the checkpoint never claims records that are not on disk
+        await close_checkpoint()
+    except Exception as e:
+        print(f"[Main] Error saving crawl checkpoint: {e}")
+
+    try:
+        await close_seen_index()
+    except Exception as e:
+        print(f"[Main] Error closing incremental crawl index: {e}")
+
     if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.close()
 
@@ -34,13 +34,21 @@ import config
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.adaptive_concurrency import observe_request_errors
+from tools.comment_fanout import expand_comment_threads
+from tools.http_transport import HttpTransport
+from tools.rate_limiter import ENDPOINT_MEDIA, classify_endpoint, rate_limit
+from tools.single_flight import coalesce_requests
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
-from .exception import DataFetchError
+from .exception import DataFetchError, WbiSignRejectedError
 from .field import CommentOrderType, SearchOrderType
-from .help import BilibiliSign
+from .help import WbiKeyManager
+
+# Response codes returned when the w_rid signature does not match the current wbi keys
+WBI_SIGN_REJECTED_CODES = (-403, -352)
 
 
 class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
@@ -61,20 +69,28 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # Pooled keep-alive connections reused for the client's whole lifetime
+        self.transport = HttpTransport(proxy=proxy, timeout=timeout)
+        # wbi keys rotate about daily, cache them instead of reading localStorage per request
+        self.wbi_key_manager = WbiKeyManager(self._fetch_wbi_keys, ttl=config.BILI_WBI_KEY_TTL)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
+    @coalesce_requests
+    @observe_request_errors
     async def request(self, method, url, **kwargs) -> Any:
         # Check if proxy has expired before each request
         await self._refresh_proxy_if_expired()
+        await rate_limit("bili", classify_endpoint(url))
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self.transport.request(method, url, timeout=self.timeout, **kwargs)
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
+        if data.get("code") in WBI_SIGN_REJECTED_CODES:
+            raise WbiSignRejectedError(data.get("message", "wbi sign rejected"))
         if data.get("code") != 0:
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
@@ -90,15 +106,23 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        signer = await self.wbi_key_manager.get_signer()
+        return signer.sign(req_data)
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
-        Get the latest img_key and sub_key
+        Get the img_key and sub_key, cached for BILI_WBI_KEY_TTL seconds
+        :return:
+        """
+        return await self.wbi_key_manager.get_keys()
+
+    async def _fetch_wbi_keys(self, force: bool = False) -> Tuple[str, str]:
+        """
+        Read the latest img_key and sub_key from the browser, falling back to the nav api
+        :param force: the keys were rejected, skip the browser's (possibly stale) copy and the request memo
         :return:
         """
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
+        local_storage = {} if force else await self.playwright_page.evaluate("() => window.localStorage")
         wbi_img_urls = local_storage.get("wbi_img_urls", "")
         if not wbi_img_urls:
             img_url_from_storage = local_storage.get("wbi_img_url")
@@ -108,7 +132,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         if wbi_img_urls and "-" in wbi_img_urls:
             img_url, sub_url = wbi_img_urls.split("-")
         else:
-            resp = await self.request(method="GET", url=self._host + "/x/web-interface/nav")
+            resp = await self.request(method="GET", url=self._host + "/x/web-interface/nav", memoize=not force)
             img_url: str = resp['wbi_img']['img_url']
             sub_url: str = resp['wbi_img']['sub_url']
         img_key = img_url.rsplit('/', 1)[1].split('.')[0]
@@ -116,6 +140,16 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         return img_key, sub_key
 
     async def get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
+        try:
+            return await self._get(uri, params, enable_params_sign)
+        except WbiSignRejectedError:
+            if not enable_params_sign:
+                raise
+            utils.logger.warning(f"[BilibiliClient.get] wbi sign rejected for {uri}, refreshing wbi keys and retrying")
+            self.wbi_key_manager.invalidate(force=True)
+            return await self._get(uri, params, enable_params_sign)
+
+    async def _get(self, uri: str, params=None, enable_params_sign: bool = True) -> Dict:
         final_uri = uri
         if enable_params_sign:
             params = await self.pre_request_data(params)
@@ -125,6 +159,14 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=self.headers)
 
     async def post(self, uri: str, data: dict) -> Dict:
+        try:
+            return await self._post(uri, data)
+        except WbiSignRejectedError:
+            utils.logger.warning(f"[BilibiliClient.post] wbi sign rejected for {uri}, refreshing wbi keys and retrying")
+            self.wbi_key_manager.invalidate(force=True)
+            return await self._post(uri, data)
+
+    async def _post(self, uri: str, data: dict) -> Dict:
         data = await self.pre_request_data(data)
         json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
         return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers)
@@ -148,6 +190,8 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # a new login session may come with new wbi keys
+        self.wbi_key_manager.invalidate()
 
     async def search_video_by_keyword(
         self,
@@ -222,19 +266,19 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
         # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if 200 <= response.status_code < 300:
-                    return response.content
-                utils.logger.error(
-                    f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
-                )
-                return None
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # Keep original exception type name for developer debugging
-                return None
+        await rate_limit("bili", ENDPOINT_MEDIA)
+        try:
+            response = await self.transport.request("GET", url, timeout=self.timeout, headers=self.headers, follow_redirects=True)
+            response.raise_for_status()
+            if 200 <= response.status_code < 300:
+                return response.content
+            utils.logger.error(
+                f"[BilibiliClient.get_video_media] Unexpected status {response.status_code} for {url}"
+            )
+            return None
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # Keep original exception type name for developer debugging
+            return None
 
     async def get_video_comments(
         self,
@@ -311,15 +355,17 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' is not a boolean for video_id: {video_id}. Assuming end of comments.")
                 is_end = True
             if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {await self.get_video_all_level_two_comments(video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval, callback)}
+                # level two comment threads are independent, page them concurrently
+                await expand_comment_threads(
+                    [comment for comment in comment_list if comment.get("rcount", 0) > 0],
+                    lambda comment: self.get_video_all_level_two_comments(
+                        video_id, comment["rpid"], CommentOrderType.DEFAULT, 10, crawl_interval, callback
+                    ),
+                )
             if len(result) + len(comment_list) > max_count:
                 comment_list = comment_list[:max_count - len(result)]
             if callback:  # If there is a callback function, execute it
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if not is_fetch_sub_comments:
                 result.extend(comment_list)
                 continue
@@ -351,7 +397,6 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
             comment_list: List[Dict] = result.get("replies", [])
             if callback:  # If there is a callback function, execute it
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
@@ -501,7 +546,6 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 fans_list = fans_list[:max_count - len(result)]
             if callback:  # If there is a callback function, execute it
                 await callback(creator_info, fans_list)
-            await asyncio.sleep(crawl_interval)
             if not fans_list:
                 break
             result.extend(fans_list)
@@ -535,7 +579,6 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 followings_list = followings_list[:max_count - len(result)]
             if callback:  # If there is a callback function, execute it
                 await callback(creator_info, followings_list)
-            await asyncio.sleep(crawl_interval)
             if not followings_list:
                 break
             result.extend(followings_list)
@@ -570,6 +613,5 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
                 dynamics_list = dynamics_list[:max_count - len(result)]
             if callback:
                 await callback(creator_info, dynamics_list)
-            await asyncio.sleep(crawl_interval)
             result.extend(dynamics_list)
         return result
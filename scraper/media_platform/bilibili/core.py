@@ -44,8 +44,10 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
+from tools.adaptive_concurrency import get_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from var import crawler_type_var
 
 from .client import BilibiliClient
 from .exception import DataFetchError
@@ -185,19 +187,25 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20  # bilibili limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
-                    page += 1
-                    continue
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword(keyword, scheduler))
 
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
+    async def search_keyword(self, keyword: str, scheduler: KeywordScheduler) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
+        bili_limit_count = 20  # bilibili limit page fixed value
+        start_page = config.START_PAGE
+        max_notes_count = max(scheduler.quota(keyword), bili_limit_count)
+        utils.logger.info(f"[BilibiliCrawler.search_keyword] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * bili_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[BilibiliCrawler.search_keyword] Skip page: {page}")
+                page += 1
+                continue
+
+            utils.logger.info(f"[BilibiliCrawler.search_keyword] search bilibili keyword: {keyword}, page: {page}")
+            video_id_list: List[str] = []
+            async with scheduler.turn(keyword):
                 videos_res = await self.bili_client.search_video_by_keyword(
                     keyword=keyword,
                     page=page,
@@ -206,32 +214,28 @@ class BilibiliCrawler(AbstractCrawler):
                     pubtime_begin_s=0,  # Publish date start timestamp
                     pubtime_end_s=0,  # Publish date end timestamp
                 )
-                video_list: List[Dict] = videos_res.get("result")
-
-                if not video_list:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
-                    break
-
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
-                page += 1
+            video_list: List[Dict] = videos_res.get("result")
 
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            if not video_list:
+                utils.logger.info(f"[BilibiliCrawler.search_keyword] No more videos for '{keyword}', moving to next keyword.")
+                break
 
-                await self.batch_get_video_comments(video_id_list)
+            semaphore = get_concurrency_limiter("bili", "detail")
+            task_list = []
+            try:
+                task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+            except Exception as e:
+                utils.logger.warning(f"[BilibiliCrawler.search_keyword] error in the task list. The video for this page will not be included. {e}")
+            video_items = await asyncio.gather(*task_list)
+            for video_item in video_items:
+                if video_item:
+                    video_id_list.append(video_item.get("View").get("aid"))
+                    await bilibili_store.update_bilibili_video(video_item)
+                    await bilibili_store.update_up_info(video_item)
+                    await self.get_bilibili_video(video_item, semaphore)
+            page += 1
+
+            await self.batch_get_video_comments(video_id_list)
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -239,40 +243,44 @@ class BilibiliCrawler(AbstractCrawler):
         :param daily_limit: if True, strictly limit the number of notes per day and total.
         """
         utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Begin search with daily_limit={daily_limit}")
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword_in_time_range(keyword, scheduler, daily_limit))
+
+    async def search_keyword_in_time_range(self, keyword: str, scheduler: KeywordScheduler, daily_limit: bool) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
         bili_limit_count = 20
         start_page = config.START_PAGE
+        max_notes_count = scheduler.quota(keyword)
+        utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] Current search keyword: {keyword}")
+        total_notes_crawled_for_keyword = 0
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
-            total_notes_crawled_for_keyword = 0
-
-            for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
-                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
-                    break
+        for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
+            if (daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] Reached note quota for keyword '{keyword}', skipping remaining days.")
+                break
 
-                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
-                    break
+            if (not daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] Reached note quota for keyword '{keyword}', skipping remaining days.")
+                break
 
-                pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime("%Y-%m-%d"), end=day.strftime("%Y-%m-%d"))
-                page = 1
-                notes_count_this_day = 0
+            pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime("%Y-%m-%d"), end=day.strftime("%Y-%m-%d"))
+            page = 1
+            notes_count_this_day = 0
 
-                while True:
-                    if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
-                        utils.logger.info(f"[BilibiliCrawler.search] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
-                        break
-                    if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                        utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
-                        break
-                    if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                        break
+            while True:
+                if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
+                    utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
+                    break
+                if (daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                    utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] Reached note quota for keyword '{keyword}'.")
+                    break
+                if (not daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                    break
 
-                    try:
-                        utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
-                        video_id_list: List[str] = []
+                try:
+                    utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
+                    video_id_list: List[str] = []
+                    async with scheduler.turn(keyword):
                         videos_res = await self.bili_client.search_video_by_keyword(
                             keyword=keyword,
                             page=page,
@@ -281,43 +289,39 @@ class BilibiliCrawler(AbstractCrawler):
                             pubtime_begin_s=pubtime_begin_s,
                             pubtime_end_s=pubtime_end_s,
                         )
-                        video_list: List[Dict] = videos_res.get("result")
-
-                        if not video_list:
-                            utils.logger.info(f"[BilibiliCrawler.search] No more videos for '{keyword}' on {day.ctime()}, moving to next day.")
-                            break
-
-                        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                        task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                        video_items = await asyncio.gather(*task_list)
-
-                        for video_item in video_items:
-                            if video_item:
-                                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
-                                    break
-                                notes_count_this_day += 1
-                                total_notes_crawled_for_keyword += 1
-                                video_id_list.append(video_item.get("View").get("aid"))
-                                await bilibili_store.update_bilibili_video(video_item)
-                                await bilibili_store.update_up_info(video_item)
-                                await self.get_bilibili_video(video_item, semaphore)
-
-                        page += 1
-
-                        # Sleep after page navigation
-                        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                        await self.batch_get_video_comments(video_id_list)
-
-                    except Exception as e:
-                        utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
+                    video_list: List[Dict] = videos_res.get("result")
+
+                    if not video_list:
+                        utils.logger.info(f"[BilibiliCrawler.search_keyword_in_time_range] No more videos for '{keyword}' on {day.ctime()}, moving to next day.")
                         break
 
+                    semaphore = get_concurrency_limiter("bili", "detail")
+                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+                    video_items = await asyncio.gather(*task_list)
+
+                    for video_item in video_items:
+                        if video_item:
+                            if (daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                                break
+                            if (not daily_limit and total_notes_crawled_for_keyword >= max_notes_count):
+                                break
+                            if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
+                                break
+                            notes_count_this_day += 1
+                            total_notes_crawled_for_keyword += 1
+                            video_id_list.append(video_item.get("View").get("aid"))
+                            await bilibili_store.update_bilibili_video(video_item)
+                            await bilibili_store.update_up_info(video_item)
+                            await self.get_bilibili_video(video_item, semaphore)
+
+                    page += 1
+
+                    await self.batch_get_video_comments(video_id_list)
+
+                except Exception as e:
+                    utils.logger.error(f"[BilibiliCrawler.search_keyword_in_time_range] Error searching on {day.ctime()}: {e}")
+                    break
+
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
         batch get video comments
@@ -329,7 +333,7 @@ class BilibiliCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[BilibiliCrawler.batch_get_video_comments] video ids:{video_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("bili", "comments")
         task_list: List[Task] = []
         for video_id in video_id_list:
             task = asyncio.create_task(self.get_comments(video_id, semaphore), name=video_id)
@@ -346,11 +350,9 @@ class BilibiliCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching comments for video {video_id}")
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=0,
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=bilibili_store.batch_update_bilibili_video_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
@@ -376,8 +378,6 @@ class BilibiliCrawler(AbstractCrawler):
             await self.get_specified_videos(video_bvids_list)
             if int(result["page"]["count"]) <= pn * ps:
                 break
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[BilibiliCrawler.get_creator_videos] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {pn}")
             pn += 1
 
     async def get_specified_videos(self, video_url_list: List[str]):
@@ -397,7 +397,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.error(f"[BilibiliCrawler.get_specified_videos] Failed to parse video URL: {e}")
                 continue
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("bili", "detail")
         task_list = [self.get_video_info_task(aid=0, bvid=video_id, semaphore=semaphore) for video_id in bvids_list]
         video_details = await asyncio.gather(*task_list)
         video_aids_list = []
@@ -424,10 +424,6 @@ class BilibiliCrawler(AbstractCrawler):
             try:
                 result = await self.bili_client.get_video_info(aid=aid, bvid=bvid)
 
-                # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.get_video_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {bvid or aid}")
-
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[BilibiliCrawler.get_video_info_task] Get video detail error: {ex}")
@@ -593,8 +589,6 @@ class BilibiliCrawler(AbstractCrawler):
             return
 
         content = await self.bili_client.get_video_media(video_url)
-        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-        utils.logger.info(f"[BilibiliCrawler.get_bilibili_video] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video {aid}")
         if content is None:
             return
         extension_file_name = f"video.mp4"
@@ -662,7 +656,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_fans] begin get creator_id: {creator_id} fans ...")
                 await self.bili_client.get_creator_all_fans(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=0,
                     callback=bilibili_store.batch_update_bilibili_creator_fans,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -685,7 +679,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_followings] begin get creator_id: {creator_id} followings ...")
                 await self.bili_client.get_creator_all_followings(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=0,
                     callback=bilibili_store.batch_update_bilibili_creator_followings,
                     max_count=config.CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES,
                 )
@@ -708,7 +702,7 @@ class BilibiliCrawler(AbstractCrawler):
                 utils.logger.info(f"[BilibiliCrawler.get_dynamics] begin get creator_id: {creator_id} dynamics ...")
                 await self.bili_client.get_creator_all_dynamics(
                     creator_info=creator_info,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                    crawl_interval=0,
                     callback=bilibili_store.batch_update_bilibili_creator_dynamics,
                     max_count=config.CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES,
                 )
@@ -30,5 +30,9 @@ class DataFetchError(RequestError):
     """something error when fetch"""
 
 
+class WbiSignRejectedError(DataFetchError):
+    """the server rejected the wbi signature, usually because the wbi keys rotated"""
+
+
 class IPBlockError(RequestError):
     """fetch so fast that the server block us ip"""
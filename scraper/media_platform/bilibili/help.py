@@ -23,36 +23,41 @@
 # @Time    : 2023/12/2 23:26
 # @Desc    : bilibili request parameter signing
 # Reverse engineering implementation reference: https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
+import asyncio
 import re
+import time
 import urllib.parse
 from hashlib import md5
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from model.m_bilibili import VideoUrlInfo, CreatorUrlInfo
 from tools import utils
 
 
+# Fixed permutation used to derive the 32-char mixin key from img_key + sub_key
+MIXIN_KEY_ENC_TAB = (
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+)
+
+
 class BilibiliSign:
     def __init__(self, img_key: str, sub_key: str):
         self.img_key = img_key
         self.sub_key = sub_key
-        self.map_table = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
+        self.map_table = MIXIN_KEY_ENC_TAB
+        # the salt only depends on the key pair, derive it once instead of per request
+        self.salt = self.get_salt()
 
     def get_salt(self) -> str:
         """
         Get the salted key
         :return:
         """
-        salt = ""
         mixin_key = self.img_key + self.sub_key
-        for mt in self.map_table:
-            salt += mixin_key[mt]
-        return salt[:32]
+        return "".join(mixin_key[mt] for mt in self.map_table)[:32]
 
     def sign(self, req_data: Dict) -> Dict:
         """
@@ -71,12 +76,60 @@ class BilibiliSign:
             in req_data.items()
         }
         query = urllib.parse.urlencode(req_data)
-        salt = self.get_salt()
-        wbi_sign = md5((query + salt).encode()).hexdigest()  # Calculate w_rid
+        wbi_sign = md5((query + self.salt).encode()).hexdigest()  # Calculate w_rid
         req_data['w_rid'] = wbi_sign
         return req_data
 
 
+class WbiKeyManager:
+    """
+    Caches the WBI key pair (and the BilibiliSign built from it) for a TTL.
+
+    The keys rotate about once a day, so reading them from the browser on every
+    request is wasted work. Concurrent callers share a single refresh, and
+    invalidate() makes the next caller fetch the keys again; invalidate(force=True)
+    (after the server rejected a signature) also makes the fetch skip any cached copy.
+    """
+
+    def __init__(self, fetch_keys: Callable[[bool], Awaitable[Tuple[str, str]]], ttl: float):
+        """
+        Args:
+            fetch_keys: coroutine function returning the latest (img_key, sub_key), called with
+                force=True when the keys it may read from a cache were rejected
+            ttl: seconds a fetched key pair stays valid
+        """
+        self._fetch_keys = fetch_keys
+        self._ttl = ttl
+        self._signer: Optional[BilibiliSign] = None
+        self._expires_at = 0.0
+        self._force = False
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self) -> bool:
+        return self._signer is not None and time.monotonic() < self._expires_at
+
+    async def get_signer(self) -> BilibiliSign:
+        if self._is_fresh():
+            return self._signer
+        async with self._lock:
+            # another caller may have refreshed while we were waiting for the lock
+            if not self._is_fresh():
+                img_key, sub_key = await self._fetch_keys(self._force)
+                self._force = False
+                self._signer = BilibiliSign(img_key, sub_key)
+                self._expires_at = time.monotonic() + self._ttl
+                utils.logger.info(f"[WbiKeyManager.get_signer] wbi keys refreshed, img_key: {img_key}, sub_key: {sub_key}")
+            return self._signer
+
+    async def get_keys(self) -> Tuple[str, str]:
+        signer = await self.get_signer()
+        return signer.img_key, signer.sub_key
+
+    def invalidate(self, force: bool = False) -> None:
+        self._expires_at = 0.0
+        self._force = self._force or force
+
+
 def parse_video_info_from_url(url: str) -> VideoUrlInfo:
     """
     Parse video ID from Bilibili video URL
@@ -19,7 +19,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -36,8 +35,10 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
+from tools.adaptive_concurrency import get_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from var import crawler_type_var
 
 from .client import DouYinClient
 from .exception import DataFetchError
@@ -119,56 +120,59 @@ class DouYinCrawler(AbstractCrawler):
         dy_limit_count = 10  # douyin limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
-        start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
-            while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page}")
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword(keyword, scheduler))
+
+    async def search_keyword(self, keyword: str, scheduler: KeywordScheduler) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
+        dy_limit_count = 10  # douyin limit page fixed value
+        start_page = config.START_PAGE
+        max_notes_count = max(scheduler.quota(keyword), dy_limit_count)
+        utils.logger.info(f"[DouYinCrawler.search_keyword] Current keyword: {keyword}")
+        aweme_list: List[str] = []
+        page = 0
+        dy_search_id = ""
+        while (page - start_page + 1) * dy_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[DouYinCrawler.search_keyword] Skip {page}")
+                page += 1
+                continue
+            try:
+                utils.logger.info(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword}, page: {page}")
+                async with scheduler.turn(keyword):
                     posts_res = await self.dy_client.search_info_by_keyword(
                         keyword=keyword,
                         offset=page * dy_limit_count - dy_limit_count,
                         publish_time=PublishTimeType(config.PUBLISH_TIME_TYPE),
                         search_id=dy_search_id,
                     )
-                    if posts_res.get("data") is None or posts_res.get("data") == []:
-                        utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
-                        break
-                except DataFetchError:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                if posts_res.get("data") is None or posts_res.get("data") == []:
+                    utils.logger.info(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
                     break
+            except DataFetchError:
+                utils.logger.error(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword} failed")
+                break
+
+            page += 1
+            if "data" not in posts_res:
+                utils.logger.error(f"[DouYinCrawler.search_keyword] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                break
+            dy_search_id = posts_res.get("extra", {}).get("logid", "")
+            page_aweme_list = []
+            for post_item in posts_res.get("data"):
+                try:
+                    aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
+                except TypeError:
+                    continue
+                aweme_list.append(aweme_info.get("aweme_id", ""))
+                page_aweme_list.append(aweme_info.get("aweme_id", ""))
+                await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+                await self.get_aweme_media(aweme_item=aweme_info)
+            
+            # Batch get note comments for the current page
+            await self.batch_get_note_comments(page_aweme_list)
 
-                page += 1
-                if "data" not in posts_res:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
-                    break
-                dy_search_id = posts_res.get("extra", {}).get("logid", "")
-                page_aweme_list = []
-                for post_item in posts_res.get("data"):
-                    try:
-                        aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
-                    except TypeError:
-                        continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
-                    page_aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
-                
-                # Batch get note comments for the current page
-                await self.batch_get_note_comments(page_aweme_list)
-
-                # Sleep after each page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-            utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
+        utils.logger.info(f"[DouYinCrawler.search_keyword] keyword:{keyword}, aweme_list:{aweme_list}")
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post from URLs or IDs"""
@@ -196,7 +200,7 @@ class DouYinCrawler(AbstractCrawler):
                 utils.logger.error(f"[DouYinCrawler.get_specified_awemes] Failed to parse video URL: {e}")
                 continue
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("dy", "detail")
         task_list = [self.get_aweme_detail(aweme_id=aweme_id, semaphore=semaphore) for aweme_id in aweme_id_list]
         aweme_details = await asyncio.gather(*task_list)
         for aweme_detail in aweme_details:
@@ -210,9 +214,6 @@ class DouYinCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 result = await self.dy_client.get_video_by_id(aweme_id)
-                # Sleep after fetching aweme detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.get_aweme_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching aweme {aweme_id}")
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[DouYinCrawler.get_aweme_detail] Get aweme detail error: {ex}")
@@ -230,7 +231,7 @@ class DouYinCrawler(AbstractCrawler):
             return
 
         task_list: List[Task] = []
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("dy", "comments")
         for aweme_id in aweme_list:
             task = asyncio.create_task(self.get_comments(aweme_id, semaphore), name=aweme_id)
             task_list.append(task)
@@ -241,18 +242,13 @@ class DouYinCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 # 将关键词列表传递给 get_aweme_all_comments 方法
-                # Use fixed crawling interval
-                crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
                 await self.dy_client.get_aweme_all_comments(
                     aweme_id=aweme_id,
-                    crawl_interval=crawl_interval,
+                    crawl_interval=0,
                     is_fetch_sub_comments=config.ENABLE_GET_SUB_COMMENTS,
                     callback=douyin_store.batch_update_dy_aweme_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
-                # Sleep after fetching comments
-                await asyncio.sleep(crawl_interval)
-                utils.logger.info(f"[DouYinCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for aweme {aweme_id}")
                 utils.logger.info(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} comments have all been obtained and filtered ...")
             except DataFetchError as e:
                 utils.logger.error(f"[DouYinCrawler.get_comments] aweme_id: {aweme_id} get comments failed, error: {e}")
@@ -287,7 +283,7 @@ class DouYinCrawler(AbstractCrawler):
         """
         Concurrently obtain the specified post list and save the data
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("dy", "detail")
         task_list = [self.get_aweme_detail(post_item.get("aweme_id"), semaphore) for post_item in video_list]
 
         note_details = await asyncio.gather(*task_list)
@@ -426,7 +422,6 @@ class DouYinCrawler(AbstractCrawler):
             if not url:
                 continue
             content = await self.dy_client.get_aweme_media(url)
-            await asyncio.sleep(random.random())
             if content is None:
                 continue
             extension_file_name = f"{picNum:>03d}.jpeg"
@@ -450,7 +445,6 @@ class DouYinCrawler(AbstractCrawler):
         if not video_download_url:
             return
         content = await self.dy_client.get_aweme_media(video_download_url)
-        await asyncio.sleep(random.random())
         if content is None:
             return
         extension_file_name = f"video.mp4"
@@ -24,17 +24,20 @@
 # @Time    : 2024/6/10 02:24
 # @Desc    : Get a_bogus parameter, for learning and communication only, do not use for commercial purposes, contact author to delete if infringement
 
+import asyncio
 import random
 import re
-from typing import Optional
+import time
+import urllib.parse
+from typing import Dict, Optional
 
-import execjs
 from playwright.async_api import Page
 
 from model.m_douyin import VideoUrlInfo, CreatorUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
+from tools.js_sign_worker import get_sign_worker_pool
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
+DOUYIN_SIGN_JS_PATH = "libs/douyin.js"
 
 def get_web_id():
     """
@@ -58,15 +61,109 @@ def get_web_id():
 
 
 
+# Browser fingerprint params sent with every web api request, they never change within a session
+DOUYIN_STATIC_PARAMS = {
+    "device_platform": "webapp",
+    "aid": "6383",
+    "channel": "channel_pc_web",
+    "version_code": "190600",
+    "version_name": "19.6.0",
+    "update_version_code": "170400",
+    "pc_client_type": "1",
+    "cookie_enabled": "true",
+    "browser_language": "zh-CN",
+    "browser_platform": "MacIntel",
+    "browser_name": "Chrome",
+    "browser_version": "125.0.0.0",
+    "browser_online": "true",
+    "engine_name": "Blink",
+    "os_name": "Mac OS",
+    "os_version": "10.15.7",
+    "cpu_core_num": "8",
+    "device_memory": "8",
+    "engine_version": "109.0",
+    "platform": "PC",
+    "screen_width": "2560",
+    "screen_height": "1440",
+    "effective_type": "4g",
+    "round_trip_time": "50",
+}
+
+
+class DouYinParamContext:
+    """
+    Snapshot of the common query params of the Douyin web api.
+
+    The session dependent values (msToken from localStorage / cookies, webid) are read
+    once and refreshed after ttl seconds or when invalidated, and the encoded query
+    string of the common params is built at the same time, so signing a request does
+    not need a round trip to the browser.
+    """
+
+    def __init__(self, page: Optional[Page], cookie_dict: Dict, ttl: float):
+        """
+        Args:
+            page: playwright page of douyin.com, used to read localStorage
+            cookie_dict: current cookies, msToken is taken from here if localStorage lacks it
+            ttl: seconds a snapshot stays valid
+        """
+        self._page = page
+        self._cookie_dict = cookie_dict
+        self._ttl = ttl
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self.common_params: Dict[str, str] = {}
+        self.common_query: str = ""
+
+    def _is_fresh(self) -> bool:
+        return bool(self.common_params) and time.monotonic() < self._expires_at
+
+    def invalidate(self, cookie_dict: Optional[Dict] = None) -> None:
+        if cookie_dict is not None:
+            self._cookie_dict = cookie_dict
+        self._expires_at = 0.0
+
+    async def refresh(self) -> None:
+        local_storage: Dict = {}
+        if self._page is not None:
+            local_storage = await self._page.evaluate("() => window.localStorage") or {}
+        common_params = dict(DOUYIN_STATIC_PARAMS)
+        common_params["webid"] = get_web_id()
+        common_params["msToken"] = local_storage.get("xmst") or self._cookie_dict.get("msToken")
+        self.common_params = common_params
+        self.common_query = urllib.parse.urlencode(common_params)
+        self._expires_at = time.monotonic() + self._ttl
+
+    async def ensure_fresh(self) -> "DouYinParamContext":
+        if not self._is_fresh():
+            async with self._lock:
+                if not self._is_fresh():
+                    await self.refresh()
+        return self
+
+    async def apply(self, params: Dict) -> str:
+        """
+        Add the common params to params in place and return the encoded query string
+        """
+        await self.ensure_fresh()
+        if params.keys() & self.common_params.keys():
+            # the common params win over the caller's, as they always did, so the pre-built query does not apply
+            params.update(self.common_params)
+            return urllib.parse.urlencode(params)
+        query_string = urllib.parse.urlencode(params)
+        params.update(self.common_params)
+        return f"{query_string}&{self.common_query}" if query_string else self.common_query
+
+
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     Get a_bogus parameter, currently does not support POST request type signature
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    return await get_a_bogus_from_js(url, params, user_agent)
 
-def get_a_bogus_from_js(url: str, params: str, user_agent: str):
+async def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
-    Get a_bogus parameter through js
+    Get a_bogus parameter through js, signed by the persistent node worker pool
     Args:
         url:
         params:
@@ -78,7 +175,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     sign_js_name = "sign_datail"
     if "/reply" in url:
         sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return await get_sign_worker_pool(DOUYIN_SIGN_JS_PATH).call(sign_js_name, params, user_agent)
 
 
 
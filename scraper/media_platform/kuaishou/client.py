@@ -24,13 +24,17 @@ import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
 from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.adaptive_concurrency import observe_request_errors
+from tools.comment_fanout import expand_comment_threads
+from tools.http_transport import HttpTransport
+from tools.rate_limiter import classify_endpoint, rate_limit
+from tools.single_flight import coalesce_requests
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -58,15 +62,20 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self.graphql = KuaiShouGraphQL()
+        # Pooled keep-alive connections reused for the client's whole lifetime
+        self.transport = HttpTransport(proxy=proxy, timeout=timeout)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
+    @coalesce_requests
+    @observe_request_errors
     async def request(self, method, url, **kwargs) -> Any:
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
+        # graphql calls share one url, so post() passes the endpoint class of the operation
+        await rate_limit("ks", kwargs.pop("endpoint", None) or classify_endpoint(url))
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self.transport.request(method, url, timeout=self.timeout, **kwargs)
         data: Dict = response.json()
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
@@ -84,9 +93,14 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
     async def post(self, uri: str, data: dict) -> Dict:
         json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
         return await self.request(
-            method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers
+            method="POST",
+            url=f"{self._host}{uri}",
+            data=json_str,
+            headers=self.headers,
+            endpoint=classify_endpoint(data.get("operationName", uri)),
         )
 
+    @observe_request_errors
     async def request_rest_v2(self, uri: str, data: dict) -> Dict:
         """
         Make REST API V2 request (for comment endpoints)
@@ -95,16 +109,16 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         :return: response data
         """
         await self._refresh_proxy_if_expired()
+        await rate_limit("ks", classify_endpoint(uri))
 
         json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(
-                method="POST",
-                url=f"{self._rest_host}{uri}",
-                data=json_str,
-                timeout=self.timeout,
-                headers=self.headers,
-            )
+        response = await self.transport.request(
+            method="POST",
+            url=f"{self._rest_host}{uri}",
+            data=json_str,
+            timeout=self.timeout,
+            headers=self.headers,
+        )
         result: Dict = response.json()
         if result.get("result") != 1:
             raise DataFetchError(f"REST API V2 error: {result}")
@@ -245,7 +259,6 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
             if callback:  # If there is a callback function, execute the callback function
                 await callback(photo_id, comments)
             result.extend(comments)
-            await asyncio.sleep(crawl_interval)
             sub_comments = await self.get_comments_all_sub_comments(
                 comments, photo_id, crawl_interval, callback
             )
@@ -275,20 +288,9 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
             )
             return []
 
-        result = []
-        for comment in comments:
-            # V2 API uses hasSubComments (boolean) instead of subCommentsPcursor (string)
-            has_sub_comments = comment.get("hasSubComments", False)
-            if not has_sub_comments:
-                continue
-
-            # V2 API uses comment_id (int) instead of commentId (string)
-            root_comment_id = comment.get("comment_id")
-            if not root_comment_id:
-                continue
-
+        async def expand_thread(root_comment_id) -> List[Dict]:
+            thread_comments = []
             sub_comment_pcursor = ""
-
             while sub_comment_pcursor != "no_more":
                 comments_res = await self.get_video_sub_comments(
                     photo_id, root_comment_id, sub_comment_pcursor
@@ -299,9 +301,17 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
 
                 if callback and sub_comments:
                     await callback(photo_id, sub_comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(sub_comments)
-        return result
+                thread_comments.extend(sub_comments)
+            return thread_comments
+
+        # V2 API uses hasSubComments (boolean) instead of subCommentsPcursor (string)
+        # and comment_id (int) instead of commentId (string)
+        root_comment_ids = [
+            comment.get("comment_id") for comment in comments
+            if comment.get("hasSubComments", False) and comment.get("comment_id")
+        ]
+        # threads of different root comments are independent, page them concurrently
+        return await expand_comment_threads(root_comment_ids, expand_thread)
 
     async def get_creator_info(self, user_id: str) -> Dict:
         """
@@ -348,6 +358,5 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
 
             if callback:
                 await callback(videos)
-            await asyncio.sleep(crawl_interval)
             result.extend(videos)
         return result
@@ -19,10 +19,10 @@
 
 import asyncio
 import json
+import time
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode, quote
 
-import requests
 from playwright.async_api import BrowserContext, Page
 from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
 
@@ -31,9 +31,15 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.adaptive_concurrency import observe_request_errors, report_response
+from tools.comment_fanout import expand_comment_threads
+from tools.http_transport import HttpTransport
+from tools.rate_limiter import classify_endpoint, rate_limit
+from tools.single_flight import coalesce_requests
 
 from .field import SearchNoteType, SearchSortType
-from .help import TieBaExtractor
+from .help import TieBaExtractor, is_captcha_or_blank_page
+from .page_pool import TiebaPagePool
 
 
 class BaiduTieBaClient(AbstractApiClient):
@@ -57,37 +63,33 @@ class BaiduTieBaClient(AbstractApiClient):
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
         self.playwright_page = playwright_page  # Playwright page object
+        # Tabs used for HTML crawling, starts with the context page and is grown by the crawler after login
+        self.page_pool: Optional[TiebaPagePool] = (
+            TiebaPagePool([playwright_page], nav_timeout=config.TIEBA_PAGE_NAV_TIMEOUT) if playwright_page else None
+        )
+        # One pooled keep-alive session per proxy, keyed by the httpx proxy url (None = direct)
+        self._transports: Dict[Optional[str], HttpTransport] = {}
 
-    def _sync_request(self, method, url, proxy=None, **kwargs):
+    def _get_transport(self, proxy: Optional[str] = None) -> HttpTransport:
         """
-        Synchronous requests method
+        Get the pooled session bound to the given proxy, created on first use
         Args:
-            method: Request method
-            url: Request URL
-            proxy: Proxy IP
-            **kwargs: Other request parameters
+            proxy: httpx proxy url, None for direct connection
 
         Returns:
-            Response object
-        """
-        # Construct proxy dictionary
-        proxies = None
-        if proxy:
-            proxies = {
-                "http": proxy,
-                "https": proxy,
-            }
-
-        # Send request
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=self.headers,
-            proxies=proxies,
-            timeout=self.timeout,
-            **kwargs
-        )
-        return response
+            HttpTransport of that proxy
+        """
+        transport = self._transports.get(proxy)
+        if transport is None:
+            transport = HttpTransport(proxy=proxy, timeout=self.timeout)
+            self._transports[proxy] = transport
+        return transport
+
+    async def _retire_transport(self, proxy: Optional[str]) -> None:
+        """Drop the session of a proxy that is no longer used, after its in-flight requests finish"""
+        transport = self._transports.pop(proxy, None)
+        if transport is not None:
+            await transport.retire()
 
     async def _refresh_proxy_if_expired(self) -> None:
         """
@@ -102,15 +104,20 @@ class BaiduTieBaClient(AbstractApiClient):
             )
             new_proxy = await self.ip_pool.get_or_refresh_proxy()
             # Update proxy URL
+            old_proxy = self.default_ip_proxy
             _, self.default_ip_proxy = utils.format_proxy_info(new_proxy)
+            if old_proxy != self.default_ip_proxy:
+                await self._retire_transport(old_proxy)
             utils.logger.info(
                 f"[BaiduTieBaClient._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
 
+    @coalesce_requests
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @observe_request_errors
     async def request(self, method, url, return_ori_content=False, proxy=None, **kwargs) -> Union[str, Any]:
         """
-        Common request method wrapper for requests, handles request responses
+        Common request method over the pooled async session, handles request responses
         Args:
             method: Request method
             url: Request URL
@@ -123,15 +130,15 @@ class BaiduTieBaClient(AbstractApiClient):
         """
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
+        await rate_limit("tieba", classify_endpoint(url))
 
         actual_proxy = proxy if proxy else self.default_ip_proxy
 
-        # Execute synchronous requests in thread pool
-        response = await asyncio.to_thread(
-            self._sync_request,
+        response = await self._get_transport(actual_proxy).request(
             method,
             url,
-            actual_proxy,
+            headers=self.headers,
+            timeout=self.timeout,
             **kwargs
         )
 
@@ -172,7 +179,9 @@ class BaiduTieBaClient(AbstractApiClient):
                 proxie_model = await self.ip_pool.get_proxy()
                 _, proxy = utils.format_proxy_info(proxie_model)
                 res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, proxy=proxy, **kwargs)
-                self.default_ip_proxy = proxy
+                old_proxy, self.default_ip_proxy = self.default_ip_proxy, proxy
+                if old_proxy != proxy:
+                    await self._retire_transport(old_proxy)
                 return res
 
             utils.logger.error(f"[BaiduTieBaClient.get] Reached maximum retry attempts, IP is blocked, please try a new IP proxy: {e}")
@@ -240,6 +249,54 @@ class BaiduTieBaClient(AbstractApiClient):
         self.headers["Cookie"] = cookie_str
         utils.logger.info("[BaiduTieBaClient.update_cookies] Cookie has been updated")
 
+    def _render_free_enabled(self) -> bool:
+        return config.TIEBA_RENDER_FREE_FETCH and self.page_pool is not None and self.page_pool.browser_context is not None
+
+    async def _request_page_text(self, url: str, expect_html: bool = True) -> Optional[str]:
+        """
+        Fetch the raw response body through the browser context's request api, which carries the
+        real browser cookies but skips rendering, scripts, images and layout
+        Args:
+            url: page url
+            expect_html: treat a body without any html tag as a blank page (fragments are fine)
+
+        Returns:
+            response text, None when the request failed or hit a captcha / blank page
+        """
+        request_headers = {k: v for k, v in self.headers.items() if k.lower() != "cookie"}
+        try:
+            response = await self.page_pool.browser_context.request.get(
+                url, headers=request_headers, timeout=config.TIEBA_PAGE_NAV_TIMEOUT * 1000
+            )
+            if not response.ok:
+                utils.logger.warning(f"[BaiduTieBaClient._request_page_text] status {response.status} for {url}, falling back to page navigation")
+                return None
+            text = await response.text()
+        except Exception as e:
+            utils.logger.warning(f"[BaiduTieBaClient._request_page_text] request failed for {url}, falling back to page navigation: {e}")
+            return None
+        if is_captcha_or_blank_page(response.url, text, expect_html=expect_html):
+            utils.logger.warning(f"[BaiduTieBaClient._request_page_text] captcha or blank page for {url}, falling back to page navigation")
+            return None
+        return text
+
+    async def _fetch_page_html(self, url: str) -> str:
+        """
+        Get the html of a Tieba page, render-free when possible, otherwise by navigating a pooled tab
+        Args:
+            url: page url
+
+        Returns:
+            page html
+        """
+        await rate_limit("tieba", classify_endpoint(url))
+        start = time.perf_counter()
+        html = await self._request_page_text(url) if self._render_free_enabled() else None
+        if html is None:
+            html = await self.page_pool.fetch_html(url)
+        report_response(time.perf_counter() - start)
+        return html
+
     async def get_notes_by_keyword(
         self,
         keyword: str,
@@ -280,14 +337,8 @@ class BaiduTieBaClient(AbstractApiClient):
         utils.logger.info(f"[BaiduTieBaClient.get_notes_by_keyword] Accessing search page: {full_url}")
 
         try:
-            # Use Playwright to access search page
-            await self.playwright_page.goto(full_url, wait_until="domcontentloaded")
-
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-            # Get page HTML content
-            page_content = await self.playwright_page.content()
+            # Fetch search page
+            page_content = await self._fetch_page_html(full_url)
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_keyword] Successfully retrieved search page HTML, length: {len(page_content)}")
 
             # Extract search results
@@ -317,14 +368,8 @@ class BaiduTieBaClient(AbstractApiClient):
         utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Accessing post detail page: {note_url}")
 
         try:
-            # Use Playwright to access post detail page
-            await self.playwright_page.goto(note_url, wait_until="domcontentloaded")
-
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-            # Get page HTML content
-            page_content = await self.playwright_page.content()
+            # Fetch post detail page
+            page_content = await self._fetch_page_html(note_url)
             utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Successfully retrieved post detail HTML, length: {len(page_content)}")
 
             # Extract post details
@@ -365,14 +410,8 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.info(f"[BaiduTieBaClient.get_note_all_comments] Accessing comment page: {comment_url}")
 
             try:
-                # Use Playwright to access comment page
-                await self.playwright_page.goto(comment_url, wait_until="domcontentloaded")
-
-                # Wait for page loading, using delay setting from config file
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-                # Get page HTML content
-                page_content = await self.playwright_page.content()
+                # Fetch comment page
+                page_content = await self._fetch_page_html(comment_url)
 
                 # Extract comments
                 comments = self._page_extractor.extract_tieba_note_parment_comments(
@@ -397,7 +436,6 @@ class BaiduTieBaClient(AbstractApiClient):
                     comments, crawl_interval=crawl_interval, callback=callback
                 )
 
-                await asyncio.sleep(crawl_interval)
                 current_page += 1
 
             except Exception as e:
@@ -430,12 +468,8 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.error("[BaiduTieBaClient.get_comments_all_sub_comments] playwright_page is None, cannot use browser mode")
             raise Exception("playwright_page is required for browser-based sub-comment fetching")
 
-        all_sub_comments: List[TiebaComment] = []
-
-        for parment_comment in comments:
-            if parment_comment.sub_comment_count == 0:
-                continue
-
+        async def expand_thread(parment_comment: TiebaComment) -> List[TiebaComment]:
+            thread_comments: List[TiebaComment] = []
             current_page = 1
             max_sub_page_num = parment_comment.sub_comment_count // 10 + 1
 
@@ -451,14 +485,8 @@ class BaiduTieBaClient(AbstractApiClient):
                 utils.logger.info(f"[BaiduTieBaClient.get_comments_all_sub_comments] Accessing sub-comment page: {sub_comment_url}")
 
                 try:
-                    # Use Playwright to access sub-comment page
-                    await self.playwright_page.goto(sub_comment_url, wait_until="domcontentloaded")
-
-                    # Wait for page loading, using delay setting from config file
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-                    # Get page HTML content
-                    page_content = await self.playwright_page.content()
+                    # Fetch sub-comment page
+                    page_content = await self._fetch_page_html(sub_comment_url)
 
                     # Extract sub-comments
                     sub_comments = self._page_extractor.extract_tieba_note_sub_comments(
@@ -475,8 +503,7 @@ class BaiduTieBaClient(AbstractApiClient):
                     if callback:
                         await callback(parment_comment.note_id, sub_comments)
 
-                    all_sub_comments.extend(sub_comments)
-                    await asyncio.sleep(crawl_interval)
+                    thread_comments.extend(sub_comments)
                     current_page += 1
 
                 except Exception as e:
@@ -485,7 +512,12 @@ class BaiduTieBaClient(AbstractApiClient):
                         f"Failed to get comment {parment_comment.comment_id} page {current_page} sub-comments: {e}"
                     )
                     break
+            return thread_comments
 
+        # sub-comment threads of different comments are fetched concurrently on the page pool
+        all_sub_comments = await expand_comment_threads(
+            [comment for comment in comments if comment.sub_comment_count != 0], expand_thread
+        )
         utils.logger.info(f"[BaiduTieBaClient.get_comments_all_sub_comments] Total retrieved {len(all_sub_comments)} sub-comments")
         return all_sub_comments
 
@@ -508,14 +540,8 @@ class BaiduTieBaClient(AbstractApiClient):
         utils.logger.info(f"[BaiduTieBaClient.get_notes_by_tieba_name] Accessing Tieba page: {tieba_url}")
 
         try:
-            # Use Playwright to access Tieba page
-            await self.playwright_page.goto(tieba_url, wait_until="domcontentloaded")
-
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-            # Get page HTML content
-            page_content = await self.playwright_page.content()
+            # Fetch Tieba page
+            page_content = await self._fetch_page_html(tieba_url)
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_tieba_name] Successfully retrieved Tieba page HTML, length: {len(page_content)}")
 
             # Extract post list
@@ -543,14 +569,8 @@ class BaiduTieBaClient(AbstractApiClient):
         utils.logger.info(f"[BaiduTieBaClient.get_creator_info_by_url] Accessing creator homepage: {creator_url}")
 
         try:
-            # Use Playwright to access creator homepage
-            await self.playwright_page.goto(creator_url, wait_until="domcontentloaded")
-
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-            # Get page HTML content
-            page_content = await self.playwright_page.content()
+            # Fetch creator homepage
+            page_content = await self._fetch_page_html(creator_url)
             utils.logger.info(f"[BaiduTieBaClient.get_creator_info_by_url] Successfully retrieved creator homepage HTML, length: {len(page_content)}")
 
             return page_content
@@ -577,20 +597,27 @@ class BaiduTieBaClient(AbstractApiClient):
         creator_url = f"{self._host}/home/get/getthread?un={quote(user_name)}&pn={page_number}&id=utf-8&_={utils.get_current_timestamp()}"
         utils.logger.info(f"[BaiduTieBaClient.get_notes_by_creator] Accessing creator post list: {creator_url}")
 
+        await rate_limit("tieba", classify_endpoint(creator_url))
         try:
-            # Use Playwright to access creator post list page
-            await self.playwright_page.goto(creator_url, wait_until="domcontentloaded")
-
-            # Wait for page loading, using delay setting from config file
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-
-            # Get page content (this API returns JSON)
-            page_content = await self.playwright_page.content()
+            # This API returns JSON, no need to render it in a tab when render-free fetch works
+            if self._render_free_enabled():
+                json_text = await self._request_page_text(creator_url, expect_html=False)
+                if json_text is not None:
+                    try:
+                        return json.loads(json_text)
+                    except json.JSONDecodeError:
+                        utils.logger.warning("[BaiduTieBaClient.get_notes_by_creator] render-free response is not JSON, falling back to page navigation")
+
+            # Fetch creator post list page
+            async with self.page_pool.page() as page:
+                await page.goto(creator_url, wait_until="domcontentloaded")
+
+                # Get page content (this API returns JSON)
+                page_content = await page.content()
+                json_text = await page.evaluate("() => document.body.innerText")
 
             # Extract JSON data (page will contain <pre> tag or is directly JSON)
             try:
-                # Try to extract JSON from page
-                json_text = await self.playwright_page.evaluate("() => document.body.innerText")
                 result = json.loads(json_text)
                 utils.logger.info(f"[BaiduTieBaClient.get_notes_by_creator] Successfully retrieved creator post data")
                 return result
@@ -652,7 +679,6 @@ class BaiduTieBaClient(AbstractApiClient):
             notes = await asyncio.gather(*note_detail_task)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
@@ -37,8 +37,10 @@ from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, ProxyIpPool, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
+from tools.adaptive_concurrency import get_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from var import crawler_type_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
@@ -125,19 +127,28 @@ class TieBaCrawler(AbstractCrawler):
                 await login_obj.begin()
                 await self.tieba_client.update_cookies(browser_context=self.browser_context)
 
+            # Open one tab per concurrent task so page crawling scales with MAX_CONCURRENCY_NUM
+            await self.tieba_client.page_pool.grow(
+                self.browser_context, config.TIEBA_PAGE_POOL_SIZE or config.MAX_CONCURRENCY_NUM
+            )
+
             crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-                await self.get_specified_tieba_notes()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            try:
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                    await self.get_specified_tieba_notes()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                # the extra tabs would outlive the run in a CDP-attached browser
+                await self.tieba_client.page_pool.close()
 
             utils.logger.info("[BaiduTieBaCrawler.start] Tieba Crawler finished ...")
 
@@ -153,24 +164,30 @@ class TieBaCrawler(AbstractCrawler):
         tieba_limit_count = 10  # tieba limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword(keyword, scheduler))
+
+    async def search_keyword(self, keyword: str, scheduler: KeywordScheduler) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
+        tieba_limit_count = 10  # tieba limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(
-                        f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}"
-                    )
+        max_notes_count = max(scheduler.quota(keyword), tieba_limit_count)
+        utils.logger.info(
+            f"[BaiduTieBaCrawler.search_keyword] Current search keyword: {keyword}"
+        )
+        page = 1
+        while (
+            page - start_page + 1
+        ) * tieba_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[BaiduTieBaCrawler.search_keyword] Skip page {page}")
+                page += 1
+                continue
+            try:
+                utils.logger.info(
+                    f"[BaiduTieBaCrawler.search_keyword] search tieba keyword: {keyword}, page: {page}"
+                )
+                async with scheduler.turn(keyword):
                     notes_list: List[TiebaNote] = (
                         await self.tieba_client.get_notes_by_keyword(
                             keyword=keyword,
@@ -180,28 +197,24 @@ class TieBaCrawler(AbstractCrawler):
                             note_type=SearchNoteType.FIXED_THREAD,
                         )
                     )
-                    if not notes_list:
-                        utils.logger.info(
-                            f"[BaiduTieBaCrawler.search] Search note list is empty"
-                        )
-                        break
+                if not notes_list:
                     utils.logger.info(
-                        f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}"
-                    )
-                    await self.get_specified_notes(
-                        note_id_list=[note_detail.note_id for note_detail in notes_list]
-                    )
-
-                    # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
-
-                    page += 1
-                except Exception as ex:
-                    utils.logger.error(
-                        f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}"
+                        f"[BaiduTieBaCrawler.search_keyword] Search note list is empty"
                     )
                     break
+                utils.logger.info(
+                    f"[BaiduTieBaCrawler.search_keyword] Note list len: {len(notes_list)}"
+                )
+                await self.get_specified_notes(
+                    note_id_list=[note_detail.note_id for note_detail in notes_list]
+                )
+
+                page += 1
+            except Exception as ex:
+                utils.logger.error(
+                    f"[BaiduTieBaCrawler.search_keyword] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}"
+                )
+                break
 
     async def get_specified_tieba_notes(self):
         """
@@ -234,10 +247,6 @@ class TieBaCrawler(AbstractCrawler):
                 )
                 await self.get_specified_notes([note.note_id for note in note_list])
 
-                # Sleep after processing notes
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_specified_tieba_notes] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after processing notes from page {page_number}")
-
                 page_number += tieba_limit_count
 
     async def get_specified_notes(
@@ -251,7 +260,7 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("tieba", "detail")
         task_list = [
             self.get_note_detail_async_task(note_id=note_id, semaphore=semaphore)
             for note_id in note_id_list
@@ -283,10 +292,6 @@ class TieBaCrawler(AbstractCrawler):
                 )
                 note_detail: TiebaNote = await self.tieba_client.get_note_by_id(note_id)
 
-                # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[TieBaCrawler.get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
-
                 if not note_detail:
                     utils.logger.error(
                         f"[BaiduTieBaCrawler.get_note_detail] Get note detail error, note_id: {note_id}"
@@ -316,7 +321,7 @@ class TieBaCrawler(AbstractCrawler):
         if not config.ENABLE_GET_COMMENTS:
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("tieba", "comments")
         task_list: List[Task] = []
         for note_detail in note_detail_list:
             task = asyncio.create_task(
@@ -343,13 +348,9 @@ class TieBaCrawler(AbstractCrawler):
                 f"[BaiduTieBaCrawler.get_comments] Begin get note id comments {note_detail.note_id}"
             )
 
-            # Sleep before fetching comments
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[TieBaCrawler.get_comments_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_detail.note_id}")
-
             await self.tieba_client.get_note_all_comments(
                 note_detail=note_detail,
-                crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+                crawl_interval=0,
                 callback=tieba_store.batch_update_tieba_note_comments,
                 max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
             )
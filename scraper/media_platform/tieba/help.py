@@ -34,6 +34,12 @@ from tools import utils
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
+# Baidu security verification (captcha) pages, detected by redirect url or page text
+CAPTCHA_URL_MARKERS = ("wappass.baidu.com", "seccaptcha", "/static/captcha")
+CAPTCHA_TEXT_MARKERS = ("百度安全验证", "安全验证", "wappass.baidu.com/static/captcha")
+# an opening or closing html tag, fragments such as sub-comment pages have no <body>
+HTML_TAG_PATTERN = re.compile(r"<[a-zA-Z/!]")
+
 
 class TieBaExtractor:
     def __init__(self):
@@ -371,6 +377,30 @@ class TieBaExtractor:
         return data_field_dict_value
 
 
+def is_captcha_or_blank_page(url: str, text: str, expect_html: bool = True) -> bool:
+    """
+    Whether a raw response is a captcha / security verification page or an empty page,
+    in which case the page has to be loaded by a real browser tab instead
+    Args:
+        url: final url after redirects
+        text: response body
+        expect_html: the body should be html, a full document or a fragment such as sub-comment
+            pages; a body without any html tag counts as blank
+
+    Returns:
+
+    """
+    if any(marker in url for marker in CAPTCHA_URL_MARKERS):
+        return True
+    if not text or not text.strip():
+        return True
+    if any(marker in text[:20000] for marker in CAPTCHA_TEXT_MARKERS):
+        return True
+    if expect_html and not HTML_TAG_PATTERN.search(text):
+        return True
+    return False
+
+
 def test_extract_search_note_list():
     with open("test_data/search_keyword_notes.html", "r", encoding="utf-8") as f:
         content = f.read()
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/media_platform/tieba/page_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Pool of browser tabs used by the Tieba client for HTML crawling
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Set
+
+from playwright.async_api import BrowserContext, Page
+
+from tools import utils
+
+# Error messages playwright raises once a tab is unusable
+_DEAD_PAGE_ERRORS = ("Target closed", "has been closed", "Page crashed")
+
+
+class TiebaPagePool:
+    """
+    N tabs of one browser context with checkout / return semantics.
+
+    Each concurrent crawl task navigates its own tab, so tasks no longer queue up on
+    (or clobber) a single shared page. Tabs that crash or get closed are replaced by
+    a fresh tab from the browser context when they are returned; if that fails for the
+    last tab, the callers waiting for a tab get a RuntimeError instead of waiting forever.
+    """
+
+    def __init__(self, pages: List[Page], browser_context: Optional[BrowserContext] = None, nav_timeout: float = 30):
+        """
+        Args:
+            pages: initial tabs, the first one is usually the logged-in context page
+            browser_context: context used to open replacement / extra tabs
+            nav_timeout: navigation timeout budget of each tab (seconds)
+        """
+        if not pages:
+            raise ValueError("TiebaPagePool needs at least one page")
+        self.browser_context = browser_context
+        self.nav_timeout = nav_timeout
+        self._pages: List[Page] = []
+        # None marks that the pool ran out of tabs, it wakes the waiting callers
+        self._idle: "asyncio.Queue[Optional[Page]]" = asyncio.Queue()
+        self._crashed: Set[Page] = set()
+        self._owned: Set[Page] = set()  # tabs the pool opened itself, closed by close()
+        for page in pages:
+            self._add_page(page)
+
+    @property
+    def size(self) -> int:
+        return len(self._pages)
+
+    def _add_page(self, page: Page) -> None:
+        page.set_default_navigation_timeout(self.nav_timeout * 1000)
+        page.on("crash", lambda _=None, p=page: self._crashed.add(p))
+        self._pages.append(page)
+        self._idle.put_nowait(page)
+
+    async def grow(self, browser_context: BrowserContext, pool_size: int) -> None:
+        """
+        Open extra tabs until the pool has pool_size tabs
+        Args:
+            browser_context: context to open tabs in, also used to replace crashed tabs later
+            pool_size: target number of tabs
+        """
+        self.browser_context = browser_context
+        while len(self._pages) < pool_size:
+            try:
+                page = await self.browser_context.new_page()
+            except Exception as e:
+                utils.logger.error(f"[TiebaPagePool.grow] open tab failed, pool size stays {len(self._pages)}: {e}")
+                break
+            self._owned.add(page)
+            self._add_page(page)
+        utils.logger.info(f"[TiebaPagePool.grow] tieba page pool size: {len(self._pages)}")
+
+    def _is_dead(self, page: Page, error: Optional[BaseException]) -> bool:
+        if page in self._crashed or page.is_closed():
+            return True
+        return error is not None and any(msg in str(error) for msg in _DEAD_PAGE_ERRORS)
+
+    async def _recycle(self, page: Page) -> None:
+        """Replace a dead tab with a new one from the browser context"""
+        self._crashed.discard(page)
+        self._owned.discard(page)
+        self._pages.remove(page)
+        try:
+            await page.close()
+        except Exception:
+            pass
+        if self.browser_context is None:
+            utils.logger.error("[TiebaPagePool._recycle] tab died and there is no browser context to open a new one")
+            self._wake_if_empty()
+            return
+        try:
+            new_page = await self.browser_context.new_page()
+        except Exception as e:
+            utils.logger.error(f"[TiebaPagePool._recycle] open replacement tab failed, pool size: {len(self._pages)}: {e}")
+            self._wake_if_empty()
+            return
+        utils.logger.warning("[TiebaPagePool._recycle] replaced a crashed/closed tab")
+        self._owned.add(new_page)
+        self._add_page(new_page)
+
+    def _wake_if_empty(self) -> None:
+        if not self._pages:
+            self._idle.put_nowait(None)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Check out an idle tab for the duration of the block, waiting if all tabs are busy
+        Raises RuntimeError when the pool has no tab left, also while waiting for one
+        """
+        if not self._pages:
+            raise RuntimeError("TiebaPagePool has no usable page left")
+        page = await self._idle.get()
+        while page is None:
+            if not self._pages:
+                self._idle.put_nowait(None)  # pass it on to the next waiter
+                raise RuntimeError("TiebaPagePool has no usable page left")
+            # tabs were added again since the pool ran empty
+            page = await self._idle.get()
+        error: Optional[BaseException] = None
+        try:
+            yield page
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self._is_dead(page, error):
+                await self._recycle(page)
+            else:
+                self._idle.put_nowait(page)
+
+    async def close(self) -> None:
+        """Close the tabs opened by the pool, the tabs it was created with are left alone"""
+        owned, self._owned = self._owned, set()
+        self._pages = [page for page in self._pages if page not in owned]
+        idle = []
+        while not self._idle.empty():
+            page = self._idle.get_nowait()
+            if page is not None and page not in owned:
+                idle.append(page)
+        for page in idle:
+            self._idle.put_nowait(page)
+        self._wake_if_empty()
+        for page in owned:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def fetch_html(self, url: str, settle_seconds: float = 0) -> str:
+        """
+        Navigate a pooled tab to url and return the rendered html
+        Args:
+            url: page url
+            settle_seconds: extra wait after DOMContentLoaded
+
+        Returns:
+            page html
+        """
+        async with self.page() as page:
+            await page.goto(url, wait_until="domcontentloaded")
+            if settle_seconds:
+                await asyncio.sleep(settle_seconds)
+            return await page.content()
@@ -41,13 +41,17 @@ from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
+from tools.adaptive_concurrency import get_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.checkpoint import get_checkpoint
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from tools.seen_index import get_seen_index
+from var import crawler_type_var
 
 from .client import WeiboClient
 from .exception import DataFetchError
 from .field import SearchType
-from .help import filter_search_result_card
+from .help import filter_search_result_card, get_mblog_interact_counts
 from .login import WeiboLogin
 
 
@@ -142,7 +146,6 @@ class WeiboCrawler(AbstractCrawler):
         weibo_limit_count = 10  # weibo limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
-        start_page = config.START_PAGE
 
         # Set the search type based on the configuration for weibo
         if config.WEIBO_SEARCH_TYPE == "default":
@@ -157,43 +160,71 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
-                search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                # If full text fetching is enabled, batch get full text of posts
-                note_list = await self.batch_get_notes_full_text(note_list)
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword(keyword, scheduler, search_type))
 
+    async def search_keyword(self, keyword: str, scheduler: KeywordScheduler, search_type: SearchType) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
+        weibo_limit_count = 10  # weibo limit page fixed value
+        start_page = config.START_PAGE
+        max_notes_count = max(scheduler.quota(keyword), weibo_limit_count)
+        utils.logger.info(f"[WeiboCrawler.search_keyword] Current search keyword: {keyword}")
+        checkpoint = get_checkpoint()
+        progress = checkpoint.keyword(keyword) if checkpoint else None
+        if progress and progress["done"]:
+            utils.logger.info(f"[WeiboCrawler.search_keyword] Keyword {keyword} was finished by the previous run, skip")
+            return
+        page = (progress and progress["next_page"]) or 1
+        while (page - start_page + 1) * weibo_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[WeiboCrawler.search_keyword] Skip page: {page}")
                 page += 1
-
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                await self.batch_get_notes_comments(note_id_list)
+                continue
+            utils.logger.info(f"[WeiboCrawler.search_keyword] search weibo keyword: {keyword}, page: {page}")
+            async with scheduler.turn(keyword):
+                search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
+            note_id_list: List[str] = []
+            mblogs: Dict[str, Dict] = {}
+            note_list = filter_search_result_card(search_res.get("cards"))
+            seen_index = get_seen_index()
+            if seen_index:
+                # incremental mode: posts crawled recently and unchanged since need no full text, images or comments
+                note_list = [
+                    note_item for note_item in note_list
+                    if not note_item.get("mblog") or await seen_index.should_crawl(
+                        "wb", note_item["mblog"].get("id"), interactions=get_mblog_interact_counts(note_item["mblog"])
+                    )
+                ]
+            # If full text fetching is enabled, batch get full text of posts
+            note_list = await self.batch_get_notes_full_text(note_list)
+            for note_item in note_list:
+                if note_item:
+                    mblog: Dict = note_item.get("mblog")
+                    if mblog:
+                        note_id_list.append(mblog.get("id"))
+                        mblogs[mblog.get("id")] = mblog
+                        await weibo_store.update_weibo_note(note_item)
+                        await self.get_note_images(mblog)
+
+            page += 1
+
+            crawled_note_ids = await self.batch_get_notes_comments(note_id_list)
+            if seen_index:
+                # only posts stored with their comments count as crawled, a failed one is retried next run
+                for note_id in crawled_note_ids:
+                    await seen_index.record("wb", note_id, interactions=get_mblog_interact_counts(mblogs[note_id]))
+            if checkpoint:
+                # the page is stored with its comments, a resumed run starts at the next one
+                checkpoint.save_search_page(keyword, page)
+        if checkpoint:
+            checkpoint.finish_keyword(keyword)
 
     async def get_specified_notes(self):
         """
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("wb", "detail")
         task_list = [self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in config.WEIBO_SPECIFIED_ID_LIST]
         video_details = await asyncio.gather(*task_list)
         for note_item in video_details:
@@ -212,10 +243,6 @@ class WeiboCrawler(AbstractCrawler):
             try:
                 result = await self.wb_client.get_note_info_by_id(note_id)
 
-                # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
-
                 return result
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_info_task] Get note detail error: {ex}")
@@ -224,49 +251,48 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.error(f"[WeiboCrawler.get_note_info_task] have not fund note detail note_id:{note_id}, err: {ex}")
                 return None
 
-    async def batch_get_notes_comments(self, note_id_list: List[str]):
+    async def batch_get_notes_comments(self, note_id_list: List[str]) -> List[str]:
         """
         batch get notes comments
         :param note_id_list:
-        :return:
+        :return: ids of the notes whose comments did not fail (all of them when comments are disabled)
         """
         if not config.ENABLE_GET_COMMENTS:
             utils.logger.info(f"[WeiboCrawler.batch_get_note_comments] Crawling comment mode is not enabled")
-            return
+            return note_id_list
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("wb", "comments")
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
             task_list.append(task)
-        await asyncio.gather(*task_list)
+        results = await asyncio.gather(*task_list)
+        return [note_id for note_id, ok in zip(note_id_list, results) if ok]
 
-    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore):
+    async def get_note_comments(self, note_id: str, semaphore: asyncio.Semaphore) -> bool:
         """
         get comment for note id
         :param note_id:
         :param semaphore:
-        :return:
+        :return: whether the comments were crawled without error
         """
         async with semaphore:
             try:
                 utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
 
-                # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
-
                 await self.wb_client.get_note_all_comments(
                     note_id=note_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,  # Use fixed interval instead of random
+                    crawl_interval=0,
                     callback=weibo_store.batch_update_weibo_note_comments,
                     max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
                 )
+                return True
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
             except Exception as e:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] may be been blocked, err:{e}")
+            return False
 
     async def get_note_images(self, mblog: Dict):
         """
@@ -293,8 +319,6 @@ class WeiboCrawler(AbstractCrawler):
             if not url:
                 continue
             content = await self.wb_client.get_note_image(url)
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[WeiboCrawler.get_note_images] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching image")
             if content != None:
                 extension_file_name = url.split(".")[-1]
                 await weibo_store.update_weibo_note_image(pid, content, extension_file_name)
@@ -445,8 +469,6 @@ class WeiboCrawler(AbstractCrawler):
                 note_item["mblog"] = full_note["mblog"]
                 utils.logger.info(f"[WeiboCrawler.get_note_full_text] Successfully fetched full text for note: {note_id}")
 
-            # Sleep after request to avoid rate limiting
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
         except DataFetchError as ex:
             utils.logger.error(f"[WeiboCrawler.get_note_full_text] Failed to fetch full text for note {note_id}: {ex}")
         except Exception as ex:
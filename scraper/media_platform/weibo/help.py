@@ -43,3 +43,13 @@ def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
                     note_list.append(card_group_item)
 
     return note_list
+
+
+def get_mblog_interact_counts(mblog: Dict) -> Dict:
+    """
+    Counts of a mblog used to tell whether it changed since the last crawl
+    :param mblog: mblog of a search result card or note detail
+    :return: interaction counts, edit_count grows when the post is edited
+    """
+    keys = ("attitudes_count", "comments_count", "reposts_count", "edit_count")
+    return {key: mblog.get(key, 0) for key in keys}
@@ -30,6 +30,12 @@ import config
 from base.base_crawler import AbstractApiClient
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.adaptive_concurrency import observe_request_errors
+from tools.comment_fanout import expand_comment_threads
+from tools.http_transport import HttpTransport
+from tools.rate_limiter import ENDPOINT_MEDIA, classify_endpoint, rate_limit
+from tools.single_flight import coalesce_requests
+from tools.seen_index import CommentDelta
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -38,7 +44,7 @@ from .exception import DataFetchError, IPBlockError, NoteNotFoundError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
 from .extractor import XiaoHongShuExtractor
-from .playwright_sign import sign_with_playwright
+from .playwright_sign import XhsSignPagePool
 
 
 class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
@@ -66,6 +72,11 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._extractor = XiaoHongShuExtractor()
+        # Signing pages: caches b1 and coalesces concurrent mnsv2 calls per page,
+        # the crawler grows it to XHS_SIGN_PAGE_POOL_SIZE pages after login
+        self.sign_pool = XhsSignPagePool.from_page(playwright_page)
+        # Pooled keep-alive connections reused for the client's whole lifetime
+        self.transport = HttpTransport(proxy=proxy, timeout=timeout)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
@@ -93,24 +104,25 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             raise ValueError("params or payload is required")
 
         # Generate signature using playwright injection method
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
+        signs = await self.sign_pool.sign(
             uri=url,
             data=data,
             a1=a1_value,
             method=method,
         )
 
-        headers = {
+        # Return a per-request copy, concurrent requests must not overwrite each other's signature
+        return {
+            **self.headers,
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
 
+    @coalesce_requests
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), retry=retry_if_not_exception_type(NoteNotFoundError))
+    @observe_request_errors
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         Wrapper for httpx common request method, processes request response
@@ -124,11 +136,11 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
+        await rate_limit("xhs", classify_endpoint(url))
 
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self.transport.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -136,7 +148,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             verify_uuid = response.headers["Verifyuuid"]
             msg = f"CAPTCHA appeared, request failed, Verifytype: {verify_type}, Verifyuuid: {verify_uuid}, Response: {response}"
             utils.logger.error(msg)
-            raise Exception(msg)
+            raise IPBlockError(msg)
 
         if return_response:
             return response.text
@@ -191,25 +203,25 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
     async def get_note_media(self, url: str) -> Union[bytes, None]:
         # Check if proxy is expired before request
         await self._refresh_proxy_if_expired()
+        await rate_limit("xhs", ENDPOINT_MEDIA)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(
-                        f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
-                    )
-                    return None
-                else:
-                    return response.content
-            except (
-                httpx.HTTPError
-            ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+        try:
+            response = await self.transport.request("GET", url, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
                 utils.logger.error(
-                    f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
-                )  # Keep original exception type name for developer debugging
+                    f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}"
+                )
                 return None
+            else:
+                return response.content
+        except (
+            httpx.HTTPError
+        ) as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(
+                f"[XiaoHongShuClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}"
+            )  # Keep original exception type name for developer debugging
+            return None
 
     async def query_self(self) -> Optional[Dict]:
         """
@@ -219,10 +231,9 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         uri = "/api/sns/web/v1/user/selfinfo"
         headers = await self._pre_headers(uri, params={})
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.get(f"{self._host}{uri}", headers=headers)
-            if response.status_code == 200:
-                return response.json()
+        response = await self.transport.get(f"{self._host}{uri}", headers=headers)
+        if response.status_code == 200:
+            return response.json()
         return None
 
     async def pong(self) -> bool:
@@ -257,6 +268,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # b1 belongs to the login session, re-read it after cookies change
+        self.sign_pool.invalidate_b1()
 
     async def get_note_by_keyword(
         self,
@@ -392,6 +405,9 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        start_cursor: str = "",
+        progress_callback: Optional[Callable] = None,
+        delta: Optional[CommentDelta] = None,
     ) -> List[Dict]:
         """
         Get all first-level comments under specified note, this method will continuously find all comment information under a post
@@ -401,12 +417,16 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             crawl_interval: Crawl delay per note (seconds)
             callback: Callback after one note crawl ends
             max_count: Maximum number of comments to crawl per note
+            start_cursor: Cursor to start from, used to resume an interrupted crawl
+            progress_callback: Called with (next cursor, comments fetched so far) after each finished page
+            delta: What previous crawls stored of this note's comments; paging stops after a page of known
+                comments and only sub-comment threads with new replies are expanded
         Returns:
 
         """
         result = []
         comments_has_more = True
-        comments_cursor = ""
+        comments_cursor = start_cursor
         while comments_has_more and len(result) < max_count:
             comments_res = await self.get_note_comments(
                 note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor
@@ -421,17 +441,30 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             comments = comments_res["comments"]
             if len(result) + len(comments) > max_count:
                 comments = comments[: max_count - len(result)]
+            # known comments are still stored, which refreshes their like and sub-comment counts
             if callback:
                 await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
             result.extend(comments)
+            threads = comments
+            if delta:
+                threads = [c for c in comments if delta.sub_comments_changed(c.get("id"), c.get("sub_comment_count"))]
+                page_known = all(delta.is_known(c.get("id"), c.get("create_time")) for c in comments)
+                for comment in comments:
+                    delta.observe(comment.get("id"), comment.get("create_time"), comment.get("sub_comment_count"))
             sub_comments = await self.get_comments_all_sub_comments(
-                comments=comments,
+                comments=threads,
                 xsec_token=xsec_token,
                 crawl_interval=crawl_interval,
                 callback=callback,
             )
             result.extend(sub_comments)
+            if progress_callback:
+                await progress_callback(comments_cursor, len(result))
+            if delta and page_known:
+                utils.logger.info(
+                    f"[XiaoHongShuClient.get_note_all_comments] Reached comments of note {note_id} stored by a previous crawl, stop"
+                )
+                break
         return result
 
     async def get_comments_all_sub_comments(
@@ -458,20 +491,16 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             )
             return []
 
-        result = []
-        for comment in comments:
+        async def expand_thread(comment: Dict) -> List[Dict]:
             note_id = comment.get("note_id")
             sub_comments = comment.get("sub_comments")
             if sub_comments and callback:
                 await callback(note_id, sub_comments)
 
+            thread_comments = []
             sub_comment_has_more = comment.get("sub_comment_has_more")
-            if not sub_comment_has_more:
-                continue
-
             root_comment_id = comment.get("id")
             sub_comment_cursor = comment.get("sub_comment_cursor")
-
             while sub_comment_has_more:
                 comments_res = await self.get_note_sub_comments(
                     note_id=note_id,
@@ -485,7 +514,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
                     utils.logger.info(
                         f"[XiaoHongShuClient.get_comments_all_sub_comments] No response found for note_id: {note_id}"
                     )
-                    continue
+                    break
                 sub_comment_has_more = comments_res.get("has_more", False)
                 sub_comment_cursor = comments_res.get("cursor", "")
                 if "comments" not in comments_res:
@@ -493,12 +522,14 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
                         f"[XiaoHongShuClient.get_comments_all_sub_comments] No 'comments' key found in response: {comments_res}"
                     )
                     break
-                comments = comments_res["comments"]
+                page_comments = comments_res["comments"]
                 if callback:
-                    await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
-                result.extend(comments)
-        return result
+                    await callback(note_id, page_comments)
+                thread_comments.extend(page_comments)
+            return thread_comments
+
+        # root comment threads are independent, page them concurrently (each thread stays serial)
+        return await expand_comment_threads(comments, expand_thread)
 
     async def get_creator_info(
         self, user_id: str, xsec_token: str = "", xsec_source: str = ""
@@ -562,6 +593,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         callback: Optional[Callable] = None,
         xsec_token: str = "",
         xsec_source: str = "pc_feed",
+        start_cursor: str = "",
+        progress_callback: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         Get all posts published by specified user, this method will continuously find all post information under a user
@@ -571,13 +604,15 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             callback: Update callback function after one pagination crawl ends
             xsec_token: Verification token
             xsec_source: Channel source
+            start_cursor: Cursor to start from, used to resume an interrupted crawl
+            progress_callback: Called with (next cursor, notes of the page) after each finished page
 
         Returns:
 
         """
         result = []
         notes_has_more = True
-        notes_cursor = ""
+        notes_cursor = start_cursor
         while notes_has_more and len(result) < config.CRAWLER_MAX_NOTES_COUNT:
             notes_res = await self.get_notes_by_creator(
                 user_id, notes_cursor, xsec_token=xsec_token, xsec_source=xsec_source
@@ -608,9 +643,10 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             notes_to_add = notes[:remaining]
             if callback:
                 await callback(notes_to_add)
+            if progress_callback:
+                await progress_callback(notes_cursor, notes_to_add)
 
             result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
 
         utils.logger.info(
             f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}"
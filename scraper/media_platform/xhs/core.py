@@ -19,7 +19,6 @@
 
 import asyncio
 import os
-import random
 from asyncio import Task
 from typing import Dict, List, Optional
 
@@ -38,17 +37,24 @@ from model.m_xiaohongshu import NoteUrlInfo, CreatorUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import xhs as xhs_store
 from tools import utils
+from tools.adaptive_concurrency import get_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
+from tools.checkpoint import get_checkpoint
+from tools.crawl_pipeline import CrawlPipeline
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from tools.seen_index import get_seen_index
+from tools.work_queue import RedisWorkQueue, WorkItem, WorkQueueWorker, get_work_queue
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
 from .exception import DataFetchError, NoteNotFoundError
 from .field import SearchSortType, SearchNoteType
-from .help import parse_note_info_from_note_url, parse_creator_info_from_url, get_search_id
+from .help import parse_note_info_from_note_url, parse_creator_info_from_url, get_search_id, get_interact_counts
 from .login import XiaoHongShuLogin
 
 
 class XiaoHongShuCrawler(AbstractCrawler):
+    supports_work_queue = True
     context_page: Page
     xhs_client: XiaoHongShuClient
     browser_context: BrowserContext
@@ -107,18 +113,28 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 await login_obj.begin()
                 await self.xhs_client.update_cookies(browser_context=self.browser_context)
 
+            # Extra signing pages so concurrent tasks do not queue behind one page's JS thread
+            await self.xhs_client.sign_pool.grow(self.browser_context, config.XHS_SIGN_PAGE_POOL_SIZE, self.index_url)
+
             crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            try:
+                if config.CRAWLER_WORK_QUEUE_ROLE == "worker":
+                    # Process the units of work a coordinator put into the shared queue
+                    await self.run_queue_worker(get_work_queue("xhs"))
+                elif config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+            finally:
+                # the extra signing tabs would outlive the run in a CDP-attached browser
+                await self.xhs_client.sign_pool.close()
 
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
@@ -128,103 +144,342 @@ class XiaoHongShuCrawler(AbstractCrawler):
         xhs_limit_count = 20  # Xiaohongshu limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
+        scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+        await scheduler.run(lambda keyword: self.search_keyword(keyword, scheduler))
+
+    async def search_keyword(self, keyword: str, scheduler: KeywordScheduler) -> None:
+        """Search one keyword, keywords run concurrently under the KeywordScheduler"""
+        xhs_limit_count = 20  # Xiaohongshu limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            search_id = get_search_id()
-            while (page - start_page + 1) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
+        max_notes_count = max(scheduler.quota(keyword), xhs_limit_count)
+        utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Current search keyword: {keyword}")
+        checkpoint = get_checkpoint()
+        progress = checkpoint.keyword(keyword) if checkpoint else None
+        if progress and progress["done"] and not progress["pending"]:
+            utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Keyword {keyword} was finished by the previous run, skip")
+            return
+        # Search pages feed the detail stage, finished details flow on to store / media / comments
+        # as soon as they are ready, so no stage waits for the slowest note of a page
+        pipeline = self._build_search_pipeline(keyword)
+        detail_stage = pipeline.stages[0]
+        seen_index = get_seen_index()
+        async with pipeline:
+            page = (progress and progress["next_page"]) or 1
+            search_id = (progress and progress["search_id"]) or get_search_id()
+            if progress:
+                # notes the previous run got from the search but did not finish
+                for post_item in list(progress["pending"].values()):
+                    await detail_stage.put(post_item)
+            search_done, search_failed = bool(progress and progress["done"]), False
+            while not search_done and (page - start_page + 1) * xhs_limit_count <= max_notes_count:
                 if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Skip page {page}")
                     page += 1
                     continue
 
                 try:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
-                        note_type=SearchNoteType(config.SEARCH_NOTE_TYPE) if hasattr(config, 'SEARCH_NOTE_TYPE') else SearchNoteType.ALL,
-                    )
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] search Xiaohongshu keyword: {keyword}, page: {page}")
+                    async with scheduler.turn(keyword):
+                        notes_res = await self.search_page(keyword, search_id, page)
+                    utils.logger.info(f"[XiaoHongShuCrawler.search_keyword] Search notes response: {notes_res}")
                     if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
+                        utils.logger.info("[XiaoHongShuCrawler.search_keyword] No more content!")
                         break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
+                    page_items = []
+                    for post_item in notes_res.get("items", {}):
+                        if post_item.get("model_type") in ("rec_query", "hot_query"):
+                            continue
+                        # incremental mode: notes crawled recently and unchanged since cost no request
+                        if seen_index and not await seen_index.should_crawl(
+                            "xhs",
+                            post_item.get("id"),
+                            interactions=get_interact_counts(post_item.get("note_card", {}).get("interact_info")),
+                        ):
+                            continue
+                        page_items.append(post_item)
                     page += 1
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
+                    if checkpoint:
+                        checkpoint.save_search_page(keyword, page, search_id, {
+                            item.get("id"): {key: item.get(key) for key in ("id", "xsec_source", "xsec_token")}
+                            for item in page_items
+                        })
+                    for post_item in page_items:
+                        # blocks while the detail queue is full (backpressure)
+                        await detail_stage.put(post_item)
 
-                    # Sleep after each page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
                 except DataFetchError:
-                    utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
+                    utils.logger.error("[XiaoHongShuCrawler.search_keyword] Get note detail error")
+                    search_failed = True
                     break
+            if checkpoint and not search_done and not search_failed:
+                checkpoint.finish_keyword(keyword)
+
+    async def search_page(self, keyword: str, search_id: str, page: int) -> Dict:
+        """Request one page of search results with the configured sort and note type"""
+        return await self.xhs_client.get_note_by_keyword(
+            keyword=keyword,
+            search_id=search_id,
+            page=page,
+            sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
+            note_type=SearchNoteType(config.SEARCH_NOTE_TYPE) if hasattr(config, 'SEARCH_NOTE_TYPE') else SearchNoteType.ALL,
+        )
+
+    async def record_seen_note(self, note_detail: Dict) -> None:
+        """Remember a note in the incremental crawl index, once it is stored and its media and comments are crawled"""
+        seen_index = get_seen_index()
+        if seen_index:
+            await seen_index.record(
+                "xhs",
+                note_detail.get("note_id"),
+                last_update_time=note_detail.get("last_update_time"),
+                interactions=get_interact_counts(note_detail.get("interact_info")),
+            )
+
+    async def enqueue_work(self, queue: RedisWorkQueue) -> int:
+        """
+        Coordinator: turn the crawl config into units of work, no browser is needed
+        Search keywords become one item per search page, detail mode one item per note and
+        creator mode one item per creator; workers enqueue the notes and comment threads they find.
+
+        Returns:
+            number of items added to the queue
+        """
+        xhs_limit_count = 20  # Xiaohongshu limit page fixed value
+        count = 0
+        if config.CRAWLER_TYPE == "search":
+            scheduler = KeywordScheduler(parse_keywords(config.KEYWORDS))
+            for keyword in scheduler.keywords:
+                search_id = get_search_id()
+                pages = max(scheduler.quota(keyword), xhs_limit_count) // xhs_limit_count
+                for page in range(config.START_PAGE, config.START_PAGE + pages):
+                    count += await queue.enqueue(
+                        "search_page",
+                        {"keyword": keyword, "page": page, "search_id": search_id},
+                        item_id=f"search_page:{keyword}:{page}",
+                    )
+        elif config.CRAWLER_TYPE == "detail":
+            for full_note_url in config.XHS_SPECIFIED_NOTE_URL_LIST:
+                note_url_info: NoteUrlInfo = parse_note_info_from_note_url(full_note_url)
+                count += await queue.enqueue("note", {
+                    "note_id": note_url_info.note_id,
+                    "xsec_source": note_url_info.xsec_source,
+                    "xsec_token": note_url_info.xsec_token,
+                }, item_id=f"note:{note_url_info.note_id}")
+        elif config.CRAWLER_TYPE == "creator":
+            for creator_url in config.XHS_CREATOR_ID_LIST:
+                count += await queue.enqueue("creator", {"creator_url": creator_url}, item_id=f"creator:{creator_url}")
+        utils.logger.info(f"[XiaoHongShuCrawler.enqueue_work] Enqueued {count} work items into queue {queue.name}")
+        return count
+
+    async def run_queue_worker(self, queue: RedisWorkQueue) -> None:
+        """Worker: lease units of work from the shared queue until it is drained"""
+        seen_index = get_seen_index()
+
+        async def crawl_search_page(item: WorkItem) -> None:
+            keyword = item.payload["keyword"]
+            notes_res = await self.search_page(keyword, item.payload["search_id"], item.payload["page"])
+            for post_item in (notes_res or {}).get("items", []):
+                if post_item.get("model_type") in ("rec_query", "hot_query"):
+                    continue
+                if seen_index and not await seen_index.should_crawl(
+                    "xhs",
+                    post_item.get("id"),
+                    interactions=get_interact_counts(post_item.get("note_card", {}).get("interact_info")),
+                ):
+                    continue
+                await queue.enqueue("note", {
+                    "keyword": keyword,
+                    "note_id": post_item.get("id"),
+                    "xsec_source": post_item.get("xsec_source"),
+                    "xsec_token": post_item.get("xsec_token"),
+                }, item_id=f"note:{post_item.get('id')}")
+
+        async def crawl_note(item: WorkItem) -> None:
+            source_keyword_var.set(item.payload.get("keyword", ""))
+            note_detail = await self.get_note_detail_async_task(
+                note_id=item.payload["note_id"],
+                xsec_source=item.payload.get("xsec_source"),
+                xsec_token=item.payload.get("xsec_token"),
+                semaphore=get_concurrency_limiter("xhs", "detail"),
+                reraise=True,
+            )
+            if not note_detail:
+                return  # not found, nothing to retry
+            await xhs_store.update_xhs_note(note_detail)
+            await self.get_notice_media(note_detail)
+            if not config.ENABLE_GET_COMMENTS:
+                await self.record_seen_note(note_detail)
+                return
+            # the note counts as crawled once its comments item is done
+            await queue.enqueue("comments", {
+                "keyword": item.payload.get("keyword", ""),
+                "note_id": note_detail.get("note_id"),
+                "xsec_token": note_detail.get("xsec_token"),
+                "last_update_time": note_detail.get("last_update_time"),
+                "interact_info": note_detail.get("interact_info"),
+            }, item_id=f"comments:{note_detail.get('note_id')}")
+
+        async def crawl_comments(item: WorkItem) -> None:
+            source_keyword_var.set(item.payload.get("keyword", ""))
+            await self.get_comments(
+                item.payload["note_id"], item.payload.get("xsec_token"), get_concurrency_limiter("xhs", "comments")
+            )
+            await self.record_seen_note(item.payload)
+
+        async def crawl_creator(item: WorkItem) -> None:
+            await self.crawl_creator(item.payload["creator_url"])
+
+        worker = WorkQueueWorker(queue, {
+            "search_page": crawl_search_page,
+            "note": crawl_note,
+            "comments": crawl_comments,
+            "creator": crawl_creator,
+        })
+        await worker.run()
+
+    def _build_search_pipeline(self, keyword: str) -> CrawlPipeline:
+        """
+        Build the staged pipeline of one search keyword:
+        detail -> store, detail -> media (if enabled), detail -> comments (if enabled)
+        Each stage has a bounded queue and its own concurrency.
+        """
+        queue_size = config.CRAWLER_PIPELINE_QUEUE_SIZE
+        # stage workers are started up to the limiters' ceiling, the limiters decide how many actually run
+        detail_limiter = get_concurrency_limiter("xhs", "detail")
+        comment_limiter = get_concurrency_limiter("xhs", "comments")
+
+        checkpoint = get_checkpoint()
+        seen_index = get_seen_index()
+        # a note handed out by a search page stays pending in the checkpoint, and out of the incremental
+        # index, until all its sink stages succeeded
+        sink_stages = {"store"} | ({"media"} if config.ENABLE_GET_MEIDAS else set()) | (
+            {"comments"} if config.ENABLE_GET_COMMENTS else set()
+        )
+        stages_left: Dict[str, set] = {}
+
+        async def sink_done(note_detail: Dict, stage: str) -> None:
+            if not checkpoint and not seen_index:
+                return
+            note_id = note_detail.get("note_id")
+            left = stages_left.setdefault(note_id, set(sink_stages))
+            left.discard(stage)
+            if not left:
+                del stages_left[note_id]
+                await self.record_seen_note(note_detail)
+                if checkpoint:
+                    checkpoint.finish_note(keyword, note_id)
+
+        async def fetch_detail(post_item: Dict) -> Optional[Dict]:
+            note_detail = await self.get_note_detail_async_task(
+                note_id=post_item.get("id"),
+                xsec_source=post_item.get("xsec_source"),
+                xsec_token=post_item.get("xsec_token"),
+                semaphore=detail_limiter,
+                reraise=True,  # a failed fetch fails the stage, the note stays pending for --resume
+            )
+            if note_detail is None and checkpoint:
+                checkpoint.finish_note(keyword, post_item.get("id"))  # not found, nothing left to do
+            return note_detail
+
+        async def fetch_comments(note_detail: Dict) -> None:
+            await self.get_comments(note_detail.get("note_id"), note_detail.get("xsec_token"), comment_limiter)
+            await sink_done(note_detail, "comments")
+
+        async def fetch_media(note_detail: Dict) -> None:
+            await self.get_notice_media(note_detail)
+            await sink_done(note_detail, "media")
+
+        async def store_note(note_detail: Dict) -> None:
+            await xhs_store.update_xhs_note(note_detail)
+            await sink_done(note_detail, "store")
+
+        pipeline = CrawlPipeline(f"xhs.search[{keyword}]")
+        detail_stage = pipeline.stage("detail", fetch_detail, concurrency=detail_limiter.max_limit, maxsize=queue_size)
+        detail_stage.then(pipeline.stage("store", store_note, concurrency=1, maxsize=queue_size))
+        if config.ENABLE_GET_MEIDAS:
+            detail_stage.then(pipeline.stage(
+                "media", fetch_media, concurrency=config.CRAWLER_PIPELINE_MEDIA_CONCURRENCY, maxsize=queue_size
+            ))
+        if config.ENABLE_GET_COMMENTS:
+            detail_stage.then(pipeline.stage(
+                "comments", fetch_comments, concurrency=comment_limiter.max_limit, maxsize=queue_size
+            ))
+        return pipeline
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
         utils.logger.info("[XiaoHongShuCrawler.get_creators_and_notes] Begin get Xiaohongshu creators")
         for creator_url in config.XHS_CREATOR_ID_LIST:
-            try:
-                # Parse creator URL to get user_id and security tokens
-                creator_info: CreatorUrlInfo = parse_creator_info_from_url(creator_url)
-                utils.logger.info(f"[XiaoHongShuCrawler.get_creators_and_notes] Parse creator URL info: {creator_info}")
-                user_id = creator_info.user_id
-
-                # get creator detail info from web html content
-                createor_info: Dict = await self.xhs_client.get_creator_info(
-                    user_id=user_id,
-                    xsec_token=creator_info.xsec_token,
-                    xsec_source=creator_info.xsec_source
-                )
-                if createor_info:
-                    await xhs_store.save_creator(user_id, creator=createor_info)
-            except ValueError as e:
-                utils.logger.error(f"[XiaoHongShuCrawler.get_creators_and_notes] Failed to parse creator URL: {e}")
-                continue
+            await self.crawl_creator(creator_url)
 
-            # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+    async def crawl_creator(self, creator_url: str) -> None:
+        """Save one creator, then crawl their notes and the notes' comments"""
+        checkpoint = get_checkpoint()
+        try:
+            # Parse creator URL to get user_id and security tokens
+            creator_info: CreatorUrlInfo = parse_creator_info_from_url(creator_url)
+            utils.logger.info(f"[XiaoHongShuCrawler.crawl_creator] Parse creator URL info: {creator_info}")
+            user_id = creator_info.user_id
+            progress = checkpoint.creator(user_id) if checkpoint else None
+            if progress and (progress["cursor"] or progress["done"]):
+                # the previous run already saved the creator and listed some of the notes
+                utils.logger.info(f"[XiaoHongShuCrawler.crawl_creator] Resume creator {user_id} from the checkpoint")
+                await self.get_creator_notes(user_id, creator_info, progress)
+                return
+
+            # get creator detail info from web html content
+            createor_info: Dict = await self.xhs_client.get_creator_info(
+                user_id=user_id,
+                xsec_token=creator_info.xsec_token,
+                xsec_source=creator_info.xsec_source
+            )
+            if createor_info:
+                await xhs_store.save_creator(user_id, creator=createor_info)
+        except ValueError as e:
+            utils.logger.error(f"[XiaoHongShuCrawler.crawl_creator] Failed to parse creator URL: {e}")
+            return
+
+        await self.get_creator_notes(user_id, creator_info, progress)
+
+    async def get_creator_notes(self, user_id: str, creator_info: CreatorUrlInfo, progress: Optional[Dict]) -> None:
+        """List the creator's notes (from the checkpoint cursor when resuming), then crawl their comments"""
+        checkpoint = get_checkpoint()
+
+        async def save_page(cursor: str, notes: List[Dict]) -> None:
+            checkpoint.save_creator_page(user_id, cursor, [
+                {"note_id": note.get("note_id"), "xsec_token": note.get("xsec_token")} for note in notes
+            ])
+
+        if progress and progress["done"]:
+            all_notes_list = progress["notes"]
+        else:
             # Get all note information of the creator
             all_notes_list = await self.xhs_client.get_all_notes_by_creator(
                 user_id=user_id,
-                crawl_interval=crawl_interval,
+                crawl_interval=0,
                 callback=self.fetch_creator_notes_detail,
                 xsec_token=creator_info.xsec_token,
                 xsec_source=creator_info.xsec_source,
+                start_cursor=progress["cursor"] if progress else "",
+                progress_callback=save_page if progress else None,
             )
+            if progress:
+                # notes listed by the previous run included
+                all_notes_list = progress["notes"]
+                checkpoint.finish_creator(user_id)
 
-            note_ids = []
-            xsec_tokens = []
-            for note_item in all_notes_list:
-                note_ids.append(note_item.get("note_id"))
-                xsec_tokens.append(note_item.get("xsec_token"))
-            await self.batch_get_note_comments(note_ids, xsec_tokens)
+        note_ids = []
+        xsec_tokens = []
+        for note_item in all_notes_list:
+            note_ids.append(note_item.get("note_id"))
+            xsec_tokens.append(note_item.get("xsec_token"))
+        await self.batch_get_note_comments(note_ids, xsec_tokens)
+        if progress is not None:
+            checkpoint.complete_creator(user_id)
 
     async def fetch_creator_notes_detail(self, note_list: List[Dict]):
         """Concurrently obtain the specified post list and save the data"""
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("xhs", "detail")
         task_list = [
             self.get_note_detail_async_task(
                 note_id=post_item.get("note_id"),
@@ -253,7 +508,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 note_id=note_url_info.note_id,
                 xsec_source=note_url_info.xsec_source,
                 xsec_token=note_url_info.xsec_token,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=get_concurrency_limiter("xhs", "detail"),
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -274,6 +529,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         xsec_source: str,
         xsec_token: str,
         semaphore: asyncio.Semaphore,
+        reraise: bool = False,
     ) -> Optional[Dict]:
         """Get note detail
 
@@ -282,6 +538,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             xsec_source:
             xsec_token:
             semaphore:
+            reraise: raise fetch errors instead of returning None, a note that does not exist still returns None
 
         Returns:
             Dict: note detail
@@ -303,10 +560,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
                 note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
 
-                # Sleep after fetching note detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
-
                 return note_detail
 
             except NoteNotFoundError as ex:
@@ -314,9 +567,13 @@ class XiaoHongShuCrawler(AbstractCrawler):
                 return None
             except DataFetchError as ex:
                 utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}")
+                if reraise:
+                    raise
                 return None
             except KeyError as ex:
                 utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}")
+                if reraise:
+                    raise
                 return None
 
     async def batch_get_note_comments(self, note_list: List[str], xsec_tokens: List[str]):
@@ -326,7 +583,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[XiaoHongShuCrawler.batch_get_note_comments] Begin batch get note comments, note list: {note_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = get_concurrency_limiter("xhs", "comments")
         task_list: List[Task] = []
         for index, note_id in enumerate(note_list):
             task = asyncio.create_task(
@@ -338,21 +595,38 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def get_comments(self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore):
         """Get note comments with keyword filtering and quantity limitation"""
+        checkpoint = get_checkpoint()
+        progress = checkpoint.comments(note_id) if checkpoint else None
+        if progress and progress["done"]:
+            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Comments of {note_id} were finished by the previous run, skip")
+            return
+
+        resumed_count = progress["count"] if progress else 0
+
+        async def save_cursor(cursor: str, count: int) -> None:
+            checkpoint.save_comment_cursor(note_id, cursor, resumed_count + count)
+
+        # delta mode: on a revisited note only the comments newer than the stored ones are paged
+        seen_index = get_seen_index()
+        delta = await seen_index.comment_delta("xhs", note_id) if seen_index and config.INCREMENTAL_COMMENT_DELTA else None
+
         async with semaphore:
             utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
-            # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
             await self.xhs_client.get_note_all_comments(
                 note_id=note_id,
                 xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
+                crawl_interval=0,
                 callback=xhs_store.batch_update_xhs_note_comments,
-                max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES - resumed_count,
+                start_cursor=progress["cursor"] if progress else "",
+                progress_callback=save_cursor if progress else None,
+                delta=delta,
             )
+        if delta:
+            await seen_index.record_comments("xhs", note_id, delta)
+        if checkpoint:
+            checkpoint.finish_comments(note_id)
 
-            # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create Xiaohongshu client"""
@@ -483,7 +757,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
             if not url:
                 continue
             content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
             if content is None:
                 continue
             extension_file_name = f"{picNum}.jpg"
@@ -507,7 +780,6 @@ class XiaoHongShuCrawler(AbstractCrawler):
         videoNum = 0
         for url in videos:
             content = await self.xhs_client.get_note_media(url)
-            await asyncio.sleep(random.random())
             if content is None:
                 continue
             extension_file_name = f"{videoNum}.mp4"
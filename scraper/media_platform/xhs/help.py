@@ -281,6 +281,12 @@ def get_search_id():
     return base36encode((e + t))
 
 
+def get_interact_counts(interact_info: dict) -> dict:
+    """Interaction counts shared by search results (note_card) and note details, for change detection"""
+    interact_info = interact_info or {}
+    return {key: interact_info.get(key) for key in ("liked_count", "collected_count", "comment_count") if key in interact_info}
+
+
 img_cdns = [
     "https://sns-img-qc.xhscdn.com",
     "https://sns-img-hw.xhscdn.com",
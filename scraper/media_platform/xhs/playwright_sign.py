@@ -18,16 +18,31 @@
 
 # Generate Xiaohongshu signature by calling window.mnsv2 via Playwright injection
 
+import asyncio
 import hashlib
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlparse, quote
 
-from playwright.async_api import Page
+from playwright.async_api import BrowserContext, Page
+
+import config
+from tools import utils
 
 from .xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
 
+_MNSV2_READY_JS = "() => typeof window.mnsv2 === 'function'"
+
+# Sign a whole batch of (sign_str, md5_str) pairs in a single page.evaluate round trip
+_BATCH_MNSV2_JS = """(items) => items.map(([signStr, md5Str]) => {
+    try {
+        return window.mnsv2(signStr, md5Str) || "";
+    } catch (e) {
+        return "";
+    }
+})"""
+
 
 def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method: str = "POST") -> str:
     """Build string to be signed
@@ -115,8 +130,8 @@ def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
 async def get_b1_from_localstorage(page: Page) -> str:
     """Get b1 value from localStorage"""
     try:
-        local_storage = await page.evaluate("() => window.localStorage")
-        return local_storage.get("b1", "")
+        b1 = await page.evaluate("() => window.localStorage.getItem('b1')")
+        return b1 or ""
     except Exception:
         return ""
 
@@ -242,3 +257,293 @@ async def pre_headers_with_playwright(
         "x-S-Common": signs["x-s-common"],
         "X-B3-Traceid": signs["x-b3-traceid"],
     }
+
+
+def _assemble_signs(data: Optional[Union[Dict, str]], a1: str, b1: str, x3_value: str) -> Dict[str, Any]:
+    """Build the final signature headers from the mnsv2 result"""
+    data_type = "object" if isinstance(data, (dict, list)) else "string"
+    x_s = _build_xs_payload(x3_value, data_type)
+    x_t = str(int(time.time() * 1000))
+    return {
+        "x-s": x_s,
+        "x-t": x_t,
+        "x-s-common": _build_xs_common(a1, b1, x_s, x_t),
+        "x-b3-traceid": get_trace_id(),
+    }
+
+
+class XhsPlaywrightSigner:
+    """
+    Signing service bound to one Xiaohongshu page
+
+    - b1 is read from localStorage once and cached until invalidate_b1() (called on cookie update)
+    - concurrent mnsv2 calls are coalesced: while one page.evaluate is in flight, new sign
+      requests queue up and are signed together in the next single evaluate call
+    """
+
+    def __init__(self, page: Page, max_batch_size: Optional[int] = None):
+        """
+        Args:
+            page: playwright Page object (must have Xiaohongshu page open)
+            max_batch_size: max payloads signed per evaluate call, defaults to config.XHS_SIGN_BATCH_SIZE
+        """
+        self.page = page
+        self.max_batch_size = max_batch_size or config.XHS_SIGN_BATCH_SIZE
+        self._b1: Optional[str] = None
+        self._b1_lock = asyncio.Lock()
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._busy = 0
+
+    def invalidate_b1(self) -> None:
+        """Drop the cached b1, it will be re-read on the next sign"""
+        self._b1 = None
+
+    async def get_b1(self) -> str:
+        """Get b1, reading localStorage only when not cached"""
+        if self._b1 is not None:
+            return self._b1
+        async with self._b1_lock:
+            if self._b1 is None:
+                b1 = await get_b1_from_localstorage(self.page)
+                if not b1:
+                    # Do not cache a miss, the page may not have written it yet
+                    return b1
+                self._b1 = b1
+            return self._b1
+
+    @property
+    def pending_count(self) -> int:
+        """Number of sign requests waiting for the next evaluate call"""
+        return len(self._pending)
+
+    @property
+    def busy_count(self) -> int:
+        """Number of sign requests queued or being signed on this page"""
+        return self._busy
+
+    async def wait_until_ready(self, timeout: float = 15000) -> None:
+        """
+        Wait until window.mnsv2 is loaded on the page
+        Args:
+            timeout: timeout in milliseconds
+        """
+        await self.page.wait_for_function(_MNSV2_READY_JS, timeout=timeout)
+
+    async def reload(self, timeout: float = 15000) -> None:
+        """
+        Reload the page and wait for window.mnsv2 again, used when the page stops returning signatures
+        Args:
+            timeout: timeout in milliseconds
+        """
+        await self.page.reload(wait_until="domcontentloaded", timeout=timeout)
+        await self.wait_until_ready(timeout)
+        self.invalidate_b1()
+
+    def submit_mnsv2(self, sign_str: str, md5_str: str) -> asyncio.Future:
+        """
+        Queue one mnsv2 call without waiting, it is signed together with every other call queued meanwhile
+
+        Returns:
+            Future resolving to the signature string returned by mnsv2, "" on failure
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((sign_str, md5_str, future))
+        self._busy += 1
+        future.add_done_callback(self._on_sign_done)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return future
+
+    def _on_sign_done(self, _future: asyncio.Future) -> None:
+        self._busy -= 1
+
+    async def call_mnsv2(self, sign_str: str, md5_str: str) -> str:
+        """
+        Queue one mnsv2 call and wait for its signature
+
+        Returns:
+            Signature string returned by mnsv2, "" on failure
+        """
+        return await self.submit_mnsv2(sign_str, md5_str)
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            # Let callers scheduled in the same loop iteration join this batch
+            await asyncio.sleep(0)
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            results = await self._evaluate_batch([(sign_str, md5_str) for sign_str, md5_str, _ in batch])
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def _evaluate_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        try:
+            results = await self.page.evaluate(_BATCH_MNSV2_JS, [list(item) for item in items])
+        except Exception as e:
+            utils.logger.error(f"[XhsPlaywrightSigner._evaluate_batch] batch mnsv2 failed, size: {len(items)}, err: {e}")
+            return [""] * len(items)
+        if not isinstance(results, list) or len(results) != len(items):
+            return [""] * len(items)
+        return [result or "" for result in results]
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Generate complete signature request headers, same result as sign_with_playwright
+
+        Args:
+            uri: API path
+            data: Request data
+            a1: a1 value from cookie
+            method: Request method (GET or POST)
+
+        Returns:
+            Dictionary containing x-s, x-t, x-s-common, x-b3-traceid
+        """
+        sign_str = _build_sign_string(uri, data, method)
+        b1, x3_value = await asyncio.gather(
+            self.get_b1(),
+            self.call_mnsv2(sign_str, _md5_hex(sign_str)),
+        )
+        return _assemble_signs(data, a1, b1, x3_value)
+
+
+class XhsSignPagePool:
+    """
+    Pool of Xiaohongshu signing pages in one browser context
+
+    Every sign request goes to the least busy healthy page. A page whose mnsv2 returns an
+    empty signature is taken out of rotation and reloaded in the background, and the request
+    is retried on another page.
+    """
+
+    def __init__(self, signers: List[XhsPlaywrightSigner]):
+        """
+        Args:
+            signers: one signer per page, the first one is usually the crawler's context_page
+        """
+        if not signers:
+            raise ValueError("XhsSignPagePool needs at least one signing page")
+        self.signers = signers
+        self._reloading: Dict[int, asyncio.Task] = {}
+        self._owned_pages: List[Page] = []
+
+    @classmethod
+    def from_page(cls, page: Page) -> "XhsSignPagePool":
+        return cls([XhsPlaywrightSigner(page)])
+
+    @property
+    def size(self) -> int:
+        return len(self.signers)
+
+    async def grow(self, browser_context: BrowserContext, pool_size: int, index_url: str) -> None:
+        """
+        Open extra signing pages until the pool holds pool_size pages
+        Args:
+            browser_context: browser context holding the logged-in cookies
+            pool_size: target number of signing pages
+            index_url: Xiaohongshu page that loads window.mnsv2
+        """
+        while len(self.signers) < pool_size:
+            page = await browser_context.new_page()
+            try:
+                await page.goto(index_url, wait_until="domcontentloaded")
+                signer = XhsPlaywrightSigner(page)
+                await signer.wait_until_ready()
+            except Exception as e:
+                utils.logger.error(f"[XhsSignPagePool.grow] open signing page failed, pool size stays {len(self.signers)}: {e}")
+                await page.close()
+                return
+            self.signers.append(signer)
+            self._owned_pages.append(page)
+        utils.logger.info(f"[XhsSignPagePool.grow] signing page pool size: {len(self.signers)}")
+
+    def invalidate_b1(self) -> None:
+        for signer in self.signers:
+            signer.invalidate_b1()
+
+    def _pick_signer(self, exclude: List[int]) -> Optional[int]:
+        """Index of the least busy healthy page, None if every page is excluded or reloading"""
+        candidates = [
+            index for index in range(len(self.signers))
+            if index not in exclude and index not in self._reloading
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda index: self.signers[index].busy_count)
+
+    def _schedule_reload(self, index: int) -> None:
+        if index in self._reloading:
+            return
+        self._reloading[index] = asyncio.create_task(self._reload(index))
+
+    async def _reload(self, index: int) -> None:
+        signer = self.signers[index]
+        utils.logger.warning(f"[XhsSignPagePool._reload] mnsv2 returned empty signature, reloading signing page {index}")
+        try:
+            await signer.reload()
+        except Exception as e:
+            utils.logger.error(f"[XhsSignPagePool._reload] reload signing page {index} failed: {e}")
+        finally:
+            self._reloading.pop(index, None)
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+    ) -> Dict[str, Any]:
+        """
+        Generate complete signature request headers on the least busy page
+
+        Args:
+            uri: API path
+            data: Request data
+            a1: a1 value from cookie
+            method: Request method (GET or POST)
+
+        Returns:
+            Dictionary containing x-s, x-t, x-s-common, x-b3-traceid
+        """
+        sign_str = _build_sign_string(uri, data, method)
+        md5_str = _md5_hex(sign_str)
+        tried: List[int] = []
+        b1, x3_value = "", ""
+        while True:
+            index = self._pick_signer(tried)
+            if index is None:
+                if tried:
+                    break
+                # Every page is reloading, wait on the first one rather than fail
+                index = 0
+            tried.append(index)
+            signer = self.signers[index]
+            # Enqueue before awaiting anything so busy counts are current for the next dispatch
+            x3_future = signer.submit_mnsv2(sign_str, md5_str)
+            b1 = await signer.get_b1()
+            x3_value = await x3_future
+            if x3_value:
+                break
+            self._schedule_reload(index)
+        return _assemble_signs(data, a1, b1, x3_value)
+
+    async def close(self) -> None:
+        """Close the pages opened by the pool, the crawler's own page is left alone"""
+        for task in list(self._reloading.values()):
+            task.cancel()
+        self._reloading.clear()
+        owned_pages, self._owned_pages = self._owned_pages, []
+        self.signers = [signer for signer in self.signers if signer.page not in owned_pages]
+        for page in owned_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
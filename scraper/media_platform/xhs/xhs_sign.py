@@ -19,134 +19,52 @@
 # Xiaohongshu signature algorithm core functions
 # Used for generating signatures via playwright injection
 
-import ctypes
+import base64
 import random
-from urllib.parse import quote
+import zlib
+from typing import Union
 
 # Custom Base64 character table
 # Standard Base64: ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/
 # Xiaohongshu shuffled order for obfuscation
-BASE64_CHARS = list("ZmserbBoHQtNP+wOcza/LpngG8yJq42KWYj0DSfdikx3VT16IlUAFM97hECvuRX5")
+STANDARD_BASE64_CHARS = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+BASE64_CHARS = b"ZmserbBoHQtNP+wOcza/LpngG8yJq42KWYj0DSfdikx3VT16IlUAFM97hECvuRX5"
 
-# CRC32 lookup table
-CRC32_TABLE = [
-    0, 1996959894, 3993919788, 2567524794, 124634137, 1886057615, 3915621685,
-    2657392035, 249268274, 2044508324, 3772115230, 2547177864, 162941995,
-    2125561021, 3887607047, 2428444049, 498536548, 1789927666, 4089016648,
-    2227061214, 450548861, 1843258603, 4107580753, 2211677639, 325883990,
-    1684777152, 4251122042, 2321926636, 335633487, 1661365465, 4195302755,
-    2366115317, 997073096, 1281953886, 3579855332, 2724688242, 1006888145,
-    1258607687, 3524101629, 2768942443, 901097722, 1119000684, 3686517206,
-    2898065728, 853044451, 1172266101, 3705015759, 2882616665, 651767980,
-    1373503546, 3369554304, 3218104598, 565507253, 1454621731, 3485111705,
-    3099436303, 671266974, 1594198024, 3322730930, 2970347812, 795835527,
-    1483230225, 3244367275, 3060149565, 1994146192, 31158534, 2563907772,
-    4023717930, 1907459465, 112637215, 2680153253, 3904427059, 2013776290,
-    251722036, 2517215374, 3775830040, 2137656763, 141376813, 2439277719,
-    3865271297, 1802195444, 476864866, 2238001368, 4066508878, 1812370925,
-    453092731, 2181625025, 4111451223, 1706088902, 314042704, 2344532202,
-    4240017532, 1658658271, 366619977, 2362670323, 4224994405, 1303535960,
-    984961486, 2747007092, 3569037538, 1256170817, 1037604311, 2765210733,
-    3554079995, 1131014506, 879679996, 2909243462, 3663771856, 1141124467,
-    855842277, 2852801631, 3708648649, 1342533948, 654459306, 3188396048,
-    3373015174, 1466479909, 544179635, 3110523913, 3462522015, 1591671054,
-    702138776, 2966460450, 3352799412, 1504918807, 783551873, 3082640443,
-    3233442989, 3988292384, 2596254646, 62317068, 1957810842, 3939845945,
-    2647816111, 81470997, 1943803523, 3814918930, 2489596804, 225274430,
-    2053790376, 3826175755, 2466906013, 167816743, 2097651377, 4027552580,
-    2265490386, 503444072, 1762050814, 4150417245, 2154129355, 426522225,
-    1852507879, 4275313526, 2312317920, 282753626, 1742555852, 4189708143,
-    2394877945, 397917763, 1622183637, 3604390888, 2714866558, 953729732,
-    1340076626, 3518719985, 2797360999, 1068828381, 1219638859, 3624741850,
-    2936675148, 906185462, 1090812512, 3747672003, 2825379669, 829329135,
-    1181335161, 3412177804, 3160834842, 628085408, 1382605366, 3423369109,
-    3138078467, 570562233, 1426400815, 3317316542, 2998733608, 733239954,
-    1555261956, 3268935591, 3050360625, 752459403, 1541320221, 2607071920,
-    3965973030, 1969922972, 40735498, 2617837225, 3943577151, 1913087877,
-    83908371, 2512341634, 3803740692, 2075208622, 213261112, 2463272603,
-    3855990285, 2094854071, 198958881, 2262029012, 4057260610, 1759359992,
-    534414190, 2176718541, 4139329115, 1873836001, 414664567, 2282248934,
-    4279200368, 1711684554, 285281116, 2405801727, 4167216745, 1634467795,
-    376229701, 2685067896, 3608007406, 1308918612, 956543938, 2808555105,
-    3495958263, 1231636301, 1047427035, 2932959818, 3654703836, 1088359270,
-    936918000, 2847714899, 3736837829, 1202900863, 817233897, 3183342108,
-    3401237130, 1404277552, 615818150, 3134207493, 3453421203, 1423857449,
-    601450431, 3009837614, 3294710456, 1567103746, 711928724, 3020668471,
-    3272380065, 1510334235, 755167117,
-]
+# Maps standard base64 output onto the custom alphabet, "=" padding is left untouched
+_BASE64_TRANSLATE_TABLE = bytes.maketrans(STANDARD_BASE64_CHARS, BASE64_CHARS)
 
-
-def _right_shift_unsigned(num: int, bit: int = 0) -> int:
-    """Python implementation of JavaScript unsigned right shift (>>>)"""
-    val = ctypes.c_uint32(num).value >> bit
-    MAX32INT = 4294967295
-    return (val + (MAX32INT + 1)) % (2 * (MAX32INT + 1)) - MAX32INT - 1
+# mrc only hashes the first 57 characters
+_MRC_MAX_LENGTH = 57
+_MRC_XOR_KEY = 3988292384
 
 
 def mrc(e: str) -> int:
-    """CRC32 variant, used for x9 field in x-s-common"""
-    o = -1
-    for n in range(min(57, len(e))):
-        o = CRC32_TABLE[(o & 255) ^ ord(e[n])] ^ _right_shift_unsigned(o, 8)
-    return o ^ -1 ^ 3988292384
-
-
-def _triplet_to_base64(e: int) -> str:
-    """Convert 24-bit integer to 4 Base64 characters"""
-    return (
-        BASE64_CHARS[(e >> 18) & 63]
-        + BASE64_CHARS[(e >> 12) & 63]
-        + BASE64_CHARS[(e >> 6) & 63]
-        + BASE64_CHARS[e & 63]
-    )
-
+    """
+    CRC32 variant, used for x9 field in x-s-common
 
-def _encode_chunk(data: list, start: int, end: int) -> str:
-    """Encode data chunk"""
-    result = []
-    for i in range(start, end, 3):
-        c = ((data[i] << 16) & 0xFF0000) + ((data[i + 1] << 8) & 0xFF00) + (data[i + 2] & 0xFF)
-        result.append(_triplet_to_base64(c))
-    return "".join(result)
+    The lookup table used by the web sign js is the standard IEEE CRC32 table, so the
+    register after the loop is zlib.crc32 without its final inversion; the js then
+    returns `register ^ -1 ^ 3988292384` with JS signed int semantics.
+    """
+    if not e:
+        # the js register starts as the signed -1 and is never masked to 32 bits
+        return _MRC_XOR_KEY
+    register = zlib.crc32(e[:_MRC_MAX_LENGTH].encode("latin-1")) ^ 0xFFFFFFFF
+    return ~register ^ _MRC_XOR_KEY
 
 
-def encode_utf8(s: str) -> list:
-    """Encode string to UTF-8 byte list"""
-    encoded = quote(s, safe="~()*!.'")
-    result = []
-    i = 0
-    while i < len(encoded):
-        if encoded[i] == "%":
-            result.append(int(encoded[i + 1: i + 3], 16))
-            i += 3
-        else:
-            result.append(ord(encoded[i]))
-            i += 1
-    return result
+def encode_utf8(s: str) -> bytes:
+    """Encode string to UTF-8 bytes"""
+    return s.encode("utf-8")
 
 
-def b64_encode(data: list) -> str:
+def b64_encode(data: Union[bytes, bytearray, list]) -> str:
     """Custom Base64 encoding"""
-    length = len(data)
-    remainder = length % 3
-    chunks = []
-
-    main_length = length - remainder
-    for i in range(0, main_length, 16383):
-        chunks.append(_encode_chunk(data, i, min(i + 16383, main_length)))
-
-    if remainder == 1:
-        a = data[length - 1]
-        chunks.append(BASE64_CHARS[a >> 2] + BASE64_CHARS[(a << 4) & 63] + "==")
-    elif remainder == 2:
-        a = (data[length - 2] << 8) + data[length - 1]
-        chunks.append(
-            BASE64_CHARS[a >> 10] + BASE64_CHARS[(a >> 4) & 63] + BASE64_CHARS[(a << 2) & 63] + "="
-        )
-
-    return "".join(chunks)
+    if isinstance(data, list):
+        data = bytes(data)
+    return base64.b64encode(data).translate(_BASE64_TRANSLATE_TABLE).decode("ascii")
 
 
 def get_trace_id() -> str:
     """Generate trace id for link tracing"""
-    return "".join(random.choice("abcdef0123456789") for _ in range(16))
+    return "".join(random.choices("abcdef0123456789", k=16))
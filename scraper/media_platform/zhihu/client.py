@@ -23,7 +23,6 @@ import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
-import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -34,6 +33,11 @@ from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from proxy.proxy_mixin import ProxyRefreshMixin
 from tools import utils
+from tools.adaptive_concurrency import observe_request_errors
+from tools.comment_fanout import expand_comment_threads
+from tools.http_transport import HttpTransport
+from tools.rate_limiter import classify_endpoint, rate_limit
+from tools.single_flight import coalesce_requests
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -60,6 +64,8 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         self.default_headers = headers
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
+        # Pooled keep-alive connections reused for the client's whole lifetime
+        self.transport = HttpTransport(proxy=proxy, timeout=timeout)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
@@ -74,13 +80,15 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
+    @coalesce_requests
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @observe_request_errors
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         Wrapper for httpx common request method with response handling
@@ -94,12 +102,12 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         """
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
+        await rate_limit("zhihu", classify_endpoint(url))
 
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self.transport.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
@@ -317,7 +325,6 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
 
             result.extend(comments)
             await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
         return result
 
     async def get_comments_all_sub_comments(
@@ -341,11 +348,8 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         if not config.ENABLE_GET_SUB_COMMENTS:
             return []
 
-        all_sub_comments: List[ZhihuComment] = []
-        for parment_comment in comments:
-            if parment_comment.sub_comment_count == 0:
-                continue
-
+        async def expand_thread(parment_comment: ZhihuComment) -> List[ZhihuComment]:
+            thread_comments: List[ZhihuComment] = []
             is_end: bool = False
             offset: str = ""
             limit: int = 10
@@ -364,9 +368,13 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
                 if callback:
                     await callback(sub_comments)
 
-                all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
-        return all_sub_comments
+                thread_comments.extend(sub_comments)
+            return thread_comments
+
+        # child comment threads of different root comments are paged concurrently
+        return await expand_comment_threads(
+            [comment for comment in comments if comment.sub_comment_count != 0], expand_thread
+        )
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
@@ -471,7 +479,6 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
     async def get_all_articles_by_creator(
@@ -505,7 +512,6 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
     async def get_all_videos_by_creator(
@@ -539,7 +545,6 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
         return all_contents
 
     async def get_answer_info(
@@ -29,6 +29,7 @@ from tools import utils
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
+    from tools.http_transport import HttpTransport
 
 
 class ProxyRefreshMixin:
@@ -42,9 +43,11 @@ class ProxyRefreshMixin:
 
     Requirements:
     - client class must have self.proxy attribute to store current proxy URL
+    - if the client holds a pooled HttpTransport in self.transport, it is rebuilt on proxy change
     """
 
     _proxy_ip_pool: Optional["ProxyIpPool"] = None
+    transport: Optional["HttpTransport"] = None
 
     def init_proxy_pool(self, proxy_ip_pool: Optional["ProxyIpPool"]) -> None:
         """
@@ -72,6 +75,9 @@ class ProxyRefreshMixin:
                 self.proxy = f"http://{new_proxy.user}:{new_proxy.password}@{new_proxy.ip}:{new_proxy.port}"
             else:
                 self.proxy = f"http://{new_proxy.ip}:{new_proxy.port}"
+            # Rebuild the pooled connections on the new proxy
+            if self.transport is not None:
+                await self.transport.set_proxy(self.proxy)
             utils.logger.info(
                 f"[{self.__class__.__name__}._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
@@ -27,15 +27,16 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
 from tools import utils, words
@@ -78,6 +79,34 @@ class BiliCsvStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(
+            items=content_items,
+            item_type="videos"
+        )
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(
+            items=comment_items,
+            item_type="comments"
+        )
+
     async def store_creator(self, creator: Dict):
         """
         creator CSV storage implementation
@@ -122,32 +151,34 @@ class BiliCsvStoreImplement(AbstractStore):
 
 
 class BiliDbStoreImplement(AbstractStore):
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_content(self, content_item: Dict):
         """
         Bilibili content DB storage implementation
         Args:
             content_item: content item dict
         """
-        video_id = int(content_item.get("video_id"))
-        content_item["video_id"] = video_id
-        content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
-        content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
-        content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
-        
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Bilibili content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+        """
+        if not content_items:
+            return
+        now = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item["video_id"] = int(content_item.get("video_id"))
+            content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
+            content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
+            content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
+            content_item["add_ts"] = content_item["last_modify_ts"] = now
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideo).where(BilibiliVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_content = BilibiliVideo(**content_item)
-                session.add(new_content)
-            else:
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    setattr(video_detail, key, value)
-            await session.commit()
+            await upsert(session, BilibiliVideo, content_items, ["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -155,28 +186,27 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["like_count"] = str(comment_item.get("like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
-        
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Bilibili comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
+        """
+        if not comment_items:
+            return
+        now = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["like_count"] = str(comment_item.get("like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            comment_item["add_ts"] = comment_item["last_modify_ts"] = now
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideoComment).where(BilibiliVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_comment = BilibiliVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await upsert(session, BilibiliVideoComment, comment_items, ["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -184,27 +214,15 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             creator: creator item dict
         """
-        creator_id = int(creator.get("user_id"))
-        creator["user_id"] = creator_id
+        creator["user_id"] = int(creator.get("user_id"))
         creator["total_fans"] = int(creator.get("total_fans", 0) or 0)
         creator["total_liked"] = int(creator.get("total_liked", 0) or 0)
         creator["user_rank"] = int(creator.get("user_rank", 0) or 0)
         creator["is_official"] = int(creator.get("is_official", 0) or 0)
+        creator["add_ts"] = creator["last_modify_ts"] = utils.get_current_timestamp()
 
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpInfo).where(BilibiliUpInfo.user_id == creator_id))
-            creator_detail = result.scalar_one_or_none()
-
-            if not creator_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                new_creator = BilibiliUpInfo(**creator)
-                session.add(new_creator)
-            else:
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    setattr(creator_detail, key, value)
-            await session.commit()
+            await upsert(session, BilibiliUpInfo, [creator], ["user_id"])
 
     async def store_contact(self, contact_item: Dict):
         """
@@ -212,27 +230,12 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             contact_item: contact item dict
         """
-        up_id = int(contact_item.get("up_id"))
-        fan_id = int(contact_item.get("fan_id"))
-        contact_item["up_id"] = up_id
-        contact_item["fan_id"] = fan_id
+        contact_item["up_id"] = int(contact_item.get("up_id"))
+        contact_item["fan_id"] = int(contact_item.get("fan_id"))
+        contact_item["add_ts"] = contact_item["last_modify_ts"] = utils.get_current_timestamp()
 
         async with get_session() as session:
-            result = await session.execute(
-                select(BilibiliContactInfo).where(BilibiliContactInfo.up_id == up_id, BilibiliContactInfo.fan_id == fan_id)
-            )
-            contact_detail = result.scalar_one_or_none()
-
-            if not contact_detail:
-                contact_item["add_ts"] = utils.get_current_timestamp()
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_contact = BilibiliContactInfo(**contact_item)
-                session.add(new_contact)
-            else:
-                contact_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in contact_item.items():
-                    setattr(contact_detail, key, value)
-            await session.commit()
+            await upsert(session, BilibiliContactInfo, [contact_item], ["up_id", "fan_id"])
 
     async def store_dynamic(self, dynamic_item):
         """
@@ -240,23 +243,11 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             dynamic_item: dynamic item dict
         """
-        dynamic_id = int(dynamic_item.get("dynamic_id"))
-        dynamic_item["dynamic_id"] = dynamic_id
-        
-        async with get_session() as session:
-            result = await session.execute(select(BilibiliUpDynamic).where(BilibiliUpDynamic.dynamic_id == dynamic_id))
-            dynamic_detail = result.scalar_one_or_none()
+        dynamic_item["dynamic_id"] = int(dynamic_item.get("dynamic_id"))
+        dynamic_item["add_ts"] = dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
 
-            if not dynamic_detail:
-                dynamic_item["add_ts"] = utils.get_current_timestamp()
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_dynamic = BilibiliUpDynamic(**dynamic_item)
-                session.add(new_dynamic)
-            else:
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in dynamic_item.items():
-                    setattr(dynamic_detail, key, value)
-            await session.commit()
+        async with get_session() as session:
+            await upsert(session, BilibiliUpDynamic, [dynamic_item], ["dynamic_id"])
 
 
 class BiliJsonStoreImplement(AbstractStore):
@@ -294,6 +285,34 @@ class BiliJsonStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(
+            items=content_items,
+            item_type="contents"
+        )
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(
+            items=comment_items,
+            item_type="comments"
+        )
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -382,6 +401,24 @@ class BiliMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[BiliMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of video contents to MongoDB with one bulk write
+        Args:
+            content_items: Video content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="video_id", items=content_items)
+        utils.logger.info(f"[BiliMongoStoreImplement.store_contents] Saved {len(content_items)} videos to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[BiliMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store UP master information to MongoDB
@@ -21,9 +21,10 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from store import store_registry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,6 +37,7 @@ class DouyinStoreFactory:
         "db": DouyinDbStoreImplement,
         "postgres": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonStoreImplement,
         "sqlite": DouyinSqliteStoreImplement,
         "mongodb": DouyinMongoStoreImplement,
         "excel": DouyinExcelStoreImplement,
@@ -45,9 +47,14 @@ class DouyinStoreFactory:
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("dy", DouyinStoreFactory.create_store)
+
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
     """
@@ -184,21 +191,39 @@ async def update_douyin_aweme(aweme_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}")
-    await DouyinStoreFactory.create_store().store_content(content_item=save_content_item)
+    store = await DouyinStoreFactory.get_store()
+    await store.store_content(content_item=save_content_item)
 
 
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+    save_comment_items = [_to_save_comment_item(aweme_id, comment_item) for comment_item in comments]
+    save_comment_items = [save_comment_item for save_comment_item in save_comment_items if save_comment_item]
+    if not save_comment_items:
+        return
+    utils.logger.info(f"[store.douyin.batch_update_dy_aweme_comments] douyin aweme: {aweme_id}, comments: {len(save_comment_items)}")
+    store = await DouyinStoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(comment_items=save_comment_items)
 
 
 async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _to_save_comment_item(aweme_id, comment_item)
+    if not save_comment_item:
+        return
+    utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+
+    store = await DouyinStoreFactory.get_store()
+
+    await store.store_comment(comment_item=save_comment_item)
+
+
+def _to_save_comment_item(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -222,9 +247,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "parent_comment_id": parent_comment_id,
         "pictures": ",".join(_extract_comment_image_list(comment_item)),
     }
-    utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
-
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -245,7 +268,8 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
-    await DouyinStoreFactory.create_store().store_creator(local_db_item)
+    store = await DouyinStoreFactory.get_store()
+    await store.store_creator(local_db_item)
 
 
 async def update_dy_aweme_image(aweme_id, pic_content, extension_file_name):
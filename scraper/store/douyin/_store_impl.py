@@ -26,13 +26,15 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
-from sqlalchemy import select
+from sqlalchemy import update
 
 import config
 from base.base_crawler import AbstractStore
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
@@ -75,6 +77,34 @@ class DouyinCsvStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(
+            items=content_items,
+            item_type="contents"
+        )
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(
+            items=comment_items,
+            item_type="comments"
+        )
+
     async def store_creator(self, creator: Dict):
         """
         Douyin creator CSV storage implementation
@@ -91,26 +121,45 @@ class DouyinCsvStoreImplement(AbstractStore):
 
 
 class DouyinDbStoreImplement(AbstractStore):
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_content(self, content_item: Dict):
         """
         Douyin content DB storage implementation
         Args:
             content_item: content item dict
         """
-        aweme_id = int(content_item.get("aweme_id"))
-        async with get_session() as session:
-            result = await session.execute(select(DouyinAweme).where(DouyinAweme.aweme_id == aweme_id))
-            aweme_detail = result.scalar_one_or_none()
-
-            if not aweme_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                if content_item.get("title"):
-                    new_content = DouyinAweme(**content_item)
-                    session.add(new_content)
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Douyin content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+        """
+        if not content_items:
+            return
+        now = utils.get_current_timestamp()
+        titled_items, untitled_items = [], []
+        for content_item in content_items:
+            content_item["aweme_id"] = int(content_item.get("aweme_id"))
+            if content_item.get("title"):
+                content_item["add_ts"] = now
+                titled_items.append(content_item)
             else:
-                for key, value in content_item.items():
-                    setattr(aweme_detail, key, value)
-            await session.commit()
+                untitled_items.append(content_item)
+        async with get_session() as session:
+            if titled_items:
+                await upsert(session, DouyinAweme, titled_items, ["aweme_id"])
+            # an aweme without a title is only refreshed, never inserted
+            columns = DouyinAweme.__table__.columns.keys()
+            for content_item in untitled_items:
+                values = {key: value for key, value in content_item.items() if key in columns and key != "aweme_id"}
+                if values:
+                    await session.execute(
+                        update(DouyinAweme).where(DouyinAweme.aweme_id == content_item["aweme_id"]).values(**values)
+                    )
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -118,19 +167,22 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        async with get_session() as session:
-            result = await session.execute(select(DouyinAwemeComment).where(DouyinAwemeComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+        await self.store_comments([comment_item])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = DouyinAwemeComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Douyin comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
+        """
+        if not comment_items:
+            return
+        now = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["add_ts"] = now
+        async with get_session() as session:
+            await upsert(session, DouyinAwemeComment, comment_items, ["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -138,19 +190,9 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        creator["add_ts"] = utils.get_current_timestamp()
         async with get_session() as session:
-            result = await session.execute(select(DyCreator).where(DyCreator.user_id == user_id))
-            user_detail = result.scalar_one_or_none()
-
-            if not user_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                new_creator = DyCreator(**creator)
-                session.add(new_creator)
-            else:
-                for key, value in creator.items():
-                    setattr(user_detail, key, value)
-            await session.commit()
+            await upsert(session, DyCreator, [creator], ["user_id"])
 
 
 class DouyinJsonStoreImplement(AbstractStore):
@@ -188,6 +230,34 @@ class DouyinJsonStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(
+            items=content_items,
+            item_type="contents"
+        )
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(
+            items=comment_items,
+            item_type="comments"
+        )
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -248,6 +318,24 @@ class DouyinMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[DouyinMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of aweme contents to MongoDB with one bulk write
+        Args:
+            content_items: Aweme content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="aweme_id", items=content_items)
+        utils.logger.info(f"[DouyinMongoStoreImplement.store_contents] Saved {len(content_items)} awemes to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[DouyinMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store creator information to MongoDB
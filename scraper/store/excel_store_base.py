@@ -203,7 +203,7 @@ class ExcelStoreBase(AbstractStore):
 
         self._apply_header_style(sheet)
 
-    def _write_row(self, sheet, data: Dict[str, Any], headers: List[str]):
+    def _write_row(self, sheet, data: Dict[str, Any], headers: List[str], row_num: int = None):
         """
         Write data row to sheet
 
@@ -211,8 +211,10 @@ class ExcelStoreBase(AbstractStore):
             sheet: Worksheet object
             data: Data dictionary
             headers: List of header names (defines column order)
+            row_num: Row to write, defaults to the row after the last one
         """
-        row_num = sheet.max_row + 1
+        if row_num is None:
+            row_num = sheet.max_row + 1
 
         for col_num, header in enumerate(headers, 1):
             value = data.get(header, "")
@@ -276,6 +278,55 @@ class ExcelStoreBase(AbstractStore):
 
         utils.logger.info(f"[ExcelStoreBase] Stored comment to Excel: {comment_item.get('comment_id', 'N/A')}")
 
+    def _write_rows(self, sheet, items: List[Dict[str, Any]]):
+        """
+        Append data rows to sheet, the last row is looked up once per batch
+        (sheet.max_row scans every cell of the sheet)
+
+        Args:
+            sheet: Worksheet object
+            items: Data dictionaries
+        """
+        row_num = sheet.max_row + 1
+        for offset, item in enumerate(items):
+            self._write_row(sheet, item, list(item.keys()), row_num + offset)
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of content data to Excel
+
+        Args:
+            content_items: Content data dictionaries
+        """
+        if not content_items:
+            return
+
+        if not self.contents_headers_written:
+            self._write_headers(self.contents_sheet, list(content_items[0].keys()))
+            self.contents_headers_written = True
+
+        self._write_rows(self.contents_sheet, content_items)
+
+        utils.logger.info(f"[ExcelStoreBase] Stored {len(content_items)} contents to Excel")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comment data to Excel
+
+        Args:
+            comment_items: Comment data dictionaries
+        """
+        if not comment_items:
+            return
+
+        if not self.comments_headers_written:
+            self._write_headers(self.comments_sheet, list(comment_items[0].keys()))
+            self.comments_headers_written = True
+
+        self._write_rows(self.comments_sheet, comment_items)
+
+        utils.logger.info(f"[ExcelStoreBase] Stored {len(comment_items)} comments to Excel")
+
     async def store_creator(self, creator: Dict):
         """
         Store creator data to Excel
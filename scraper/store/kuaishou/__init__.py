@@ -25,6 +25,7 @@
 from typing import List
 
 import config
+from store import store_registry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,6 +37,7 @@ class KuaishouStoreFactory:
         "db": KuaishouDbStoreImplement,
         "postgres": KuaishouDbStoreImplement,
         "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonStoreImplement,
         "sqlite": KuaishouSqliteStoreImplement,
         "mongodb": KuaishouMongoStoreImplement,
         "excel": KuaishouExcelStoreImplement,
@@ -46,9 +48,14 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("ks", KuaishouStoreFactory.create_store)
+
 
 async def update_kuaishou_video(video_item: Dict):
     photo_info: Dict = video_item.get("photo", {})
@@ -75,18 +82,29 @@ async def update_kuaishou_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
-    await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    store = await KuaishouStoreFactory.get_store()
+    await store.store_content(content_item=save_content_item)
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
     utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
     if not comments:
         return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
+    save_comment_items = [_to_save_comment_item(video_id, comment_item) for comment_item in comments]
+    store = await KuaishouStoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(comment_items=save_comment_items)
 
 
 async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _to_save_comment_item(video_id, comment_item)
+    utils.logger.info(
+        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content')}")
+    store = await KuaishouStoreFactory.get_store()
+    await store.store_comment(comment_item=save_comment_item)
+
+
+def _to_save_comment_item(video_id: str, comment_item: Dict) -> Dict:
     # V2 API uses snake_case field names and comment_id is int type
     # Old GraphQL API used camelCase field names
     # Support both formats for backward compatibility
@@ -105,9 +123,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
         "sub_comment_count": str(comment_item.get("commentCount") or comment_item.get("subCommentCount", 0)),
         "last_modify_ts": utils.get_current_timestamp(),
     }
-    utils.logger.info(
-        f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -126,4 +142,5 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
-    await KuaishouStoreFactory.create_store().store_creator(local_db_item)
+    store = await KuaishouStoreFactory.get_store()
+    await store.store_creator(local_db_item)
@@ -27,15 +27,16 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
-from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
 from var import crawler_type_var
@@ -84,11 +85,36 @@ class KuaishouCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Kuaishou content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         pass
 
 
 class KuaishouDbStoreImplement(AbstractStore):
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_creator(self, creator: Dict):
         pass
 
@@ -98,20 +124,21 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = content_item.get("video_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Kuaishou content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+        """
+        if not content_items:
+            return
+        now = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item["add_ts"] = now
         async with get_session() as session:
-            result = await session.execute(select(KuaishouVideo).where(KuaishouVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                new_content = KuaishouVideo(**content_item)
-                session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    if hasattr(video_detail, key):
-                        setattr(video_detail, key, value)
-            await session.commit()
+            await upsert(session, KuaishouVideo, content_items, ["video_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -119,21 +146,21 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
-        async with get_session() as session:
-            result = await session.execute(
-                select(KuaishouVideoComment).where(KuaishouVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+        await self.store_comments([comment_item])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = KuaishouVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    if hasattr(comment_detail, key):
-                        setattr(comment_detail, key, value)
-            await session.commit()
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
+        """
+        if not comment_items:
+            return
+        now = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["add_ts"] = now
+        async with get_session() as session:
+            await upsert(session, KuaishouVideoComment, comment_items, ["comment_id"])
 
 
 class KuaishouJsonStoreImplement(AbstractStore):
@@ -163,6 +190,28 @@ class KuaishouJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Kuaishou content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         pass
 
@@ -212,6 +261,24 @@ class KuaishouMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[KuaishouMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of video contents to MongoDB with one bulk write
+        Args:
+            content_items: Video content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="video_id", items=content_items)
+        utils.logger.info(f"[KuaishouMongoStoreImplement.store_contents] Saved {len(content_items)} videos to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[KuaishouMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store creator information to MongoDB
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/store_registry.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Per-run store instances
+#
+# The store helpers (update_xhs_note, save_creator, ...) get their store through
+# XxxStoreFactory.get_store(), which creates the store for the current platform, save option
+# and crawler type once, awaits its open() hook, and hands the same instance out for every
+# further record. close_stores() calls the close() hooks on shutdown.
+
+import asyncio
+from typing import Callable, Dict, Tuple
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from var import crawler_type_var
+
+_stores: Dict[Tuple[str, str, str], AbstractStore] = {}
+_opened: Dict[Tuple[str, str, str], asyncio.Future] = {}
+
+
+async def get_store(platform: str, create_store: Callable[[], AbstractStore]) -> AbstractStore:
+    """
+    Store of the current run for the platform
+    Args:
+        platform: xhs | dy | ...
+        create_store: the platform factory's create_store, called once per save option and crawler type
+    """
+    key = (platform, config.SAVE_DATA_OPTION, crawler_type_var.get())
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = create_store()
+        # registered before awaiting, concurrent first records wait for the same open()
+        _opened[key] = asyncio.ensure_future(store.open())
+        utils.logger.info(f"[store_registry.get_store] Opened {type(store).__name__} for {platform} ({key[1]}, {key[2]})")
+    await asyncio.shield(_opened[key])
+    return store
+
+
+async def close_stores() -> None:
+    while _stores:
+        key, store = _stores.popitem()
+        _opened.pop(key, None)
+        try:
+            await store.close()
+        except Exception as e:
+            utils.logger.error(f"[store_registry.close_stores] Error closing {type(store).__name__}: {e}")
+
+
+def reset_stores() -> None:
+    """Forget the stores without closing them (tests)"""
+    _stores.clear()
+    _opened.clear()
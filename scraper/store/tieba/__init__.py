@@ -22,6 +22,7 @@
 from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from store import store_registry
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -33,6 +34,7 @@ class TieBaStoreFactory:
         "db": TieBaDbStoreImplement,
         "postgres": TieBaDbStoreImplement,
         "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonStoreImplement,
         "sqlite": TieBaSqliteStoreImplement,
         "mongodb": TieBaMongoStoreImplement,
         "excel": TieBaExcelStoreImplement,
@@ -43,9 +45,14 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("tieba", TieBaStoreFactory.create_store)
+
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
@@ -58,8 +65,10 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_tieba_note(note_item)
+    save_note_items = [_to_save_note_item(note_item) for note_item in note_list]
+    utils.logger.info(f"[store.tieba.batch_update_tieba_notes] tieba notes: {len(save_note_items)}")
+    store = await TieBaStoreFactory.get_store()
+    await store.store_contents(save_note_items)
 
 
 async def update_tieba_note(note_item: TiebaNote):
@@ -71,12 +80,19 @@ async def update_tieba_note(note_item: TiebaNote):
     Returns:
 
     """
+    save_note_item = _to_save_note_item(note_item)
+    utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
+
+    store = await TieBaStoreFactory.get_store()
+
+    await store.store_content(save_note_item)
+
+
+def _to_save_note_item(note_item: TiebaNote) -> Dict:
     note_item.source_keyword = source_keyword_var.get()
     save_note_item = note_item.model_dump()
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
-
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+    return save_note_item
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -91,8 +107,11 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+    save_comment_items = [_to_save_comment_item(comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.tieba.batch_update_tieba_note_comments] tieba note id: {note_id} comments: {len(save_comment_items)}")
+    store = await TieBaStoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(save_comment_items)
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
@@ -105,10 +124,16 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     Returns:
 
     """
+    save_comment_item = _to_save_comment_item(comment_item)
+    utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
+    store = await TieBaStoreFactory.get_store()
+    await store.store_comment(save_comment_item)
+
+
+def _to_save_comment_item(comment_item: TiebaComment) -> Dict:
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -123,4 +148,5 @@ async def save_creator(user_info: TiebaCreator):
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
     utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
-    await TieBaStoreFactory.create_store().store_creator(local_db_item)
+    store = await TieBaStoreFactory.get_store()
+    await store.store_creator(local_db_item)
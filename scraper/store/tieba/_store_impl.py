@@ -27,10 +27,9 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
@@ -38,6 +37,8 @@ from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
 from database.mongodb_store_base import MongoDBStoreBase
@@ -85,6 +86,28 @@ class TieBaCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        tieba content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         tieba content CSV storage implementation
@@ -98,24 +121,27 @@ class TieBaCsvStoreImplement(AbstractStore):
 
 
 class TieBaDbStoreImplement(AbstractStore):
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_content(self, content_item: Dict):
         """
         tieba content DB storage implementation
         Args:
             content_item: content item dict
         """
-        note_id = content_item.get("note_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        tieba content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+        """
+        if not content_items:
+            return
         async with get_session() as session:
-            stmt = select(TiebaNote).where(TiebaNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                for key, value in content_item.items():
-                    setattr(db_note, key, value)
-            else:
-                db_note = TiebaNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await upsert(session, TiebaNote, content_items, ["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -123,18 +149,18 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
+        """
+        if not comment_items:
+            return
         async with get_session() as session:
-            stmt = select(TiebaComment).where(TiebaComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                for key, value in comment_item.items():
-                    setattr(db_comment, key, value)
-            else:
-                db_comment = TiebaComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await upsert(session, TiebaComment, comment_items, ["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -142,18 +168,8 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
         async with get_session() as session:
-            stmt = select(TiebaCreator).where(TiebaCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                for key, value in creator.items():
-                    setattr(db_creator, key, value)
-            else:
-                db_creator = TiebaCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await upsert(session, TiebaCreator, [creator], ["user_id"])
 
 
 class TieBaJsonStoreImplement(AbstractStore):
@@ -183,6 +199,28 @@ class TieBaJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        tieba content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         tieba content JSON storage implementation
@@ -242,6 +280,24 @@ class TieBaMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[TieBaMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of note contents to MongoDB with one bulk write
+        Args:
+            content_items: Note content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="note_id", items=content_items)
+        utils.logger.info(f"[TieBaMongoStoreImplement.store_contents] Saved {len(content_items)} notes to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[TieBaMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store creator information to MongoDB
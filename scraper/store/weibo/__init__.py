@@ -23,8 +23,9 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
+from store import store_registry
 from var import source_keyword_var
 
 from .weibo_store_media import *
@@ -37,6 +38,7 @@ class WeibostoreFactory:
         "db": WeiboDbStoreImplement,
         "postgres": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonStoreImplement,
         "sqlite": WeiboSqliteStoreImplement,
         "mongodb": WeiboMongoStoreImplement,
         "excel": WeiboExcelStoreImplement,
@@ -46,9 +48,14 @@ class WeibostoreFactory:
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("wb", WeibostoreFactory.create_store)
+
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
     """
@@ -61,8 +68,13 @@ async def batch_update_weibo_notes(note_list: List[Dict]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
+    save_content_items = [_to_save_content_item(note_item) for note_item in note_list]
+    save_content_items = [save_content_item for save_content_item in save_content_items if save_content_item]
+    if not save_content_items:
+        return
+    utils.logger.info(f"[store.weibo.batch_update_weibo_notes] weibo notes: {len(save_content_items)}")
+    store = await WeibostoreFactory.get_store()
+    await store.store_contents(content_items=save_content_items)
 
 
 async def update_weibo_note(note_item: Dict):
@@ -74,8 +86,17 @@ async def update_weibo_note(note_item: Dict):
     Returns:
 
     """
-    if not note_item:
+    save_content_item = _to_save_content_item(note_item)
+    if not save_content_item:
         return
+    utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{save_content_item.get('note_id')}, title:{save_content_item.get('content')[:24]} ...")
+    store = await WeibostoreFactory.get_store()
+    await store.store_content(content_item=save_content_item)
+
+
+def _to_save_content_item(note_item: Dict) -> Optional[Dict]:
+    if not note_item:
+        return None
 
     mblog: Dict = note_item.get("mblog")
     user_info: Dict = mblog.get("user")
@@ -103,8 +124,7 @@ async def update_weibo_note(note_item: Dict):
         "avatar": user_info.get("profile_image_url", ""),
         "source_keyword": source_keyword_var.get(),
     }
-    utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    return save_content_item
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -119,8 +139,14 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+    save_comment_items = [_to_save_comment_item(note_id, comment_item) for comment_item in comments]
+    save_comment_items = [save_comment_item for save_comment_item in save_comment_items if save_comment_item]
+    if not save_comment_items:
+        return
+    utils.logger.info(f"[store.weibo.batch_update_weibo_note_comments] Weibo note: {note_id}, comments: {len(save_comment_items)}")
+    store = await WeibostoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(comment_items=save_comment_items)
 
 
 async def update_weibo_note_comment(note_id: str, comment_item: Dict):
@@ -133,8 +159,17 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     Returns:
 
     """
-    if not comment_item or not note_id:
+    save_comment_item = _to_save_comment_item(note_id, comment_item)
+    if not save_comment_item:
         return
+    utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {save_comment_item.get('comment_id')}, content: {save_comment_item.get('content', '')[:24]} ...")
+    store = await WeibostoreFactory.get_store()
+    await store.store_comment(comment_item=save_comment_item)
+
+
+def _to_save_comment_item(note_id: str, comment_item: Dict) -> Optional[Dict]:
+    if not comment_item or not note_id:
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -158,8 +193,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "profile_url": user_info.get("profile_url", ""),
         "avatar": user_info.get("profile_image_url", ""),
     }
-    utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -199,4 +233,5 @@ async def save_creator(user_id: str, user_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
-    await WeibostoreFactory.create_store().store_creator(local_db_item)
+    store = await WeibostoreFactory.get_store()
+    await store.store_creator(local_db_item)
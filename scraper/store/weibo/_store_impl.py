@@ -27,10 +27,9 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
@@ -39,6 +38,8 @@ from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
 
@@ -85,6 +86,28 @@ class WeiboCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Weibo content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         Weibo creator CSV storage implementation
@@ -99,6 +122,9 @@ class WeiboCsvStoreImplement(AbstractStore):
 
 class WeiboDbStoreImplement(AbstractStore):
 
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_content(self, content_item: Dict):
         """
         Weibo content DB storage implementation
@@ -108,23 +134,25 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        note_id = int(content_item.get("note_id"))
-        content_item["note_id"] = note_id
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Weibo content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        if not content_items:
+            return
+        now = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item["note_id"] = int(content_item.get("note_id"))
+            content_item["add_ts"] = content_item["last_modify_ts"] = now
         async with get_session() as session:
-            stmt = select(WeiboNote).where(WeiboNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                db_note.last_modify_ts = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    if hasattr(db_note, key):
-                        setattr(db_note, key, value)
-            else:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_note = WeiboNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await upsert(session, WeiboNote, content_items, ["note_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -135,29 +163,30 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
 
+        Returns:
+
+        """
+        if not comment_items:
+            return
+        now = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            comment_item["add_ts"] = comment_item["last_modify_ts"] = now
         async with get_session() as session:
-            stmt = select(WeiboNoteComment).where(WeiboNoteComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                db_comment.last_modify_ts = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    if hasattr(db_comment, key):
-                        setattr(db_comment, key, value)
-            else:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_comment = WeiboNoteComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await upsert(session, WeiboNoteComment, comment_items, ["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -168,23 +197,10 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        user_id = int(creator.get("user_id"))
-        creator["user_id"] = user_id
+        creator["user_id"] = int(creator.get("user_id"))
+        creator["add_ts"] = creator["last_modify_ts"] = utils.get_current_timestamp()
         async with get_session() as session:
-            stmt = select(WeiboCreator).where(WeiboCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                db_creator.last_modify_ts = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    if hasattr(db_creator, key):
-                        setattr(db_creator, key, value)
-            else:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                db_creator = WeiboCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await upsert(session, WeiboCreator, [creator], ["user_id"])
 
 
 class WeiboJsonStoreImplement(AbstractStore):
@@ -214,6 +230,28 @@ class WeiboJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Weibo content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -273,6 +311,24 @@ class WeiboMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[WeiboMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of note contents to MongoDB with one bulk write
+        Args:
+            content_items: Note content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="note_id", items=content_items)
+        utils.logger.info(f"[WeiboMongoStoreImplement.store_contents] Saved {len(content_items)} notes to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[WeiboMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store creator information to MongoDB
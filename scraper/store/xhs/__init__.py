@@ -24,6 +24,7 @@
 from typing import List
 
 import config
+from store import store_registry
 from var import source_keyword_var
 
 from .xhs_store_media import *
@@ -36,6 +37,7 @@ class XhsStoreFactory:
         "db": XhsDbStoreImplement,
         "postgres": XhsDbStoreImplement,
         "json": XhsJsonStoreImplement,
+        "jsonl": XhsJsonStoreImplement,
         "sqlite": XhsSqliteStoreImplement,
         "mongodb": XhsMongoStoreImplement,
         "excel": XhsExcelStoreImplement,
@@ -45,9 +47,14 @@ class XhsStoreFactory:
     def create_store() -> AbstractStore:
         store_class = XhsStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[XhsStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("xhs", XhsStoreFactory.create_store)
+
 
 def get_video_url_arr(note_item: Dict) -> List:
     """
@@ -128,7 +135,8 @@ async def update_xhs_note(note_item: Dict):
         "xsec_token": note_item.get("xsec_token"),  # xsec_token
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
-    await XhsStoreFactory.create_store().store_content(local_db_item)
+    store = await XhsStoreFactory.get_store()
+    await store.store_content(local_db_item)
 
 
 async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
@@ -143,8 +151,11 @@ async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_xhs_note_comment(note_id, comment_item)
+    local_db_items = [_to_local_comment_item(note_id, comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.xhs.batch_update_xhs_note_comments] xhs note: {note_id}, comments: {len(local_db_items)}")
+    store = await XhsStoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(local_db_items)
 
 
 async def update_xhs_note_comment(note_id: str, comment_item: Dict):
@@ -157,6 +168,13 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
     Returns:
 
     """
+    local_db_item = _to_local_comment_item(note_id, comment_item)
+    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
+    store = await XhsStoreFactory.get_store()
+    await store.store_comment(local_db_item)
+
+
+def _to_local_comment_item(note_id: str, comment_item: Dict) -> Dict:
     user_info = comment_item.get("user_info", {})
     comment_id = comment_item.get("id")
     comment_pictures = [item.get("url_default", "") for item in comment_item.get("pictures", [])]
@@ -176,8 +194,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),  # Last modification timestamp (Generated by MediaCrawler, mainly used to record the latest update time of a record in DB storage)
         "like_count": comment_item.get("like_count", 0),
     }
-    utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
-    await XhsStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -226,7 +243,8 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),  # Last modification timestamp (Generated by MediaCrawler, mainly used to record the latest update time of a record in DB storage)
     }
     utils.logger.info(f"[store.xhs.save_creator] creator:{local_db_item}")
-    await XhsStoreFactory.create_store().store_creator(local_db_item)
+    store = await XhsStoreFactory.get_store()
+    await store.store_creator(local_db_item)
 
 
 async def update_xhs_note_image(note_id, pic_content, extension_file_name):
@@ -31,6 +31,7 @@ from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuMongoStoreImplement,
                                           ZhihuExcelStoreImplement)
 from tools import utils
+from store import store_registry
 from var import source_keyword_var
 
 
@@ -40,6 +41,7 @@ class ZhihuStoreFactory:
         "db": ZhihuDbStoreImplement,
         "postgres": ZhihuDbStoreImplement,
         "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonStoreImplement,
         "sqlite": ZhihuSqliteStoreImplement,
         "mongodb": ZhihuMongoStoreImplement,
         "excel": ZhihuExcelStoreImplement,
@@ -49,9 +51,14 @@ class ZhihuStoreFactory:
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb or excel ...")
         return store_class()
 
+    @staticmethod
+    async def get_store() -> AbstractStore:
+        """The run's store instance, created and opened on first use"""
+        return await store_registry.get_store("zhihu", ZhihuStoreFactory.create_store)
+
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
     Batch update Zhihu contents
@@ -64,8 +71,10 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     if not contents:
         return
 
-    for content_item in contents:
-        await update_zhihu_content(content_item)
+    local_db_items = [_to_local_content_item(content_item) for content_item in contents]
+    utils.logger.info(f"[store.zhihu.batch_update_zhihu_contents] zhihu contents: {len(local_db_items)}")
+    store = await ZhihuStoreFactory.get_store()
+    await store.store_contents(local_db_items)
 
 async def update_zhihu_content(content_item: ZhihuContent):
     """
@@ -76,11 +85,17 @@ async def update_zhihu_content(content_item: ZhihuContent):
     Returns:
 
     """
+    local_db_item = _to_local_content_item(content_item)
+    utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
+    store = await ZhihuStoreFactory.get_store()
+    await store.store_content(local_db_item)
+
+
+def _to_local_content_item(content_item: ZhihuContent) -> Dict:
     content_item.source_keyword = source_keyword_var.get()
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    return local_db_item
 
 
 
@@ -96,8 +111,11 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     if not comments:
         return
 
-    for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+    local_db_items = [_to_local_comment_item(comment_item) for comment_item in comments]
+    utils.logger.info(f"[store.zhihu.batch_update_zhihu_note_comments] zhihu content comments: {len(local_db_items)}")
+    store = await ZhihuStoreFactory.get_store()
+    # one page of comments is one storage operation
+    await store.store_comments(local_db_items)
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
@@ -109,10 +127,16 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     Returns:
 
     """
+    local_db_item = _to_local_comment_item(comment_item)
+    utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
+    store = await ZhihuStoreFactory.get_store()
+    await store.store_comment(local_db_item)
+
+
+def _to_local_comment_item(comment_item: ZhihuComment) -> Dict:
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -128,4 +152,5 @@ async def save_creator(creator: ZhihuCreator):
         return
     local_db_item = creator.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    await ZhihuStoreFactory.create_store().store_creator(local_db_item)
+    store = await ZhihuStoreFactory.get_store()
+    await store.store_creator(local_db_item)
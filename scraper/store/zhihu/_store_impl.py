@@ -27,15 +27,16 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
 from database.db_session import get_session
+from database.migrations import migrate_unique_keys
+from database.upsert import upsert
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
 from var import crawler_type_var
@@ -84,6 +85,28 @@ class ZhihuCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Zhihu content CSV batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Zhihu comment CSV batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         Zhihu content CSV storage implementation
@@ -97,27 +120,30 @@ class ZhihuCsvStoreImplement(AbstractStore):
 
 
 class ZhihuDbStoreImplement(AbstractStore):
+    async def open(self):
+        await migrate_unique_keys()
+
     async def store_content(self, content_item: Dict):
         """
         Zhihu content DB storage implementation
         Args:
             content_item: content item dict
         """
-        content_id = content_item.get("content_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Zhihu content DB batch storage implementation, one multi-row upsert
+        Args:
+            content_items: content item dicts
+        """
+        if not content_items:
+            return
+        now = utils.get_current_timestamp()
+        for content_item in content_items:
+            content_item.setdefault("add_ts", now)
         async with get_session() as session:
-            stmt = select(ZhihuContent).where(ZhihuContent.content_id == content_id)
-            result = await session.execute(stmt)
-            existing_content = result.scalars().first()
-            if existing_content:
-                for key, value in content_item.items():
-                    if hasattr(existing_content, key):
-                        setattr(existing_content, key, value)
-            else:
-                if "add_ts" not in content_item:
-                    content_item["add_ts"] = utils.get_current_timestamp()
-                new_content = ZhihuContent(**content_item)
-                session.add(new_content)
-            await session.commit()
+            await upsert(session, ZhihuContent, content_items, ["content_id"])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -125,21 +151,21 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Zhihu comment DB batch storage implementation, one multi-row upsert
+        Args:
+            comment_items: comment item dicts
+        """
+        if not comment_items:
+            return
+        now = utils.get_current_timestamp()
+        for comment_item in comment_items:
+            comment_item.setdefault("add_ts", now)
         async with get_session() as session:
-            stmt = select(ZhihuComment).where(ZhihuComment.comment_id == comment_id)
-            result = await session.execute(stmt)
-            existing_comment = result.scalars().first()
-            if existing_comment:
-                for key, value in comment_item.items():
-                    if hasattr(existing_comment, key):
-                        setattr(existing_comment, key, value)
-            else:
-                if "add_ts" not in comment_item:
-                    comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = ZhihuComment(**comment_item)
-                session.add(new_comment)
-            await session.commit()
+            await upsert(session, ZhihuComment, comment_items, ["comment_id"])
 
     async def store_creator(self, creator: Dict):
         """
@@ -147,21 +173,9 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        creator.setdefault("add_ts", utils.get_current_timestamp())
         async with get_session() as session:
-            stmt = select(ZhihuCreator).where(ZhihuCreator.user_id == user_id)
-            result = await session.execute(stmt)
-            existing_creator = result.scalars().first()
-            if existing_creator:
-                for key, value in creator.items():
-                    if hasattr(existing_creator, key):
-                        setattr(existing_creator, key, value)
-            else:
-                if "add_ts" not in creator:
-                    creator["add_ts"] = utils.get_current_timestamp()
-                new_creator = ZhihuCreator(**creator)
-                session.add(new_creator)
-            await session.commit()
+            await upsert(session, ZhihuCreator, [creator], ["user_id"])
 
 
 class ZhihuJsonStoreImplement(AbstractStore):
@@ -191,6 +205,28 @@ class ZhihuJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Zhihu content JSON batch storage implementation, one buffered append per batch
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Zhihu comment JSON batch storage implementation, one buffered append per batch
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         Zhihu content JSON storage implementation
@@ -222,16 +258,16 @@ class ZhihuMongoStoreImplement(AbstractStore):
         Args:
             content_item: Content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
+        content_id = content_item.get("content_id")
+        if not content_id:
             return
 
         await self.mongo_store.save_or_update(
             collection_suffix="contents",
-            query={"note_id": note_id},
+            query={"content_id": content_id},
             data=content_item
         )
-        utils.logger.info(f"[ZhihuMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+        utils.logger.info(f"[ZhihuMongoStoreImplement.store_content] Saved content {content_id} to MongoDB")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -250,6 +286,24 @@ class ZhihuMongoStoreImplement(AbstractStore):
         )
         utils.logger.info(f"[ZhihuMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a batch of content contents to MongoDB with one bulk write
+        Args:
+            content_items: Content content data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="contents", key="content_id", items=content_items)
+        utils.logger.info(f"[ZhihuMongoStoreImplement.store_contents] Saved {len(content_items)} contents to MongoDB")
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a batch of comments to MongoDB with one bulk write
+        Args:
+            comment_items: Comment data
+        """
+        await self.mongo_store.save_or_update_many(collection_suffix="comments", key="comment_id", items=comment_items)
+        utils.logger.info(f"[ZhihuMongoStoreImplement.store_comments] Saved {len(comment_items)} comments to MongoDB")
+
     async def store_creator(self, creator_item: Dict):
         """
         Store creator information to MongoDB
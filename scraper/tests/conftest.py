@@ -29,6 +29,58 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    """Run client code without request pacing, rate limiter tests build their own limiter"""
+    from tools.rate_limiter import reset_rate_limiter
+
+    monkeypatch.setattr("config.CRAWLER_RATE_LIMITS", {"default": {}})
+    reset_rate_limiter()
+    yield
+    reset_rate_limiter()
+
+
+@pytest.fixture(autouse=True)
+def fresh_concurrency_limiters():
+    """Adaptive concurrency limiters are process wide, do not let learned limits leak between tests"""
+    from tools.adaptive_concurrency import reset_concurrency_limiters
+
+    reset_concurrency_limiters()
+    yield
+    reset_concurrency_limiters()
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_in_tmp_path(monkeypatch, tmp_path):
+    """Crawls under test write their checkpoints into the test's temp dir"""
+    from tools.checkpoint import reset_checkpoint
+
+    monkeypatch.setattr("config.CRAWLER_CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    reset_checkpoint()
+    yield
+    reset_checkpoint()
+
+
+@pytest.fixture(autouse=True)
+def fresh_record_writers():
+    """Buffered file writers are process wide, do not let them or their buffers leak between tests"""
+    from tools.buffered_writer import reset_record_writers
+
+    reset_record_writers()
+    yield
+    reset_record_writers()
+
+
+@pytest.fixture(autouse=True)
+def fresh_stores():
+    """Store instances live for a run, each test gets its own"""
+    from store.store_registry import reset_stores
+
+    reset_stores()
+    yield
+    reset_stores()
+
+
 @pytest.fixture(scope="session")
 def project_root_path():
     """Return project root path"""
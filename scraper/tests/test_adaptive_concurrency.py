@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the AIMD adaptive concurrency limiter
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+import config
+from media_platform.xhs.exception import DataFetchError, IPBlockError, NoteNotFoundError
+from tools.adaptive_concurrency import (
+    AdaptiveConcurrencyLimiter,
+    concurrency_metrics,
+    get_concurrency_limiter,
+    observe_request_errors,
+    report_response,
+)
+from tools.http_transport import HttpTransport
+
+
+class TestAdaptiveConcurrencyLimiter:
+    @pytest.mark.asyncio
+    async def test_limit_caps_running_tasks(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=2, max_limit=2)
+        running, peak = 0, 0
+
+        async def task():
+            nonlocal running, peak
+            async with limiter:
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[task() for _ in range(8)])
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+    def test_additive_increase_per_healthy_round(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=2, max_limit=4, latency_window=100)
+        for _ in range(2):
+            limiter.on_latency(0.1)
+        assert limiter.limit == 3
+        for _ in range(3):
+            limiter.on_latency(0.1)
+        assert limiter.limit == 4
+        for _ in range(10):
+            limiter.on_latency(0.1)
+        assert limiter.limit == 4
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=8, cooldown=60)
+        limiter.on_backoff("IPBlockError")
+        assert limiter.limit == 4
+        limiter.on_backoff("IPBlockError")  # same burst, ignored
+        assert limiter.limit == 4
+
+    def test_rising_p95_cuts_the_limit(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=8, max_limit=8, latency_window=10, latency_tolerance=2.0)
+        for _ in range(10):
+            limiter.on_latency(0.1)
+        assert limiter.limit == 8
+        for _ in range(10):
+            limiter.on_latency(0.5)
+        assert limiter.limit == 4
+        assert limiter.snapshot()["p95"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_waiters_wake_when_limit_grows(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=1, max_limit=2, latency_window=100)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        limiter.on_latency(0.1)  # one healthy round at limit 1 -> limit 2
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 2
+
+
+class TestFeedback:
+    @pytest.mark.asyncio
+    async def test_request_errors_reach_the_limiter_of_the_task(self):
+        limiter = AdaptiveConcurrencyLimiter("test", initial=4, cooldown=0)
+
+        @observe_request_errors
+        async def request(error):
+            raise error
+
+        async with limiter:
+            with pytest.raises(NoteNotFoundError):
+                await request(NoteNotFoundError("gone"))
+            assert limiter.limit == 4  # not a block signal
+            with pytest.raises(DataFetchError):
+                await request(DataFetchError("fail"))
+            assert limiter.limit == 2
+        with pytest.raises(IPBlockError):
+            async with limiter:
+                raise IPBlockError("blocked")
+        assert limiter.limit == 1
+
+    @pytest.mark.asyncio
+    async def test_transport_reports_captcha_status(self):
+        def handler(request):
+            return httpx.Response(461 if request.url.path == "/captcha" else 200)
+
+        transport = HttpTransport(transport=httpx.MockTransport(handler))
+        limiter = AdaptiveConcurrencyLimiter("test", initial=4, latency_window=100)
+        async with limiter:
+            await transport.get("https://example.com/ok")
+            await transport.get("https://example.com/captcha")
+        await transport.aclose()
+        assert limiter.limit == 2
+
+    def test_reports_outside_a_slot_are_ignored(self):
+        report_response(10.0, 461)
+
+    def test_registry_and_metrics(self, monkeypatch):
+        monkeypatch.setattr(config, "MAX_CONCURRENCY_NUM", 3)
+        monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY_MAX", 6)
+        limiter = get_concurrency_limiter("xhs", "detail")
+        assert limiter is get_concurrency_limiter("xhs", "detail")
+        assert (limiter.limit, limiter.max_limit) == (3, 6)
+        assert concurrency_metrics()["xhs.detail"]["limit"] == 3
+
+    def test_disabled_is_static(self, monkeypatch):
+        monkeypatch.setattr(config, "ADAPTIVE_CONCURRENCY_ENABLED", False)
+        monkeypatch.setattr(config, "MAX_CONCURRENCY_NUM", 3)
+        limiter = get_concurrency_limiter("dy", "comments")
+        limiter.on_backoff("IPBlockError")
+        for _ in range(20):
+            limiter.on_latency(0.1)
+        assert limiter.limit == 3
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_batch_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Tests for the batch store API: one page of comments is one storage operation
+"""
+
+import json
+
+import openpyxl
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from base.base_crawler import AbstractStore
+from database import db_session, migrations
+from database.models import Base, XhsNoteComment
+from store.douyin import DouyinStoreFactory, batch_update_dy_aweme_comments
+from store.excel_store_base import ExcelStoreBase
+from store.xhs import XhsStoreFactory, batch_update_xhs_note_comments
+from store.xhs._store_impl import XhsDbStoreImplement, XhsJsonStoreImplement
+from tools.buffered_writer import get_record_writer
+from var import crawler_type_var
+
+
+class RecordingStore(AbstractStore):
+    def __init__(self):
+        self.single_calls = 0
+        self.comment_batches = []
+
+    async def store_content(self, content_item):
+        self.single_calls += 1
+
+    async def store_comment(self, comment_item):
+        self.single_calls += 1
+
+    async def store_comments(self, comment_items):
+        self.comment_batches.append(comment_items)
+
+    async def store_creator(self, creator):
+        pass
+
+
+@pytest.fixture
+def search_crawler():
+    token = crawler_type_var.set("search")
+    yield
+    crawler_type_var.reset(token)
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setitem(db_session._engines, "sqlite", engine)
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "sqlite")
+    monkeypatch.setattr(migrations, "_migrated", set())
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_xhs_comment_page_is_one_store_call(monkeypatch):
+    store = RecordingStore()
+    monkeypatch.setattr(XhsStoreFactory, "create_store", staticmethod(lambda: store))
+    comments = [{"id": f"c{i}", "content": f"comment {i}", "user_info": {"user_id": "u"}} for i in range(20)]
+
+    await batch_update_xhs_note_comments("note", comments)
+
+    assert store.single_calls == 0
+    assert len(store.comment_batches) == 1
+    assert [item["comment_id"] for item in store.comment_batches[0]] == [f"c{i}" for i in range(20)]
+    assert {item["note_id"] for item in store.comment_batches[0]} == {"note"}
+
+
+@pytest.mark.asyncio
+async def test_douyin_comment_page_skips_comments_of_other_awemes(monkeypatch):
+    store = RecordingStore()
+    monkeypatch.setattr(DouyinStoreFactory, "create_store", staticmethod(lambda: store))
+    comments = [{"aweme_id": "a1", "cid": "1", "text": "ok"}, {"aweme_id": "a2", "cid": "2", "text": "other"}]
+
+    await batch_update_dy_aweme_comments("a1", comments)
+
+    assert store.single_calls == 0
+    assert [[item["comment_id"] for item in batch] for batch in store.comment_batches] == [["1"]]
+
+
+@pytest.mark.asyncio
+async def test_file_store_batch_is_one_buffered_append(monkeypatch, tmp_path, search_crawler):
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "jsonl")
+    monkeypatch.setattr("config.SAVE_DATA_PATH", str(tmp_path))
+    store = XhsJsonStoreImplement()
+    writer = get_record_writer("xhs", "search", "comments", "jsonl")
+    writer.flush_records = 10
+
+    await store.store_comments([{"comment_id": str(i)} for i in range(25)])
+    assert writer.flushes == 1
+    await writer.close()
+
+    with open(writer.file_path(), encoding="utf-8") as f:
+        assert [json.loads(line)["comment_id"] for line in f] == [str(i) for i in range(25)]
+
+
+@pytest.mark.asyncio
+async def test_sql_store_batch_is_one_statement(sqlite_engine):
+    statements = []
+    event.listen(
+        sqlite_engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    store = XhsDbStoreImplement()
+    comments = [{"comment_id": f"c{i % 30}", "note_id": "n", "like_count": i} for i in range(40)]
+
+    await store.store_comments(comments)
+
+    assert sum(statement.startswith("INSERT") for statement in statements) == 1
+    async with sqlite_engine.connect() as conn:
+        rows = (await conn.execute(select(XhsNoteComment.__table__))).mappings().all()
+    likes = {row["comment_id"]: row["like_count"] for row in rows}
+    assert len(likes) == 30
+    assert likes["c0"] == "30"
+
+
+@pytest.mark.asyncio
+async def test_excel_store_batch_appends_rows_after_header(monkeypatch, tmp_path):
+    monkeypatch.setattr("config.SAVE_DATA_PATH", str(tmp_path))
+    ExcelStoreBase._instances.clear()
+    store = ExcelStoreBase(platform="xhs", crawler_type="search")
+
+    await store.store_comment({"comment_id": "c0", "content": "first"})
+    await store.store_comments([{"comment_id": f"c{i}", "content": f"text {i}"} for i in range(1, 4)])
+    store.flush()
+
+    sheet = openpyxl.load_workbook(store.filename)["Comments"]
+    assert [row for row in sheet.iter_rows(values_only=True)] == [
+        ("comment_id", "content"),
+        ("c0", "first"),
+        ("c1", "text 1"),
+        ("c2", "text 2"),
+        ("c3", "text 3"),
+    ]
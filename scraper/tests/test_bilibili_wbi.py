@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for Bilibili wbi signing and the wbi key cache
+"""
+
+import asyncio
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+from media_platform.bilibili.client import BilibiliClient
+from media_platform.bilibili.help import MIXIN_KEY_ENC_TAB, BilibiliSign, WbiKeyManager
+from tools.http_transport import HttpTransport
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class FakeBiliPage:
+    def __init__(self):
+        self.evaluations = 0
+
+    async def evaluate(self, expression, arg=None):
+        self.evaluations += 1
+        await asyncio.sleep(0.01)
+        return {
+            "wbi_img_urls": f"https://i0.hdslb.com/bfs/wbi/{IMG_KEY}.png-https://i0.hdslb.com/bfs/wbi/{SUB_KEY}.png"
+        }
+
+
+class TestBilibiliSign:
+    def test_salt_matches_mixin_key_table(self):
+        mixin_key = IMG_KEY + SUB_KEY
+        expected = "".join(mixin_key[i] for i in MIXIN_KEY_ENC_TAB)[:32]
+        signer = BilibiliSign(IMG_KEY, SUB_KEY)
+        assert signer.salt == expected == "ea1db124af3c7062474693fa704f4ff8"
+
+    def test_sign_adds_wts_and_w_rid(self):
+        signed = BilibiliSign(IMG_KEY, SUB_KEY).sign({"foo": "one one four", "bar": "五一四", "baz": 1919810})
+        assert set(signed) == {"foo", "bar", "baz", "wts", "w_rid"}
+        assert len(signed["w_rid"]) == 32
+
+
+class TestWbiKeyManager:
+    @pytest.mark.asyncio
+    async def test_keys_cached_and_refresh_single_flight(self):
+        """Concurrent callers share one fetch, later callers hit the cache"""
+        fetches = []
+
+        async def fetch_keys(force):
+            fetches.append(force)
+            await asyncio.sleep(0.01)
+            return IMG_KEY, SUB_KEY
+
+        manager = WbiKeyManager(fetch_keys, ttl=60)
+        signers = await asyncio.gather(*[manager.get_signer() for _ in range(10)])
+        assert len(fetches) == 1
+        assert all(signer is signers[0] for signer in signers)
+        assert await manager.get_keys() == (IMG_KEY, SUB_KEY)
+        assert len(fetches) == 1
+
+        manager.invalidate()
+        await manager.get_signer()
+        manager.invalidate(force=True)
+        await manager.get_signer()
+        await manager.get_signer()
+        assert fetches == [False, False, True]
+
+    @pytest.mark.asyncio
+    async def test_expired_keys_are_refetched(self):
+        fetches = []
+
+        async def fetch_keys(force):
+            fetches.append(1)
+            return IMG_KEY, SUB_KEY
+
+        manager = WbiKeyManager(fetch_keys, ttl=0)
+        await manager.get_signer()
+        await manager.get_signer()
+        assert len(fetches) == 2
+
+
+class TestBilibiliClientWbi:
+    @pytest.mark.asyncio
+    async def test_rejected_sign_refreshes_keys_and_retries(self):
+        """A -403 response makes the client fetch new keys from the nav api and sign the request again"""
+        fresh_img_key, fresh_sub_key = "a" * 32, "b" * 32
+        responses = iter([{"code": -403, "message": "访问权限不足"}, {"code": 0, "data": {"ok": 1}}])
+        nav = {"code": 0, "data": {"wbi_img": {
+            "img_url": f"https://i0.hdslb.com/bfs/wbi/{fresh_img_key}.png",
+            "sub_url": f"https://i0.hdslb.com/bfs/wbi/{fresh_sub_key}.png",
+        }}}
+        signed_queries = []
+        nav_requests = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/x/web-interface/nav":
+                nav_requests.append(1)
+                return httpx.Response(200, json=nav)
+            signed_queries.append(parse_qs(urlparse(str(request.url)).query))
+            return httpx.Response(200, json=next(responses))
+
+        page = FakeBiliPage()
+        client = BilibiliClient(headers={}, playwright_page=page, cookie_dict={})
+        client.transport = HttpTransport(transport=httpx.MockTransport(handler))
+        # a nav response from before the rejection is memoized, the forced refresh must not reuse it
+        await client.request("GET", "https://api.bilibili.com/x/web-interface/nav")
+
+        assert await client.get("/x/web-interface/wbi/search/type", {"keyword": "上海"}) == {"ok": 1}
+        assert len(signed_queries) == 2
+        assert all("w_rid" in query for query in signed_queries)
+        # the stale keys came from localStorage, the new ones from the nav api
+        assert page.evaluations == 1 and len(nav_requests) == 2
+        assert await client.get_wbi_keys() == (fresh_img_key, fresh_sub_key)
+
+        # the refreshed keys are cached for the following requests
+        responses = iter([{"code": 0, "data": {}}])
+        await client.get("/x/web-interface/wbi/search/type", {"keyword": "上海"})
+        assert page.evaluations == 1 and len(nav_requests) == 2
+        await client.transport.aclose()
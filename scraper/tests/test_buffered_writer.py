@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the process wide buffered record writers
+"""
+
+import asyncio
+import csv
+import json
+
+import pytest
+
+from tools.async_file_writer import AsyncFileWriter
+from tools.buffered_writer import close_record_writers, get_record_writer
+from tools.checkpoint import CrawlCheckpoint
+from tools.utils import utils
+
+
+@pytest.fixture
+def data_path(monkeypatch, tmp_path):
+    monkeypatch.setattr("config.SAVE_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr("config.ENABLE_GET_WORDCLOUD", False)
+    monkeypatch.setattr("config.SAVE_BUFFER_FLUSH_RECORDS", 10)
+    monkeypatch.setattr("config.SAVE_BUFFER_FLUSH_INTERVAL_SEC", 0)
+    return tmp_path
+
+
+def _file(data_path, file_format, item_type="comments"):
+    return data_path / "xhs" / file_format / f"search_{item_type}_{utils.get_current_date()}.{file_format}"
+
+
+class TestBufferedRecordWriter:
+    @pytest.mark.asyncio
+    async def test_concurrent_stores_share_one_writer_and_lose_nothing(self, data_path):
+        # every store instance builds its own AsyncFileWriter, they must still share the file's writer
+        async def store(i):
+            writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=False)
+            await asyncio.sleep(0)
+            await writer.write_single_item_to_json({"comment_id": i}, "comments")
+
+        await asyncio.gather(*[store(i) for i in range(95)])
+        writer = get_record_writer("xhs", "search", "comments", "json")
+        assert writer.flushes == 9 and len(writer.buffer) == 5
+
+        await close_record_writers()
+        with open(_file(data_path, "json"), encoding="utf-8") as f:
+            assert sorted(item["comment_id"] for item in json.load(f)) == list(range(95))
+
+    @pytest.mark.asyncio
+    async def test_csv_header_is_written_once_across_batches(self, data_path):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search")
+        for i in range(25):
+            await writer.write_to_csv({"comment_id": str(i), "content": "内容"}, "comments")
+        await close_record_writers()
+
+        with open(_file(data_path, "csv"), encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["comment_id"] for row in rows] == [str(i) for i in range(25)]
+
+    @pytest.mark.asyncio
+    async def test_interval_flush(self, data_path):
+        writer = get_record_writer("xhs", "search", "contents", "jsonl")
+        writer.flush_interval = 0.02
+        await writer.write({"note_id": "1"})
+        assert not _file(data_path, "jsonl", "contents").exists()
+
+        await asyncio.sleep(0.05)
+        assert _file(data_path, "jsonl", "contents").read_text(encoding="utf-8") == '{"note_id": "1"}\n'
+        await close_record_writers()
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_waits_for_buffered_records_instead_of_flushing(self, data_path, tmp_path):
+        writer = get_record_writer("xhs", "search", "comments", "jsonl")
+        await writer.write({"comment_id": "1"})
+        checkpoint_path = tmp_path / "checkpoint.json"
+        checkpoint = CrawlCheckpoint(str(checkpoint_path))
+        checkpoint.finish_comments("note")
+        save = asyncio.create_task(checkpoint.flush())
+        await asyncio.sleep(0.05)
+        # the checkpoint does not claim a record that is still buffered, nor flushes it
+        assert writer.flushes == 0 and not checkpoint_path.exists()
+
+        await writer.flush()
+        await save
+        assert _file(data_path, "jsonl").read_text(encoding="utf-8") == '{"comment_id": "1"}\n'
+        assert CrawlCheckpoint.load(str(checkpoint_path)).comments("note")["done"]
+        await close_record_writers()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for crash-resumable crawl checkpoints
+"""
+
+import asyncio
+import os
+
+import pytest
+
+import config
+from media_platform.xhs.core import XiaoHongShuCrawler
+from tools.checkpoint import CrawlCheckpoint, close_checkpoint
+
+
+def test_checkpoint_roundtrip_and_completion(tmp_path):
+    path = str(tmp_path / "xhs_search.json")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.save_search_page("上海美食", 3, "sid", {"n1": {"id": "n1"}})
+    checkpoint.save_comment_cursor("n1", "cursor-2", 20)
+    assert not os.path.exists(f"{path}.tmp")
+
+    loaded = CrawlCheckpoint.load(path)
+    assert loaded.keyword("上海美食") == {"next_page": 3, "search_id": "sid", "pending": {"n1": {"id": "n1"}}, "done": False}
+    assert loaded.comments("n1") == {"cursor": "cursor-2", "count": 20, "done": False}
+
+    loaded.finish_note("上海美食", "n1")
+    loaded.finish_keyword("上海美食")
+    loaded.finish_comments("n1")
+    assert not loaded.unfinished()
+    assert CrawlCheckpoint.load(path).comments("n1")["done"]
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_keeps_unfinished_work_and_drops_a_finished_run(tmp_path):
+    path = str(tmp_path / "xhs_search.json")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.save_comment_cursor("n1", "cursor-2", 20)
+    await checkpoint.complete()  # unfinished work stays on disk
+    assert CrawlCheckpoint.load(path).comments("n1")["cursor"] == "cursor-2"
+
+    checkpoint.finish_comments("n1")
+    await checkpoint.complete()
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_coalesces_saves_and_prunes_finished_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CRAWLER_CHECKPOINT_SAVE_INTERVAL_SEC", 0.05)
+    path = str(tmp_path / "xhs_creator.json")
+    checkpoint = CrawlCheckpoint(path)
+    writes = []
+    write = checkpoint._write
+    monkeypatch.setattr(checkpoint, "_write", lambda data: (writes.append(data), write(data)))
+
+    for page in range(50):
+        checkpoint.save_comment_cursor(f"n{page}", f"cursor-{page}", 10)
+        checkpoint.finish_comments(f"n{page}")
+    checkpoint.save_creator_page("u1", "c1", [{"note_id": "n0", "xsec_token": "t"}])
+    checkpoint.complete_creator("u1")
+    assert not os.path.exists(path)  # nothing written on the event loop yet
+
+    await asyncio.sleep(0.2)
+    assert len(writes) == 1
+    loaded = CrawlCheckpoint.load(path)
+    assert loaded.state["comments"] == {} and loaded.state["creators"] == {}
+    assert loaded.comments("n7")["done"] and loaded.creator("u1")["done"]
+    assert not loaded.unfinished()
+
+
+class FlakyXhsClient:
+    def __init__(self, pages, fail_page=None):
+        self.pages = pages
+        self.fail_page = fail_page
+        self.search_calls = []
+        self.detail_calls = []
+
+    async def get_note_by_keyword(self, keyword, search_id, page, sort, note_type):
+        self.search_calls.append((page, search_id))
+        if page == self.fail_page:
+            raise RuntimeError("process killed")
+        items = self.pages[page - 1] if page <= len(self.pages) else []
+        return {"has_more": bool(items), "items": items}
+
+    async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+        self.detail_calls.append(note_id)
+        return {"note_id": note_id}
+
+
+@pytest.mark.asyncio
+async def test_xhs_search_resumes_after_the_last_finished_page(monkeypatch):
+    async def update_xhs_note(note_item):
+        pass
+
+    monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+    monkeypatch.setattr(config, "PLATFORM", "xhs")
+    monkeypatch.setattr(config, "CRAWLER_TYPE", "search")
+    monkeypatch.setattr(config, "KEYWORDS", "上海美食")
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 60)
+    monkeypatch.setattr(config, "START_PAGE", 1)
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+    pages = [[{"id": f"p{page}-{i}"} for i in range(2)] for page in (1, 2, 3)]
+
+    crawler = XiaoHongShuCrawler()
+    crawler.xhs_client = FlakyXhsClient(pages, fail_page=2)
+    await crawler.search()
+    first_search_id = crawler.xhs_client.search_calls[0][1]
+
+    # next run with --resume, the interrupted run's shutdown wrote what was pending
+    await close_checkpoint()
+    monkeypatch.setattr(config, "CRAWLER_RESUME", True)
+    crawler.xhs_client = FlakyXhsClient(pages)
+    await crawler.search()
+    assert crawler.xhs_client.search_calls == [(2, first_search_id), (3, first_search_id)]
+    assert sorted(crawler.xhs_client.detail_calls) == ["p2-0", "p2-1", "p3-0", "p3-1"]
+
+
+@pytest.mark.asyncio
+async def test_xhs_failed_note_detail_stays_pending_for_resume(monkeypatch):
+    from media_platform.xhs.exception import DataFetchError, NoteNotFoundError
+    from tools.checkpoint import checkpoint_path
+
+    class DetailErrorClient(FlakyXhsClient):
+        async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+            self.detail_calls.append(note_id)
+            if note_id == "blocked":
+                raise DataFetchError("461")
+            if note_id == "deleted":
+                raise NoteNotFoundError("gone")
+            return {"note_id": note_id}
+
+    async def update_xhs_note(note_item):
+        pass
+
+    monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+    monkeypatch.setattr(config, "PLATFORM", "xhs")
+    monkeypatch.setattr(config, "CRAWLER_TYPE", "search")
+    monkeypatch.setattr(config, "KEYWORDS", "上海美食")
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 20)
+    monkeypatch.setattr(config, "START_PAGE", 1)
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+
+    crawler = XiaoHongShuCrawler()
+    crawler.xhs_client = DetailErrorClient([[{"id": note_id} for note_id in ("ok", "blocked", "deleted")]])
+    await crawler.search()
+    await close_checkpoint()
+
+    pending = CrawlCheckpoint.load(checkpoint_path("xhs", "search")).keyword("上海美食")["pending"]
+    assert list(pending) == ["blocked"]
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for bounded sub-comment thread expansion
+"""
+
+import asyncio
+
+import pytest
+
+from tools.comment_fanout import expand_comment_threads
+
+
+class TestExpandCommentThreads:
+    @pytest.mark.asyncio
+    async def test_threads_are_capped_and_keep_their_order(self):
+        running, peak, callbacks = 0, 0, []
+
+        async def expand_thread(root):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            thread = []
+            for page in range(3):
+                await asyncio.sleep(0.01 * (3 - root))
+                callbacks.append((root, page))
+                thread.append(f"{root}-{page}")
+            running -= 1
+            return thread
+
+        result = await expand_comment_threads([0, 1, 2, 3, 4], expand_thread, max_in_flight=2)
+
+        assert peak == 2
+        assert result == [f"{root}-{page}" for root in range(5) for page in range(3)]
+        for root in range(5):
+            assert [page for r, page in callbacks if r == root] == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_empty_threads_are_skipped(self):
+        async def expand_thread(root):
+            return None if root == "none" else [root]
+
+        assert await expand_comment_threads(["a", "none", "b"], expand_thread) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_failing_thread_cancels_the_others(self):
+        cancelled = []
+
+        async def expand_thread(root):
+            if root == "bad":
+                await asyncio.sleep(0.01)
+                raise RuntimeError("boom")
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(root)
+                raise
+
+        with pytest.raises(RuntimeError):
+            await expand_comment_threads(["a", "bad", "b"], expand_thread, max_in_flight=3)
+        assert sorted(cancelled) == ["a", "b"]
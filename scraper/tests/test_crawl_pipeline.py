@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the staged crawl pipeline and the Xiaohongshu streaming search
+"""
+
+import asyncio
+import time
+
+import pytest
+
+import config
+from media_platform.xhs.core import XiaoHongShuCrawler
+from tools.crawl_pipeline import CrawlPipeline
+from var import source_keyword_var
+
+
+class TestCrawlPipeline:
+    @pytest.mark.asyncio
+    async def test_results_flow_to_every_downstream_stage(self):
+        stored, downloaded = [], []
+
+        async def detail(item):
+            return None if item == 3 else item * 10  # None results are dropped
+
+        async def store(item):
+            stored.append(item)
+
+        async def media(item):
+            downloaded.append(item)
+
+        pipeline = CrawlPipeline("test")
+        detail_stage = pipeline.stage("detail", detail, concurrency=3, maxsize=2)
+        detail_stage.then(pipeline.stage("store", store), pipeline.stage("media", media, concurrency=2))
+        async with pipeline:
+            for i in range(6):
+                await detail_stage.put(i)
+        assert sorted(stored) == [0, 10, 20, 40, 50]
+        assert sorted(downloaded) == sorted(stored)
+
+    @pytest.mark.asyncio
+    async def test_stages_overlap_instead_of_summing(self):
+        """Wall time follows the slowest stage, not the sum of stages"""
+
+        async def slow_a(item):
+            await asyncio.sleep(0.05)
+            return item
+
+        async def slow_b(item):
+            await asyncio.sleep(0.05)
+
+        pipeline = CrawlPipeline("test")
+        stage_a = pipeline.stage("a", slow_a, concurrency=1)
+        stage_a.then(pipeline.stage("b", slow_b, concurrency=1))
+        start = time.perf_counter()
+        async with pipeline:
+            for i in range(6):
+                await stage_a.put(i)
+        # a barrier per item would take 12 * 0.05s, a pipeline about 7 * 0.05s
+        assert time.perf_counter() - start < 0.5
+
+    @pytest.mark.asyncio
+    async def test_failures_are_counted_and_context_is_kept(self):
+        seen_keywords = []
+
+        async def handler(item):
+            seen_keywords.append(source_keyword_var.get())
+            if item == "bad":
+                raise ValueError(item)
+
+        source_keyword_var.set("上海探店")
+        pipeline = CrawlPipeline("test")
+        stage = pipeline.stage("only", handler, concurrency=2)
+        async with pipeline:
+            for item in ["ok", "bad", "ok"]:
+                await stage.put(item)
+        assert (stage.processed, stage.failed) == (2, 1)
+        assert seen_keywords == ["上海探店"] * 3
+
+
+class FakeXhsClient:
+    def __init__(self, pages):
+        self.pages = pages
+        self.detail_calls = []
+
+    async def get_note_by_keyword(self, keyword, search_id, page, sort, note_type):
+        items = self.pages[page - 1] if page <= len(self.pages) else []
+        return {"has_more": bool(items), "items": items}
+
+    async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+        self.detail_calls.append(note_id)
+        await asyncio.sleep(0.01)
+        return {"note_id": note_id}
+
+
+class TestXhsStreamingSearch:
+    @pytest.mark.asyncio
+    async def test_search_streams_details_into_store(self, monkeypatch):
+        stored = []
+
+        async def update_xhs_note(note_item):
+            stored.append((note_item["note_id"], source_keyword_var.get()))
+
+        monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+        monkeypatch.setattr(config, "KEYWORDS", "上海美食")
+        monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 40)
+        monkeypatch.setattr(config, "START_PAGE", 1)
+        monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+        monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+        monkeypatch.setattr(config, "MAX_CONCURRENCY_NUM", 4)
+
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = FakeXhsClient([
+            [{"id": f"p1-{i}"} for i in range(3)] + [{"id": "q", "model_type": "hot_query"}],
+            [{"id": f"p2-{i}"} for i in range(3)],
+        ])
+        await crawler.search()
+        assert sorted(crawler.xhs_client.detail_calls) == [f"p{p}-{i}" for p in (1, 2) for i in range(3)]
+        assert sorted(stored) == [(f"p{p}-{i}", "上海美食") for p in (1, 2) for i in range(3)]
+
+    @pytest.mark.asyncio
+    async def test_keywords_are_crawled_concurrently_and_tagged(self, monkeypatch):
+        stored = []
+
+        async def update_xhs_note(note_item):
+            stored.append((note_item["note_id"], source_keyword_var.get()))
+
+        monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+        monkeypatch.setattr(config, "KEYWORDS", "上海美食,上海酒吧")
+        monkeypatch.setattr(config, "CRAWLER_KEYWORD_NOTE_QUOTAS", {"上海酒吧": 20})
+        monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 40)
+        monkeypatch.setattr(config, "START_PAGE", 1)
+        monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+        monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = FakeXhsClient([
+            [{"id": f"p1-{i}"} for i in range(2)],
+            [{"id": f"p2-{i}"} for i in range(2)],
+        ])
+        await crawler.search()
+        # 上海酒吧 has a one page quota
+        assert sorted(n for n, k in stored if k == "上海美食") == ["p1-0", "p1-1", "p2-0", "p2-1"]
+        assert sorted(n for n, k in stored if k == "上海酒吧") == ["p1-0", "p1-1"]
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the cached Douyin request param context
+"""
+
+import asyncio
+import urllib.parse
+
+import pytest
+
+from media_platform.douyin.help import DOUYIN_STATIC_PARAMS, DouYinParamContext
+
+
+class FakeDouyinPage:
+    def __init__(self, xmst: str = "ms-token-1"):
+        self.xmst = xmst
+        self.evaluations = 0
+
+    async def evaluate(self, expression, arg=None):
+        self.evaluations += 1
+        await asyncio.sleep(0.01)
+        return {"xmst": self.xmst}
+
+
+class TestDouYinParamContext:
+    @pytest.mark.asyncio
+    async def test_query_matches_full_urlencode(self):
+        """The pre-built query string equals encoding the merged params in one go"""
+        context = DouYinParamContext(FakeDouyinPage(), {}, ttl=60)
+        params = {"aweme_id": "7400000000000000000", "keyword": "上海 咖啡"}
+        query_string = await context.apply(params)
+        assert query_string == urllib.parse.urlencode(params)
+        assert params["msToken"] == "ms-token-1"
+        assert params.keys() >= DOUYIN_STATIC_PARAMS.keys()
+
+    @pytest.mark.asyncio
+    async def test_browser_read_once_within_ttl(self):
+        page = FakeDouyinPage()
+        context = DouYinParamContext(page, {}, ttl=60)
+        await asyncio.gather(*[context.apply({"offset": i}) for i in range(10)])
+        assert page.evaluations == 1
+
+    @pytest.mark.asyncio
+    async def test_invalidate_refreshes_snapshot(self):
+        page = FakeDouyinPage()
+        context = DouYinParamContext(page, {}, ttl=60)
+        await context.apply({"offset": 0})
+        page.xmst = "ms-token-2"
+        context.invalidate({"msToken": "cookie-token"})
+        params = {"offset": 1}
+        await context.apply(params)
+        assert page.evaluations == 2
+        assert params["msToken"] == "ms-token-2"
+
+    @pytest.mark.asyncio
+    async def test_ms_token_falls_back_to_cookie(self):
+        context = DouYinParamContext(FakeDouyinPage(xmst=""), {"msToken": "cookie-token"}, ttl=60)
+        params = {"offset": 0}
+        await context.apply(params)
+        assert params["msToken"] == "cookie-token"
+
+    @pytest.mark.asyncio
+    async def test_common_param_wins_over_caller_param(self):
+        context = DouYinParamContext(FakeDouyinPage(), {}, ttl=60)
+        params = {"count": "10", "aid": "1128"}
+        query_string = await context.apply(params)
+        assert params["aid"] == DOUYIN_STATIC_PARAMS["aid"]
+        assert query_string == urllib.parse.urlencode(params)
+        assert urllib.parse.parse_qs(query_string)["aid"] == [DOUYIN_STATIC_PARAMS["aid"]]
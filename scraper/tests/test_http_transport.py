@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the pooled HttpTransport
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from tools.http_transport import HttpTransport, close_all_transports
+
+
+def _mock_transport(calls):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"ok": 1})
+    return httpx.MockTransport(handler)
+
+
+class TestHttpTransport:
+    """Test cases for HttpTransport"""
+
+    @pytest.mark.asyncio
+    async def test_reuses_single_client(self):
+        """Every request goes through the same pooled client"""
+        calls = []
+        transport = HttpTransport(transport=_mock_transport(calls))
+        await transport.get("https://example.com/a")
+        first_client = transport._client
+        await transport.post("https://example.com/b")
+        assert transport._client is first_client
+        assert len(calls) == 2
+        await transport.aclose()
+
+    @pytest.mark.asyncio
+    async def test_set_proxy_rebuilds_client(self):
+        """Changing the proxy closes the idle client and builds a new one"""
+        transport = HttpTransport(transport=_mock_transport([]))
+        await transport.get("https://example.com/")
+        old_client = transport._client
+        await transport.set_proxy("http://127.0.0.1:8888")
+        assert old_client.is_closed
+        await transport.get("https://example.com/")
+        assert transport._client is not old_client
+        assert transport.proxy == "http://127.0.0.1:8888"
+        await transport.aclose()
+
+    @pytest.mark.asyncio
+    async def test_set_same_proxy_keeps_client(self):
+        """Setting the current proxy again does not drop the pool"""
+        transport = HttpTransport(proxy=None, transport=_mock_transport([]))
+        await transport.get("https://example.com/")
+        client = transport._client
+        await transport.set_proxy(None)
+        assert transport._client is client
+        await transport.aclose()
+
+    @pytest.mark.asyncio
+    async def test_retired_client_closed_after_inflight_request(self):
+        """A client retired mid-request is closed once that request finishes"""
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200)
+
+        transport = HttpTransport(transport=httpx.MockTransport(handler))
+        task = asyncio.create_task(transport.get("https://example.com/slow"))
+        await asyncio.sleep(0)
+        old_client = transport._client
+        await transport.set_proxy("http://127.0.0.1:8888")
+        assert not old_client.is_closed
+        release.set()
+        response = await task
+        assert response.status_code == 200
+        assert old_client.is_closed
+        await transport.aclose()
+
+    @pytest.mark.asyncio
+    async def test_aclose_under_inflight_request_keeps_its_outcome(self):
+        """A request still running when the transport is closed ends with its own result or error"""
+        release = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200)
+
+        transport = HttpTransport(transport=httpx.MockTransport(handler))
+        task = asyncio.create_task(transport.get("https://example.com/slow"))
+        await asyncio.sleep(0)
+        await transport.aclose()
+        release.set()
+        [result] = await asyncio.gather(task, return_exceptions=True)
+        assert not isinstance(result, KeyError)
+        assert transport._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_close_all_transports(self):
+        """close_all_transports closes every live transport"""
+        transport = HttpTransport(transport=_mock_transport([]))
+        await transport.get("https://example.com/")
+        await close_all_transports()
+        with pytest.raises(RuntimeError):
+            await transport.get("https://example.com/")
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the persistent JS sign worker pool
+"""
+
+import asyncio
+import shutil
+
+import pytest
+
+from tools.js_sign_worker import JsSignError, JsSignWorkerPool
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+_SIGN_LIB = """
+const crypto = require('crypto');
+var calls = 0;
+function get_sign(url, ua) {
+    calls += 1;
+    return crypto.createHash('md5').update(url + ua).digest('hex');
+}
+function get_calls() { return calls; }
+function get_pid() { return process.pid; }
+function boom() { throw new Error('bad params'); }
+function crash() { process.exit(1); }
+"""
+
+
+@pytest.fixture
+def sign_lib(tmp_path):
+    path = tmp_path / "sign_lib.js"
+    path.write_text(_SIGN_LIB, encoding="utf-8")
+    return str(path)
+
+
+class TestJsSignWorkerPool:
+    """Test cases for JsSignWorkerPool"""
+
+    @pytest.mark.asyncio
+    async def test_lib_loaded_once_and_calls_pipelined(self, sign_lib):
+        """Many concurrent calls are answered by the same long-lived process"""
+        pool = JsSignWorkerPool(sign_lib, size=1)
+        results = await asyncio.gather(*[pool.call("get_sign", f"/api/{i}", "ua") for i in range(50)])
+        assert len(set(results)) == 50
+        assert await pool.call("get_calls") == 50
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_calls_spread_over_workers(self, sign_lib):
+        pool = JsSignWorkerPool(sign_lib, size=2)
+        pids = await asyncio.gather(*[pool.call("get_pid") for _ in range(4)])
+        assert len(set(pids)) == 2
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_js_error_is_raised(self, sign_lib):
+        pool = JsSignWorkerPool(sign_lib, size=1)
+        with pytest.raises(JsSignError, match="bad params"):
+            await pool.call("boom")
+        # the worker survives a thrown error
+        assert await pool.call("get_sign", "/api", "ua")
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_is_restarted(self, sign_lib):
+        """A crashed worker fails the call once, then gets restarted transparently"""
+        pool = JsSignWorkerPool(sign_lib, size=1)
+        first_pid = await pool.call("get_pid")
+        with pytest.raises(JsSignError):
+            await pool.call("crash")
+        assert await pool.call("get_pid") != first_pid
+        await pool.close()
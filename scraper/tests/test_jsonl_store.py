@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the append-only jsonl store and its compaction into the legacy JSON array
+"""
+
+import json
+
+import pytest
+
+from tools.async_file_writer import AsyncFileWriter
+from tools.buffered_writer import flush_record_writers
+from tools.jsonl_compact import compact_jsonl_file, legacy_json_path
+from tools.utils import utils
+
+
+@pytest.fixture
+def data_path(monkeypatch, tmp_path):
+    monkeypatch.setattr("config.SAVE_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr("config.ENABLE_GET_WORDCLOUD", False)
+    return tmp_path
+
+
+def _items(n):
+    return [{"note_id": str(i), "title": f"笔记 {i}", "tags": ["a", "b"], "user": {"id": i}} for i in range(n)]
+
+
+class TestJsonlStore:
+    @pytest.mark.asyncio
+    async def test_records_are_appended_one_line_each(self, data_path):
+        writer = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True)
+        for item in _items(3):
+            await writer.write_single_item_to_json(item, "contents")
+        await flush_record_writers()
+
+        jsonl_file = data_path / "xhs" / "jsonl" / f"search_contents_{utils.get_current_date()}.jsonl"
+        lines = jsonl_file.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line) for line in lines] == _items(3)
+        assert not (data_path / "xhs" / "json").exists() or not any((data_path / "xhs" / "json").iterdir())
+
+    @pytest.mark.asyncio
+    async def test_compaction_matches_the_legacy_json_file(self, data_path):
+        legacy = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=False)
+        appender = AsyncFileWriter(platform="xhs", crawler_type="detail", json_lines=True)
+        for item in _items(4):
+            await legacy.write_single_item_to_json(item, "comments")
+            await appender.write_single_item_to_json(item, "comments")
+
+        compacted = await appender.compact_jsonl_files()
+
+        date = utils.get_current_date()
+        assert list(compacted.values()) == [4]
+        expected = (data_path / "xhs" / "json" / f"search_comments_{date}.json").read_text(encoding="utf-8")
+        actual = (data_path / "xhs" / "json" / f"detail_comments_{date}.json").read_text(encoding="utf-8")
+        assert actual == expected
+
+    @pytest.mark.asyncio
+    async def test_compaction_keeps_a_json_run_of_the_same_day(self, data_path):
+        json_run = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=False)
+        jsonl_run = AsyncFileWriter(platform="xhs", crawler_type="search", json_lines=True)
+        for item in _items(2):
+            await json_run.write_single_item_to_json(item, "contents")
+        await flush_record_writers()
+        json_file = data_path / "xhs" / "json" / f"search_contents_{utils.get_current_date()}.json"
+        before = json_file.read_text(encoding="utf-8")
+
+        for item in _items(5)[2:]:
+            await jsonl_run.write_single_item_to_json(item, "contents")
+        assert await jsonl_run.compact_jsonl_files() == {}
+        assert json_file.read_text(encoding="utf-8") == before
+
+    def test_recompaction_replaces_an_earlier_compaction(self, tmp_path):
+        jsonl_file = tmp_path / "xhs" / "jsonl" / "search_contents_2025-01-01.jsonl"
+        jsonl_file.parent.mkdir(parents=True)
+        jsonl_file.write_text('{"note_id": "1"}\n', encoding="utf-8")
+        assert compact_jsonl_file(str(jsonl_file)) == 1
+
+        with open(jsonl_file, "a", encoding="utf-8") as f:
+            f.write('{"note_id": "2"}\n')
+        assert compact_jsonl_file(str(jsonl_file)) == 2
+        with open(legacy_json_path(str(jsonl_file)), encoding="utf-8") as f:
+            assert json.load(f) == [{"note_id": "1"}, {"note_id": "2"}]
+
+    def test_torn_and_empty_files(self, tmp_path):
+        jsonl_file = tmp_path / "xhs" / "jsonl" / "search_contents_2025-01-01.jsonl"
+        jsonl_file.parent.mkdir(parents=True)
+        jsonl_file.write_text('{"note_id": "1"}\n\n{"note_id": "2"}\n{"note_id": "3', encoding="utf-8")
+
+        json_file = legacy_json_path(str(jsonl_file))
+        assert json_file == str(tmp_path / "xhs" / "json" / "search_contents_2025-01-01.json")
+        assert compact_jsonl_file(str(jsonl_file)) == 2
+        with open(json_file, encoding="utf-8") as f:
+            assert json.load(f) == [{"note_id": "1"}, {"note_id": "2"}]
+
+        empty_file = jsonl_file.with_name("search_comments_2025-01-01.jsonl")
+        empty_file.write_text("", encoding="utf-8")
+        assert compact_jsonl_file(str(empty_file)) == 0
+        with open(legacy_json_path(str(empty_file)), encoding="utf-8") as f:
+            assert json.load(f) == []
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for concurrent keyword crawling
+"""
+
+import asyncio
+
+import pytest
+
+import config
+from tools.keyword_scheduler import KeywordScheduler, parse_keywords
+from var import source_keyword_var
+
+
+def test_parse_keywords():
+    assert parse_keywords("上海探店, 上海美食,,上海探店,Shanghai") == ["上海探店", "上海美食", "Shanghai"]
+
+
+def test_quota_falls_back_to_max_notes_count(monkeypatch):
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 40)
+    scheduler = KeywordScheduler(["a", "b"], quotas={"a": 100})
+    assert (scheduler.quota("a"), scheduler.quota("b")) == (100, 40)
+
+
+class TestKeywordScheduler:
+    @pytest.mark.asyncio
+    async def test_keywords_run_concurrently_with_their_own_context(self):
+        running, peak, seen = 0, 0, []
+
+        async def crawl(keyword):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            seen.append((keyword, source_keyword_var.get()))
+            running -= 1
+
+        await KeywordScheduler(["a", "b", "c", "d"], concurrency=2).run(crawl)
+        assert peak == 2
+        assert sorted(seen) == [("a", "a"), ("b", "b"), ("c", "c"), ("d", "d")]
+
+    @pytest.mark.asyncio
+    async def test_failing_keyword_does_not_stop_the_others(self):
+        done = []
+
+        async def crawl(keyword):
+            if keyword == "bad":
+                raise RuntimeError("boom")
+            done.append(keyword)
+
+        await KeywordScheduler(["bad", "good"], concurrency=2).run(crawl)
+        assert done == ["good"]
+
+    @pytest.mark.asyncio
+    async def test_deep_keyword_does_not_starve_the_others(self):
+        order = []
+        scheduler = KeywordScheduler(["deep", "short1", "short2"], concurrency=3, page_slots=1)
+        pages = {"deep": 10, "short1": 2, "short2": 2}
+
+        async def crawl(keyword):
+            for _ in range(pages[keyword]):
+                async with scheduler.turn(keyword):
+                    order.append(keyword)
+                    await asyncio.sleep(0.001)
+
+        await scheduler.run(crawl)
+        # the short keywords are done within the first rounds instead of after the deep one
+        assert order.index("short1") < 3 and order.index("short2") < 3
+        assert max(i for i, k in enumerate(order) if k != "deep") < 6
+        assert scheduler.pages_served == pages
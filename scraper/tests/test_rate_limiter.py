@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the token bucket rate limiter
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from tools import rate_limiter
+from tools.rate_limiter import RateLimiter, TokenBucket, classify_endpoint
+
+
+class TestClassifyEndpoint:
+    @pytest.mark.parametrize("url, endpoint", [
+        ("https://edith.xiaohongshu.com/api/sns/web/v1/search/notes", "search"),
+        ("https://edith.xiaohongshu.com/api/sns/web/v2/comment/page?note_id=1", "comments"),
+        ("https://api.bilibili.com/x/v2/reply/wbi/main?oid=1", "comments"),
+        ("https://m.weibo.cn/comments/hotflow?id=1", "comments"),
+        ("https://www.douyin.com/aweme/v1/web/aweme/detail/?aweme_id=1", "detail"),
+        ("https://www.douyin.com/aweme/v1/web/aweme/detail/?keyword=search", "detail"),  # query string is ignored
+        ("visionSearchPhoto", "search"),
+        ("commentListQuery", "comments"),
+    ])
+    def test_classify(self, url, endpoint):
+        assert classify_endpoint(url) == endpoint
+
+
+class TestTokenBucket:
+    @pytest.mark.asyncio
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=2)
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire()
+        # 2 tokens from the burst, the other 2 are refilled at 20/s
+        assert 0.08 <= time.monotonic() - start < 0.3
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_the_rate(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        assert 0.09 <= time.monotonic() - start < 0.3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_its_token(self):
+        bucket = TokenBucket(rate=1, burst=1)
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert bucket._tokens > -1
+
+    @pytest.mark.asyncio
+    async def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        start = time.monotonic()
+        for _ in range(100):
+            await bucket.acquire()
+        assert time.monotonic() - start < 0.05
+
+
+class TestRateLimiter:
+    def test_platform_override_and_default(self):
+        limiter = RateLimiter({
+            "default": {"search": (0.5, 1), "detail": (1.0, 2)},
+            "xhs": {"detail": (0.2, 1)},
+        })
+        assert limiter.bucket("xhs", "detail").rate == 0.2
+        assert limiter.bucket("xhs", "search").rate == 0.5
+        assert limiter.bucket("dy", "detail").rate == 1.0
+        # unknown endpoint classes fall back to the default detail limit
+        assert limiter.bucket("dy", "media").rate == 1.0
+        assert limiter.bucket("xhs", "detail") is limiter.bucket("xhs", "detail")
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_independent(self, monkeypatch):
+        monkeypatch.setattr("config.CRAWLER_RATE_LIMITS", {"default": {"search": (1, 1), "detail": (1, 1)}})
+        rate_limiter.reset_rate_limiter()
+        start = time.monotonic()
+        await rate_limiter.rate_limit("xhs", "search")
+        await rate_limiter.rate_limit("xhs", "detail")
+        await rate_limiter.rate_limit("dy", "search")
+        assert time.monotonic() - start < 0.05
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the incremental crawl seen-content index
+"""
+
+import time
+
+import pytest
+
+import config
+from media_platform.xhs.core import XiaoHongShuCrawler
+from tools.checkpoint import reset_checkpoint
+from tools.seen_index import SeenIndex, close_seen_index, get_seen_index, parse_count
+
+
+def test_parse_count():
+    assert parse_count("1.2万") == 12000
+    assert parse_count("10+") == 10
+    assert parse_count("1,234") == 1234
+    assert parse_count(56) == 56
+    assert parse_count("赞") is None
+
+
+class TestSeenIndex:
+    @pytest.mark.asyncio
+    async def test_changed_policy(self, tmp_path):
+        index = SeenIndex(str(tmp_path / "seen.db"), policy="changed", refresh_interval_hours=24, change_ratio=0.2)
+        assert await index.should_crawl("xhs", "n1", interactions={"liked_count": "100"})
+        await index.record("xhs", "n1", last_update_time=1000, interactions={"liked_count": "100"})
+
+        assert not await index.should_crawl("xhs", "n1", interactions={"liked_count": "110"})
+        assert await index.should_crawl("xhs", "n1", interactions={"liked_count": "1.2万"})
+        assert await index.should_crawl("xhs", "n1", last_update_time=2000)
+        assert (index.crawled, index.skipped) == (3, 1)
+        await index.close()
+
+    @pytest.mark.asyncio
+    async def test_interval_and_never_policies(self, tmp_path, monkeypatch):
+        db_path = str(tmp_path / "seen.db")
+        index = SeenIndex(db_path, policy="interval", refresh_interval_hours=24)
+        await index.record("wb", "m1", interactions={"attitudes_count": 1})
+        assert not await index.should_crawl("wb", "m1", interactions={"attitudes_count": 500})
+
+        # two days later
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 48 * 3600)
+        assert await index.should_crawl("wb", "m1")
+        await index.close()
+
+        never = SeenIndex(db_path, policy="never", refresh_interval_hours=24)
+        assert not await never.should_crawl("wb", "m1")
+        await never.close()
+
+
+class FakeXhsClient:
+    def __init__(self, items):
+        self.items = items
+        self.detail_calls = []
+
+    async def get_note_by_keyword(self, keyword, search_id, page, sort, note_type):
+        return {"has_more": page == 1, "items": self.items if page == 1 else []}
+
+    async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+        self.detail_calls.append(note_id)
+        return {"note_id": note_id, "interact_info": {"liked_count": "10"}}
+
+
+@pytest.mark.asyncio
+async def test_xhs_search_skips_unchanged_notes(tmp_path, monkeypatch):
+    async def update_xhs_note(note_item):
+        pass
+
+    monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+    monkeypatch.setattr(config, "KEYWORDS", "上海美食")
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 20)
+    monkeypatch.setattr(config, "START_PAGE", 1)
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+    monkeypatch.setattr(config, "INCREMENTAL_CRAWL_ENABLED", True)
+    monkeypatch.setattr(config, "INCREMENTAL_INDEX_PATH", str(tmp_path / "seen.db"))
+    monkeypatch.setattr(config, "INCREMENTAL_REFRESH_POLICY", "changed")
+
+    def search_item(note_id, liked_count):
+        return {"id": note_id, "note_card": {"interact_info": {"liked_count": liked_count}}}
+
+    try:
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = FakeXhsClient([search_item("a", "10"), search_item("b", "10")])
+        await crawler.search()
+        assert sorted(crawler.xhs_client.detail_calls) == ["a", "b"]
+
+        # next run: "b" got popular, "a" did not change
+        reset_checkpoint()
+        crawler.xhs_client = FakeXhsClient([search_item("a", "10"), search_item("b", "1万")])
+        await crawler.search()
+        assert crawler.xhs_client.detail_calls == ["b"]
+        assert get_seen_index().skipped == 1
+    finally:
+        await close_seen_index()
+
+
+class TestCommentDelta:
+    @pytest.mark.asyncio
+    async def test_stops_at_known_comments_and_expands_changed_threads(self, monkeypatch):
+        from media_platform.xhs.client import XiaoHongShuClient
+        from tools.seen_index import CommentDelta
+
+        monkeypatch.setattr(config, "ENABLE_GET_SUB_COMMENTS", True)
+
+        def comment(comment_id, create_time, sub_comment_count=0):
+            return {"id": comment_id, "note_id": "n", "create_time": create_time,
+                    "sub_comment_count": str(sub_comment_count), "sub_comment_has_more": sub_comment_count > 0}
+
+        pages = {
+            "": {"comments": [comment("c5", 300), comment("c4", 200, 1)], "cursor": "2", "has_more": True},
+            "2": {"comments": [comment("c2", 90), comment("c1", 80, 3)], "cursor": "3", "has_more": True},
+        }
+        requested, expanded = [], []
+
+        async def get_note_comments(note_id, xsec_token, cursor=""):
+            requested.append(cursor)
+            return pages[cursor]
+
+        async def get_note_sub_comments(**kwargs):
+            expanded.append(kwargs["root_comment_id"])
+            return {"comments": [], "has_more": False}
+
+        client = XiaoHongShuClient.__new__(XiaoHongShuClient)
+        client.get_note_comments = get_note_comments
+        client.get_note_sub_comments = get_note_sub_comments
+        delta = CommentDelta({"c1": 2, "c2": 0}, newest_create_time=100)
+
+        await client.get_note_all_comments("n", "token", max_count=100, delta=delta)
+
+        assert requested == ["", "2"]  # page 2 only has known comments, page 3 is never requested
+        assert sorted(expanded) == ["c1", "c4"]  # c1 got a new reply, c4 is new
+        assert delta.observed_newest_time == 300
+
+    @pytest.mark.asyncio
+    async def test_record_keeps_the_newest_ids(self, tmp_path, monkeypatch):
+        from tools.seen_index import CommentDelta
+
+        monkeypatch.setattr(config, "INCREMENTAL_COMMENT_DELTA_KNOWN_IDS", 3)
+        index = SeenIndex(str(tmp_path / "seen.db"))
+        delta = CommentDelta({"old1": 0, "old2": 1}, newest_create_time=10)
+        delta.observe("new1", 20, "2")
+        delta.observe("new2", 15)
+        await index.record_comments("xhs", "n", delta)
+
+        stored = await index.comment_delta("xhs", "n")
+        assert stored.known == {"new1": 2, "new2": None, "old1": 0}
+        assert stored.newest_create_time == 20
+        await index.close()
+
+
+@pytest.mark.asyncio
+async def test_xhs_note_with_failed_comments_is_not_marked_crawled(tmp_path, monkeypatch):
+    async def update_xhs_note(note_item):
+        pass
+
+    class CaptchaOnCommentsClient(FakeXhsClient):
+        async def get_note_all_comments(self, note_id, **kwargs):
+            if note_id == "a" and self.fail_comments:
+                raise RuntimeError("captcha")
+
+    monkeypatch.setattr("store.xhs.update_xhs_note", update_xhs_note)
+    monkeypatch.setattr(config, "KEYWORDS", "上海美食")
+    monkeypatch.setattr(config, "CRAWLER_MAX_NOTES_COUNT", 20)
+    monkeypatch.setattr(config, "START_PAGE", 1)
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", True)
+    monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+    monkeypatch.setattr(config, "INCREMENTAL_CRAWL_ENABLED", True)
+    monkeypatch.setattr(config, "INCREMENTAL_COMMENT_DELTA", False)
+    monkeypatch.setattr(config, "INCREMENTAL_INDEX_PATH", str(tmp_path / "seen.db"))
+    monkeypatch.setattr(config, "INCREMENTAL_REFRESH_POLICY", "changed")
+
+    items = [{"id": note_id, "note_card": {"interact_info": {"liked_count": "10"}}} for note_id in ("a", "b")]
+    try:
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = CaptchaOnCommentsClient(items)
+        crawler.xhs_client.fail_comments = True
+        await crawler.search()
+
+        # next run: "a" is unchanged but its comments were never crawled
+        reset_checkpoint()
+        crawler.xhs_client = CaptchaOnCommentsClient(items)
+        crawler.xhs_client.fail_comments = False
+        await crawler.search()
+        assert crawler.xhs_client.detail_calls == ["a"]
+    finally:
+        await close_seen_index()
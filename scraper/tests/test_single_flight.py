@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for single-flight request coalescing
+"""
+
+import asyncio
+
+import pytest
+
+from tools.single_flight import SingleFlight, coalesce_requests, request_key
+
+
+class FakeClient:
+    def __init__(self, memo_ttl=0):
+        self.single_flight = SingleFlight(memo_ttl=memo_ttl)
+        self.sent = []
+
+    @coalesce_requests
+    async def request(self, method, url, **kwargs):
+        self.sent.append((method, url, kwargs.get("params")))
+        await asyncio.sleep(0.01)
+        if url == "/fail":
+            raise RuntimeError("boom")
+        return {"url": url, "items": [1, 2]}
+
+
+class TestRequestKey:
+    def test_signature_headers_are_ignored_but_not_params_or_cookie(self):
+        base = request_key("get", "/api", {"params": {"a": 1, "b": 2}, "headers": {"X-s": "1", "Cookie": "c"}})
+        assert base == request_key("GET", "/api", {"params": {"b": 2, "a": 1}, "headers": {"X-s": "2", "Cookie": "c"}})
+        assert base != request_key("GET", "/api", {"params": {"a": 1, "b": 3}, "headers": {"Cookie": "c"}})
+        assert base != request_key("GET", "/api", {"params": {"a": 1, "b": 2}, "headers": {"Cookie": "logged-in"}})
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        client = FakeClient()
+        results = await asyncio.gather(*[client.request("GET", "/note", params={"id": 1}) for _ in range(5)])
+
+        assert len(client.sent) == 1
+        assert client.single_flight.coalesced == 4
+        assert all(result == {"url": "/note", "items": [1, 2]} for result in results)
+        # each caller owns its copy
+        results[0]["items"].append(3)
+        assert results[1]["items"] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_different_requests_are_not_coalesced(self):
+        client = FakeClient()
+        await asyncio.gather(client.request("GET", "/note", params={"id": 1}), client.request("GET", "/note", params={"id": 2}))
+        assert len(client.sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_results_are_memoized_for_the_ttl(self):
+        client = FakeClient(memo_ttl=0.05)
+        await client.request("GET", "/note")
+        await client.request("GET", "/note")
+        assert len(client.sent) == 1 and client.single_flight.memo_hits == 1
+
+        await asyncio.sleep(0.06)
+        await client.request("GET", "/note")
+        assert len(client.sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_memoize_false_skips_the_memoized_result(self):
+        client = FakeClient(memo_ttl=30)
+        await client.request("GET", "/nav")
+        await client.request("GET", "/nav", memoize=False)
+        assert len(client.sent) == 2 and client.single_flight.memo_hits == 0
+        assert "memoize" not in str(client.sent)
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_caller_and_are_not_memoized(self):
+        client = FakeClient(memo_ttl=30)
+        results = await asyncio.gather(*[client.request("GET", "/fail") for _ in range(3)], return_exceptions=True)
+        assert len(client.sent) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        with pytest.raises(RuntimeError):
+            await client.request("GET", "/fail")
+        assert len(client.sent) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_the_shared_call(self):
+        client = FakeClient()
+        first = asyncio.ensure_future(client.request("GET", "/note"))
+        second = asyncio.ensure_future(client.request("GET", "/note"))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == {"url": "/note", "items": [1, 2]}
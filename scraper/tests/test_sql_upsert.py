@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_sql_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Tests for the SQL upserts on the unique natural keys and the unique key migration
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database import db_session, migrations
+from database.models import Base, TiebaNote, XhsNote
+from database.upsert import upsert
+from store.xhs._store_impl import XhsDbStoreImplement
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setitem(db_session._engines, "sqlite", engine)
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "sqlite")
+    monkeypatch.setattr(migrations, "_migrated", set())
+    yield engine
+    await engine.dispose()
+
+
+async def _rows(engine, model):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(model.__table__).order_by(model.__table__.c.id))).mappings().all()
+
+
+@pytest.mark.asyncio
+async def test_upsert_inserts_then_updates_only_update_columns(sqlite_engine):
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    store = XhsDbStoreImplement()
+    note = {"note_id": "n1", "title": "first", "liked_count": "1", "time": 1, "last_update_time": 1}
+
+    await store.store_content(dict(note))
+    first = (await _rows(sqlite_engine, XhsNote))[0]
+    await store.store_content(dict(note, title="changed", liked_count="9"))
+
+    rows = await _rows(sqlite_engine, XhsNote)
+    assert len(rows) == 1
+    assert rows[0]["liked_count"] == "9"
+    # the title is not among the refreshed columns, add_ts is only written on insert
+    assert rows[0]["title"] == "first"
+    assert rows[0]["add_ts"] == first["add_ts"]
+
+
+@pytest.mark.asyncio
+async def test_upsert_batch_with_duplicate_keys_keeps_last_row(sqlite_engine):
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    rows = [{"note_id": str(i % 3), "title": f"t{i}", "not_a_column": i} for i in range(7)]
+
+    async with db_session.get_session() as session:
+        await upsert(session, TiebaNote, rows, ["note_id"])
+
+    stored = {row["note_id"]: row["title"] for row in await _rows(sqlite_engine, TiebaNote)}
+    assert stored == {"0": "t6", "1": "t4", "2": "t5"}
+
+
+@pytest.mark.asyncio
+async def test_migration_dedupes_and_makes_plain_index_unique(sqlite_engine):
+    # tieba_note as created before note_id was unique
+    metadata = MetaData()
+    old_table = Table(
+        "tieba_note", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("note_id", String(64)),
+        Column("title", String(255)),
+        Index("ix_tieba_note_note_id", "note_id"),
+    )
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        await conn.execute(old_table.insert(), [
+            {"note_id": "a", "title": "old"},
+            {"note_id": "b", "title": "only"},
+            {"note_id": "a", "title": "new"},
+            {"note_id": None, "title": "no key"},
+        ])
+
+    migrated = await migrations.migrate_unique_keys("sqlite")
+    assert "ix_tieba_note_note_id" in migrated
+    assert await migrations.migrate_unique_keys("sqlite") == []
+
+    async with sqlite_engine.connect() as conn:
+        titles = (await conn.execute(text("SELECT note_id, title FROM tieba_note ORDER BY id"))).all()
+        indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("tieba_note"))
+    assert [tuple(row) for row in titles] == [("b", "only"), ("a", "new"), (None, "no key")]
+    assert {index["name"]: index["unique"] for index in indexes}["ix_tieba_note_note_id"]
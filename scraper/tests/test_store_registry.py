@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the per-run store instances, including a profile of the per-record store path
+"""
+
+import asyncio
+import cProfile
+import pstats
+
+import pytest
+
+from base.base_crawler import AbstractStore
+from store import store_registry
+from store.xhs import XhsStoreFactory, update_xhs_note_comment
+from store.xhs._store_impl import XhsJsonStoreImplement
+from tools.words import AsyncWordCloudGenerator
+from var import crawler_type_var
+
+
+@pytest.fixture
+def json_store(monkeypatch, tmp_path):
+    monkeypatch.setattr("config.SAVE_DATA_OPTION", "json")
+    monkeypatch.setattr("config.SAVE_DATA_PATH", str(tmp_path))
+    monkeypatch.setattr("config.ENABLE_GET_WORDCLOUD", True)
+    token = crawler_type_var.set("search")
+    yield
+    crawler_type_var.reset(token)
+
+
+def _calls(stats: pstats.Stats, function) -> int:
+    code = function.__code__
+    return sum(
+        primitive_calls
+        for (file_name, line, name), (primitive_calls, *_rest) in stats.stats.items()
+        if (file_name, line, name) == (code.co_filename, code.co_firstlineno, code.co_name)
+    )
+
+
+class RecordingStore(AbstractStore):
+    def __init__(self):
+        self.events = []
+
+    async def open(self):
+        await asyncio.sleep(0.01)
+        self.events.append("open")
+
+    async def close(self):
+        self.events.append("close")
+
+    async def store_content(self, content_item):
+        self.events.append("content")
+
+    async def store_comment(self, comment_item):
+        pass
+
+    async def store_creator(self, creator):
+        pass
+
+
+class TestStoreRegistry:
+    @pytest.mark.asyncio
+    async def test_store_is_created_and_opened_once(self):
+        created = []
+
+        def create_store():
+            created.append(RecordingStore())
+            return created[-1]
+
+        async def record():
+            store = await store_registry.get_store("xhs", create_store)
+            await store.store_content({})
+
+        await asyncio.gather(*[record() for _ in range(5)])
+        assert len(created) == 1
+        assert created[0].events == ["open"] + ["content"] * 5
+
+        await store_registry.close_stores()
+        assert created[0].events[-1] == "close"
+        await store_registry.get_store("xhs", create_store)
+        assert len(created) == 2
+
+    @pytest.mark.asyncio
+    async def test_per_record_constructors_are_gone(self, json_store, sample_xhs_comment):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for i in range(200):
+            await update_xhs_note_comment("note", dict(sample_xhs_comment, id=str(i)))
+        profiler.disable()
+        stats = pstats.Stats(profiler)
+
+        assert _calls(stats, XhsStoreFactory.create_store) == 1
+        assert _calls(stats, XhsJsonStoreImplement.__init__) == 1
+        assert _calls(stats, AsyncWordCloudGenerator.__init__) == 0
+        assert isinstance(await XhsStoreFactory.get_store(), XhsJsonStoreImplement)
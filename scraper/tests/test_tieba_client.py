@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the Baidu Tieba client request layer
+"""
+
+import httpx
+import pytest
+from tenacity import stop_after_attempt
+
+from media_platform.tieba.client import BaiduTieBaClient
+from tools.http_transport import HttpTransport
+
+
+def _client_with_responses(responses, proxy=None):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return responses.pop(0)
+
+    client = BaiduTieBaClient(default_ip_proxy=proxy, headers={"User-Agent": "ua", "Cookie": "BDUSS=1"})
+    client._transports[proxy] = HttpTransport(proxy=proxy, transport=httpx.MockTransport(handler))
+    return client, calls
+
+
+async def _request_once(client: BaiduTieBaClient, method: str, url: str):
+    """Call request without the tenacity retries"""
+    return await client.request.retry_with(stop=stop_after_attempt(1), reraise=True)(client, method, url)
+
+
+class TestBaiduTieBaClientRequest:
+    @pytest.mark.asyncio
+    async def test_session_reused_and_headers_sent(self):
+        client, calls = _client_with_responses([httpx.Response(200, json={"no": 0}) for _ in range(2)])
+        assert await client.request("GET", "https://tieba.baidu.com/a") == {"no": 0}
+        assert await client.request("GET", "https://tieba.baidu.com/b", return_ori_content=True) == '{"no":0}'
+        assert [call.headers["User-Agent"] for call in calls] == ["ua", "ua"]
+        assert list(client._transports) == [None]
+
+    @pytest.mark.asyncio
+    async def test_blocked_response_raises(self):
+        client, _ = _client_with_responses([httpx.Response(200, text="blocked")])
+        with pytest.raises(Exception, match="account blocked"):
+            await _request_once(client, "GET", "https://tieba.baidu.com/")
+
+    @pytest.mark.asyncio
+    async def test_bad_status_raises(self):
+        client, _ = _client_with_responses([httpx.Response(403, text="forbidden")])
+        with pytest.raises(Exception, match="status code: 403"):
+            await _request_once(client, "GET", "https://tieba.baidu.com/")
+
+    @pytest.mark.asyncio
+    async def test_one_session_per_proxy(self):
+        client = BaiduTieBaClient()
+        direct = client._get_transport(None)
+        proxied = client._get_transport("http://127.0.0.1:8888")
+        assert direct is not proxied
+        assert client._get_transport("http://127.0.0.1:8888") is proxied
+        await client._retire_transport("http://127.0.0.1:8888")
+        assert "http://127.0.0.1:8888" not in client._transports
+        await direct.aclose()
+
+
+class FakeApiResponse:
+    def __init__(self, url: str, text: str, status: int = 200):
+        self.url = url
+        self.status = status
+        self.ok = status == 200
+        self._text = text
+
+    async def text(self):
+        return self._text
+
+
+class FakeRequestContext:
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    async def get(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.responses.pop(0)
+
+
+class FakeBrowserContext:
+    def __init__(self, responses):
+        self.request = FakeRequestContext(responses)
+
+
+class FakeTab:
+    def __init__(self):
+        self.visits = []
+
+    def set_default_navigation_timeout(self, timeout):
+        pass
+
+    def on(self, event, callback):
+        pass
+
+    def is_closed(self):
+        return False
+
+    async def goto(self, url, **kwargs):
+        self.visits.append(url)
+
+    async def content(self):
+        return "<html><body>rendered</body></html>"
+
+
+class TestBaiduTieBaClientRenderFree:
+    @pytest.fixture(autouse=True)
+    def _render_free(self, monkeypatch):
+        monkeypatch.setattr("config.TIEBA_RENDER_FREE_FETCH", True)
+
+    def _client(self, responses):
+        tab = FakeTab()
+        client = BaiduTieBaClient(headers={"User-Agent": "ua", "Cookie": "BDUSS=1"}, playwright_page=tab)
+        client.page_pool.browser_context = FakeBrowserContext(responses)
+        return client, tab
+
+    @pytest.mark.asyncio
+    async def test_raw_html_without_navigation(self):
+        url = "https://tieba.baidu.com/p/1"
+        client, tab = self._client([FakeApiResponse(url, "<html><body>raw</body></html>")])
+        assert await client._fetch_page_html(url) == "<html><body>raw</body></html>"
+        assert tab.visits == []
+        _, kwargs = client.page_pool.browser_context.request.calls[0]
+        assert kwargs["headers"] == {"User-Agent": "ua"}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("response", [
+        FakeApiResponse("https://wappass.baidu.com/static/captcha/tuxing.html", "<html>captcha</html>"),
+        FakeApiResponse("https://tieba.baidu.com/p/1", "<html><title>百度安全验证</title></html>"),
+        FakeApiResponse("https://tieba.baidu.com/p/1", "   "),
+        FakeApiResponse("https://tieba.baidu.com/p/1", "error: 1 < 2"),
+        FakeApiResponse("https://tieba.baidu.com/p/1", "", status=403),
+    ])
+    async def test_captcha_or_blank_falls_back_to_tab(self, response):
+        url = "https://tieba.baidu.com/p/1"
+        client, tab = self._client([response])
+        assert await client._fetch_page_html(url) == "<html><body>rendered</body></html>"
+        assert tab.visits == [url]
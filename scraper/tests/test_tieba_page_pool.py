@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the Tieba browser tab pool
+"""
+
+import asyncio
+
+import pytest
+
+from media_platform.tieba.page_pool import TiebaPagePool
+
+
+class FakeTab:
+    """Stand-in for a playwright Page"""
+
+    def __init__(self, name: str, fail_with: str = ""):
+        self.name = name
+        self.fail_with = fail_with
+        self.url = ""
+        self.closed = False
+        self.navigation_timeout = None
+        self.visits = []
+
+    def set_default_navigation_timeout(self, timeout):
+        self.navigation_timeout = timeout
+
+    def on(self, event, callback):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def goto(self, url, **kwargs):
+        if self.fail_with:
+            raise RuntimeError(self.fail_with)
+        await asyncio.sleep(0.05)
+        self.url = url
+        self.visits.append(url)
+
+    async def content(self):
+        return f"<html>{self.url}</html>"
+
+
+class FakeContext:
+    def __init__(self):
+        self.opened = []
+
+    async def new_page(self):
+        tab = FakeTab(f"tab{len(self.opened) + 1}")
+        self.opened.append(tab)
+        return tab
+
+
+class TestTiebaPagePool:
+    @pytest.mark.asyncio
+    async def test_concurrent_fetches_use_separate_tabs(self):
+        """Each tab serves one navigation at a time and the html matches its own url"""
+        context = FakeContext()
+        pool = TiebaPagePool([FakeTab("main")], nav_timeout=5)
+        await pool.grow(context, 3)
+        assert pool.size == 3
+
+        urls = [f"https://tieba.baidu.com/p/{i}" for i in range(6)]
+        htmls = await asyncio.gather(*[pool.fetch_html(url) for url in urls])
+        assert htmls == [f"<html>{url}</html>" for url in urls]
+        assert all(len(tab.visits) == 2 for tab in pool._pages)
+        assert all(tab.navigation_timeout == 5000 for tab in pool._pages)
+
+    @pytest.mark.asyncio
+    async def test_crashed_tab_is_recycled(self):
+        context = FakeContext()
+        broken = FakeTab("broken", fail_with="Target page, context or browser has been closed")
+        pool = TiebaPagePool([broken], browser_context=context)
+        with pytest.raises(RuntimeError):
+            await pool.fetch_html("https://tieba.baidu.com/p/1")
+        assert broken.closed
+        assert pool.size == 1
+        assert await pool.fetch_html("https://tieba.baidu.com/p/2") == "<html>https://tieba.baidu.com/p/2</html>"
+        assert context.opened[0].visits == ["https://tieba.baidu.com/p/2"]
+
+    @pytest.mark.asyncio
+    async def test_ordinary_error_keeps_tab(self):
+        tab = FakeTab("main", fail_with="Timeout 30000ms exceeded")
+        pool = TiebaPagePool([tab])
+        with pytest.raises(RuntimeError):
+            await pool.fetch_html("https://tieba.baidu.com/p/1")
+        assert pool._pages == [tab]
+        assert not tab.closed
+
+    @pytest.mark.asyncio
+    async def test_waiters_fail_when_the_last_tab_cannot_be_replaced(self):
+        class BrokenContext:
+            async def new_page(self):
+                raise RuntimeError("browser has been closed")
+
+        broken = FakeTab("broken", fail_with="Target page, context or browser has been closed")
+        pool = TiebaPagePool([broken], browser_context=BrokenContext())
+        results = await asyncio.wait_for(asyncio.gather(
+            *[pool.fetch_html(f"https://tieba.baidu.com/p/{i}") for i in range(3)], return_exceptions=True
+        ), timeout=1)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert pool.size == 0
+        with pytest.raises(RuntimeError, match="no usable page"):
+            await pool.fetch_html("https://tieba.baidu.com/p/4")
+
+    @pytest.mark.asyncio
+    async def test_close_closes_only_the_tabs_it_opened(self):
+        context = FakeContext()
+        main = FakeTab("main")
+        pool = TiebaPagePool([main])
+        await pool.grow(context, 3)
+        await pool.close()
+        assert all(tab.closed for tab in context.opened) and not main.closed
+        assert pool._pages == [main]
+        assert await pool.fetch_html("https://tieba.baidu.com/p/1") == "<html>https://tieba.baidu.com/p/1</html>"
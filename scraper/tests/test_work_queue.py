@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the Redis backed distributed work queue
+Run against fakeredis when it is installed, otherwise against the local Redis from db_config
+"""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from tools.work_queue import RedisWorkQueue, WorkQueueWorker
+
+
+@pytest_asyncio.fixture
+async def redis_client():
+    try:
+        from fakeredis import FakeAsyncRedis
+        client = FakeAsyncRedis()
+    except ImportError:
+        from redis.asyncio import Redis
+        from cache.redis_cache import redis_connection_kwargs
+        client = Redis(**redis_connection_kwargs())
+        try:
+            await client.ping()
+        except Exception:
+            pytest.skip("neither fakeredis nor a local Redis is available")
+    yield client
+    await client.aclose() if hasattr(client, "aclose") else await client.close()
+
+
+@pytest_asyncio.fixture
+async def queue(redis_client):
+    queue = RedisWorkQueue("test", redis_client, lease_timeout=30, max_attempts=2, prefix="mediacrawler:test")
+    await queue.purge()
+    yield queue
+    await queue.purge()
+
+
+class TestRedisWorkQueue:
+    @pytest.mark.asyncio
+    async def test_lease_ack_and_dedup(self, queue):
+        assert await queue.enqueue("note", {"note_id": "a"}, item_id="note:a")
+        assert not await queue.enqueue("note", {"note_id": "a"}, item_id="note:a")
+
+        item = await queue.lease()
+        assert (item.kind, item.payload) == ("note", {"note_id": "a"})
+        assert await queue.lease() is None
+        assert await queue.stats() == {"ready": 0, "leased": 1, "dead": 0}
+
+        await queue.ack(item)
+        assert await queue.drained()
+
+    @pytest.mark.asyncio
+    async def test_retries_then_dead_letter(self, queue):
+        await queue.enqueue("note", {"note_id": "a"})
+        assert await queue.nack(await queue.lease(), "boom")
+        item = await queue.lease()
+        assert item.attempts == 1
+        await queue.nack(item, "boom again")
+        assert await queue.lease() is None
+        dead = await queue.dead_letters()
+        assert [(d.attempts, d.last_error) for d in dead] == [(2, "boom again")]
+
+        assert await queue.requeue_dead() == 1
+        assert (await queue.lease()).attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_reclaimed(self, queue, monkeypatch):
+        await queue.enqueue("note", {"note_id": "a"})
+        item = await queue.lease()
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 60)  # the worker died, its lease ran out
+        assert await queue.reclaim_expired() == 1
+        # the dead worker's late nack does not move the item a second time
+        assert not await queue.nack(item, "late")
+        assert (await queue.lease()).attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_processes_follow_up_work_until_drained(queue):
+    done = []
+
+    async def crawl_page(item):
+        for i in range(3):
+            await queue.enqueue("note", {"note_id": f"{item.payload['page']}-{i}"})
+
+    async def crawl_note(item):
+        if item.payload["note_id"] == "1-0" and item.attempts == 0:
+            raise RuntimeError("captcha")
+        await asyncio.sleep(0.01)
+        done.append(item.payload["note_id"])
+
+    for page in (1, 2):
+        await queue.enqueue("search_page", {"page": page})
+    worker = WorkQueueWorker(queue, {"search_page": crawl_page, "note": crawl_note}, concurrency=3, poll_interval=0.01)
+    await asyncio.wait_for(worker.run(), timeout=5)
+
+    assert sorted(done) == [f"{page}-{i}" for page in (1, 2) for i in range(3)]
+    assert (worker.processed, worker.failed) == (8, 1)
+    assert await queue.drained()
+
+
+@pytest.mark.asyncio
+async def test_xhs_worker_retries_failed_note_details_and_acks_missing_notes(queue, monkeypatch):
+    import config
+    from media_platform.xhs.core import XiaoHongShuCrawler
+    from media_platform.xhs.exception import DataFetchError, NoteNotFoundError
+
+    class FakeXhsClient:
+        def __init__(self):
+            self.calls = []
+
+        async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+            self.calls.append(note_id)
+            if note_id == "missing":
+                raise NoteNotFoundError("deleted")
+            raise DataFetchError("461")
+
+    monkeypatch.setattr(config, "ENABLE_GET_COMMENTS", False)
+    monkeypatch.setattr(config, "ENABLE_GET_MEIDAS", False)
+    for note_id in ("missing", "blocked"):
+        await queue.enqueue("note", {"note_id": note_id}, item_id=f"note:{note_id}")
+    crawler = XiaoHongShuCrawler()
+    crawler.xhs_client = FakeXhsClient()
+    await asyncio.wait_for(crawler.run_queue_worker(queue), timeout=5)
+
+    assert sorted(crawler.xhs_client.calls) == ["blocked", "blocked", "missing"]
+    assert [d.payload["note_id"] for d in await queue.dead_letters()] == ["blocked"]
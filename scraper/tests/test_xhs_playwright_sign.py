@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Unit tests for the batched Xiaohongshu playwright signer
+"""
+
+import asyncio
+
+import pytest
+
+from media_platform.xhs.playwright_sign import XhsPlaywrightSigner, XhsSignPagePool
+
+
+class FakeSignPage:
+    """Stand-in for a playwright Page with window.mnsv2 loaded"""
+
+    def __init__(self, b1: str = "b1-value", broken: bool = False):
+        self.b1 = b1
+        self.b1_reads = 0
+        self.batches = []
+        self.broken = broken
+        self.reloads = 0
+        self.closed = False
+
+    async def goto(self, url, **kwargs):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def reload(self, **kwargs):
+        self.reloads += 1
+        self.broken = False
+
+    async def wait_for_function(self, expression, **kwargs):
+        return True
+
+    async def evaluate(self, expression, arg=None):
+        await asyncio.sleep(0.01)  # CDP round trip
+        if "getItem('b1')" in expression:
+            self.b1_reads += 1
+            return self.b1
+        self.batches.append(arg)
+        if self.broken:
+            return ["" for _ in arg]
+        return [f"sig:{sign_str}" for sign_str, _ in arg]
+
+
+class TestXhsPlaywrightSigner:
+    """Test cases for XhsPlaywrightSigner"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_signs_share_one_evaluate(self):
+        """Concurrent sign requests are coalesced into a single evaluate call"""
+        page = FakeSignPage()
+        signer = XhsPlaywrightSigner(page, max_batch_size=32)
+        results = await asyncio.gather(*[
+            signer.call_mnsv2(f"/api/{i}", "md5") for i in range(10)
+        ])
+        assert results == [f"sig:/api/{i}" for i in range(10)]
+        assert len(page.batches) == 1
+        assert len(page.batches[0]) == 10
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_bounded(self):
+        """Batches never exceed max_batch_size"""
+        page = FakeSignPage()
+        signer = XhsPlaywrightSigner(page, max_batch_size=4)
+        await asyncio.gather(*[signer.call_mnsv2(f"/api/{i}", "md5") for i in range(10)])
+        assert [len(batch) for batch in page.batches] == [4, 4, 2]
+
+    @pytest.mark.asyncio
+    async def test_b1_cached_until_invalidated(self):
+        """b1 is read once and re-read only after invalidation"""
+        page = FakeSignPage()
+        signer = XhsPlaywrightSigner(page)
+        for _ in range(3):
+            signs = await signer.sign("/api/sns/web/v1/feed", {"a": 1}, a1="a1")
+            assert signs["x-s"].startswith("XYS_")
+        assert page.b1_reads == 1
+
+        signer.invalidate_b1()
+        await signer.sign("/api/sns/web/v1/feed", {"a": 1}, a1="a1")
+        assert page.b1_reads == 2
+
+    @pytest.mark.asyncio
+    async def test_evaluate_failure_returns_empty(self):
+        """A failed evaluate resolves every queued request with an empty signature"""
+
+        class BrokenPage(FakeSignPage):
+            async def evaluate(self, expression, arg=None):
+                raise RuntimeError("Target closed")
+
+        signer = XhsPlaywrightSigner(BrokenPage())
+        results = await asyncio.gather(*[signer.call_mnsv2("/api", "md5") for _ in range(3)])
+        assert results == ["", "", ""]
+
+
+class TestXhsSignPagePool:
+    """Test cases for XhsSignPagePool"""
+
+    @pytest.mark.asyncio
+    async def test_requests_spread_over_pages(self):
+        """Concurrent requests are dispatched to the least busy page"""
+        pages = [FakeSignPage() for _ in range(3)]
+        pool = XhsSignPagePool([XhsPlaywrightSigner(page) for page in pages])
+        await asyncio.gather(*[pool.sign(f"/api/{i}", {"i": i}, a1="a1") for i in range(9)])
+        assert [sum(len(batch) for batch in page.batches) for page in pages] == [3, 3, 3]
+
+    @pytest.mark.asyncio
+    async def test_empty_signature_reloads_page_and_retries(self):
+        """A page returning empty mnsv2 is reloaded and the request retried elsewhere"""
+        broken_page, good_page = FakeSignPage(broken=True), FakeSignPage()
+        pool = XhsSignPagePool([XhsPlaywrightSigner(broken_page), XhsPlaywrightSigner(good_page)])
+        signs = await pool.sign("/api/sns/web/v1/feed", {"a": 1}, a1="a1")
+        assert signs["x-s"].startswith("XYS_")
+        assert len(broken_page.batches) == 1
+        assert len(good_page.batches) == 1
+        await asyncio.sleep(0.05)
+        assert broken_page.reloads == 1
+        assert not pool._reloading
+
+    @pytest.mark.asyncio
+    async def test_close_closes_only_the_pages_it_opened(self):
+        class FakeContext:
+            async def new_page(self):
+                return FakeSignPage()
+
+        main_page = FakeSignPage()
+        pool = XhsSignPagePool.from_page(main_page)
+        await pool.grow(FakeContext(), 3, "https://www.xiaohongshu.com")
+        extra_pages = [signer.page for signer in pool.signers[1:]]
+        await pool.close()
+        assert all(page.closed for page in extra_pages) and not main_page.closed
+        assert [signer.page for signer in pool.signers] == [main_page]
+
+    def test_pool_requires_a_page(self):
+        with pytest.raises(ValueError):
+            XhsSignPagePool([])
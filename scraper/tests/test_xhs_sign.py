@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Golden value tests for the Xiaohongshu sign primitives
+
+The expected values were produced by the previous urllib.quote / ctypes based
+implementation, the table driven rewrite must stay byte for byte compatible.
+"""
+
+import pytest
+
+from media_platform.xhs.playwright_sign import _build_xs_common, _build_xs_payload
+from media_platform.xhs.xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
+
+A1 = "18c5d5b8f0bzzhbbbb2f2fcc4e2gk8mr5f1a2x3y4z"
+B1 = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMPYJJ=="
+X_T = "1700000000000"
+X_S = (
+    "XYS_2UQhPsHCH0c1PjhlHjIj2erjwjQhyoPTqBPT49pjHjIj2eHjwjQ+GnPW/MPjNsQhPUHCHfM1qAZAPebKcnQ0tUuRHjIj2ecjwjQ6GfkSG7cjKc=="
+)
+X_S_COMMON = (
+    "2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0c1PjhUHjIj2eHjwjQ+GnPW/MPjNsQhPUHCHdYiqUMIGUM78nHjNsQh+sHCH0c1+Ac1PsHVHdWMH0ijP/Y0+ncMG0YfPBQC2fYjGfQjPfGU8f+0+BLU89VhJgHM80bYPdWA2/zCHjIj2eGjwjHl+AZIPeZIPeZIPeZIHjIj2eqjwjQGnp+KPSpzybmAar+HPBPlLBkiJrYxaniU8gQx49kzyoS6LbzlcSmL+eSIyDYxaniU8LYx49kztF41Lbq6/pmx/d+zybmpar+H8DFlqLbycpmSGDT0JSrI4bpMLDYxaniU8n+x49kz+D4fyM+o+9+xa9PROaHVHdWhH0ija/PhqDYD87+xJ7mdag8Sq9zn494QcUT6aLpPJLQy+nLApd4G/B4BprShLA+jqg4bqD8S8gYDPBp3Jf+m2DMcnLktO/FjNsQhwaHCN/cF+eWh+/GMNsQhP/Zjw0rM+sIj2erlH0ijJfRUJnbVHdF="
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", ""),
+    ("a", "Gc=="),
+    ("ab", "GnH="),
+    ("abc", "GnQ0"),
+    ("XYS_", "nbS/gI=="),
+    ("上海探店 ☕ café", "ENjtE3n7EiCjEJxgHwtGSam0GnJexc=="),
+    ("~()*!.' -_/?&=%+", "KjWktjr1QUZTgUu5Q0FStI=="),
+])
+def test_b64_encode_golden(text, expected):
+    assert b64_encode(encode_utf8(text)) == expected
+
+
+def test_b64_encode_accepts_byte_list():
+    assert b64_encode([97, 98, 99]) == b64_encode(bytearray(b"abc")) == "GnQ0"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", 3988292384),
+    ("abc", -660815134),
+    ("0" * 57, -626740341),
+    ("x" * 100, -1503792536),
+    (X_T + "XYS_2UQhPsHCH0c1Pjh9HjIj2erjwjQhyoPTqBPT49pjHjIj2eHjwjQgynEDJ74AHjIj2ePjwjQhyoPTqBPT49pjHjIj2eHjwjQgynEDJ74A", -3215634711),
+])
+def test_mrc_golden(text, expected):
+    assert mrc(text) == expected
+
+
+def test_x_s_headers_golden():
+    assert _build_xs_payload("mns0301_Abc+/=") == X_S
+    assert _build_xs_common(A1, B1, X_S, X_T) == X_S_COMMON
+
+
+def test_trace_id_format():
+    trace_id = get_trace_id()
+    assert len(trace_id) == 16
+    assert set(trace_id) <= set("abcdef0123456789")
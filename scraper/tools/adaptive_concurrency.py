@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/adaptive_concurrency.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : AIMD adaptive concurrency limiter for the crawl fan-outs
+#
+# The crawlers enter a limiter with `async with limiter:` exactly like they used an
+# asyncio.Semaphore. While a task holds a slot, the requests it sends report back to that
+# limiter (through a context variable): HttpTransport reports latency and status codes,
+# the clients' request methods report raised errors. Healthy rounds raise the limit by one,
+# block signals and rising p95 latency halve it.
+
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import config
+from tools import utils
+
+# Exceptions that mean "slow down", matched by class name because every platform
+# defines its own DataFetchError / IPBlockError
+BACKOFF_ERROR_NAMES = ("DataFetchError", "IPBlockError")
+
+# Status codes that mean "slow down": 461/471 are the Xiaohongshu captcha responses
+BACKOFF_STATUS_CODES = (429, 461, 471)
+
+
+def is_backoff_error(error: BaseException) -> bool:
+    return any(cls.__name__ in BACKOFF_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    A semaphore whose size follows AIMD (additive increase, multiplicative decrease).
+
+    - every `limit` successful requests without latency trouble raise the limit by one
+    - a backoff error / status, or a window p95 above `latency_tolerance` times the
+      healthy baseline, multiplies the limit by `decrease_factor`
+    Cuts are at most one per `cooldown` seconds, so a burst of failures from requests
+    that were already in flight only counts once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        decrease_factor: float = 0.5,
+        latency_window: int = 20,
+        latency_tolerance: float = 2.0,
+        cooldown: float = 1.0,
+    ):
+        """
+        Args:
+            name: limiter name, used in logs and metrics
+            initial: starting limit
+            min_limit: the limit never goes below this
+            max_limit: the limit never goes above this
+            decrease_factor: multiplier applied on a cut
+            latency_window: number of latency samples per p95 evaluation
+            latency_tolerance: a window p95 above baseline * tolerance triggers a cut
+            cooldown: minimum seconds between two cuts
+        """
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self._limit = min(max(initial, self.min_limit), self.max_limit)
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latencies: Deque[float] = deque(maxlen=max(1, latency_window))
+        self._samples_in_window = 0
+        self._baseline_p95: Optional[float] = None
+        self._last_p95: Optional[float] = None
+        self._successes = 0
+        self._last_cut_at = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state, exposed as a metric"""
+        return {
+            "name": self.name,
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "p95": self._last_p95,
+            "baseline_p95": self._baseline_p95,
+        }
+
+    # ---------------- slots ----------------
+
+    async def acquire(self) -> None:
+        if self._in_flight < self._limit and not self._waiters:
+            self._in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # the slot was granted right before the cancel
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._in_flight < self._limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        await self.acquire()
+        _slot_stack.set(_slot_stack.get() + (self,))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        _slot_stack.set(_slot_stack.get()[:-1])
+        if exc is not None and is_backoff_error(exc):
+            self.on_backoff(type(exc).__name__)
+        self.release()
+
+    # ---------------- feedback ----------------
+
+    def on_latency(self, latency: float) -> None:
+        """A request finished normally after `latency` seconds"""
+        self._latencies.append(latency)
+        self._samples_in_window += 1
+        if self._samples_in_window >= self._latencies.maxlen:
+            self._samples_in_window = 0
+            p95 = self._p95()
+            self._last_p95 = p95
+            if self._baseline_p95 is not None and p95 > self._baseline_p95 * self.latency_tolerance:
+                self.on_backoff(f"p95 {p95:.2f}s > {self.latency_tolerance} x baseline {self._baseline_p95:.2f}s")
+                return
+            # slowly follow the healthy latency level
+            self._baseline_p95 = p95 if self._baseline_p95 is None else 0.8 * self._baseline_p95 + 0.2 * p95
+
+        self._successes += 1
+        if self._successes >= self._limit and self._limit < self.max_limit:
+            self._successes = 0
+            self._set_limit(self._limit + 1, "healthy round")
+
+    def on_backoff(self, reason: str) -> None:
+        """The platform pushed back, cut the limit"""
+        now = time.monotonic()
+        if now - self._last_cut_at < self.cooldown:
+            return
+        self._last_cut_at = now
+        self._successes = 0
+        self._set_limit(math.floor(self._limit * self.decrease_factor), reason)
+
+    def _p95(self) -> float:
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(len(ordered) * 0.95) - 1)]
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        limit = min(max(limit, self.min_limit), self.max_limit)
+        if limit == self._limit:
+            return
+        log = utils.logger.info if limit > self._limit else utils.logger.warning
+        log(f"[AdaptiveConcurrencyLimiter] {self.name} concurrency {self._limit} -> {limit} ({reason})")
+        self._limit = limit
+        self._wake_waiters()
+
+
+# Limiters whose slots the current task holds, innermost last
+_slot_stack: contextvars.ContextVar[Tuple[AdaptiveConcurrencyLimiter, ...]] = contextvars.ContextVar(
+    "adaptive_concurrency_slots", default=()
+)
+
+
+def _current_limiter() -> Optional[AdaptiveConcurrencyLimiter]:
+    stack = _slot_stack.get()
+    return stack[-1] if stack else None
+
+
+def report_response(latency: float, status_code: Optional[int] = None) -> None:
+    """Feed one response (or page load) into the limiter of the current task, no-op outside a slot"""
+    limiter = _current_limiter()
+    if limiter is None:
+        return
+    if status_code in BACKOFF_STATUS_CODES:
+        limiter.on_backoff(f"HTTP {status_code}")
+    else:
+        limiter.on_latency(latency)
+
+
+def report_error(error: BaseException) -> None:
+    """Feed one request error into the limiter of the current task, no-op outside a slot"""
+    limiter = _current_limiter()
+    if limiter is not None and is_backoff_error(error):
+        limiter.on_backoff(type(error).__name__)
+
+
+def observe_request_errors(func: Callable) -> Callable:
+    """
+    Decorator for the clients' request methods: errors raised by each attempt are reported
+    to the current limiter. Put it below @retry so every attempt is seen.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            report_error(e)
+            raise
+
+    return wrapper
+
+
+_limiters: Dict[Tuple[str, str], AdaptiveConcurrencyLimiter] = {}
+
+
+def get_concurrency_limiter(platform: str, stage: str) -> AdaptiveConcurrencyLimiter:
+    """
+    Process wide limiter of a platform fan-out, so the learned limit carries over between pages and keywords
+    Args:
+        platform: xhs | dy | ks | bili | wb | tieba | zhihu
+        stage: detail | comments
+
+    Returns:
+        the limiter, static at MAX_CONCURRENCY_NUM when ADAPTIVE_CONCURRENCY_ENABLED is off
+    """
+    key = (platform, stage)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        initial = config.MAX_CONCURRENCY_NUM
+        if config.ADAPTIVE_CONCURRENCY_ENABLED:
+            min_limit, max_limit = config.ADAPTIVE_CONCURRENCY_MIN, max(initial, config.ADAPTIVE_CONCURRENCY_MAX)
+        else:
+            min_limit = max_limit = initial
+        limiter = AdaptiveConcurrencyLimiter(
+            f"{platform}.{stage}",
+            initial=initial,
+            min_limit=min_limit,
+            max_limit=max_limit,
+            decrease_factor=config.ADAPTIVE_CONCURRENCY_DECREASE_FACTOR,
+            latency_tolerance=config.ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+        )
+        _limiters[key] = limiter
+    return limiter
+
+
+def concurrency_metrics() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every limiter, keyed by name"""
+    return {limiter.name: limiter.snapshot() for limiter in _limiters.values()}
+
+
+def reset_concurrency_limiters() -> None:
+    """Drop all limiters, the next call rebuilds them from config"""
+    _limiters.clear()
@@ -17,22 +17,26 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
-import csv
+import glob
 import json
 import os
 import pathlib
-from typing import Dict, List
+from typing import Dict, List, Optional
 import aiofiles
 import config
+from tools.buffered_writer import FORMAT_CSV, FORMAT_JSON, FORMAT_JSONL, flush_record_writers, get_record_writer
+from tools.jsonl_compact import compact_jsonl_file
 from tools.utils import utils
 from tools.words import AsyncWordCloudGenerator
 
 class AsyncFileWriter:
-    def __init__(self, platform: str, crawler_type: str):
-        self.lock = asyncio.Lock()
+    def __init__(self, platform: str, crawler_type: str, json_lines: Optional[bool] = None):
         self.platform = platform
         self.crawler_type = crawler_type
-        self.wordcloud_generator = AsyncWordCloudGenerator() if config.ENABLE_GET_WORDCLOUD else None
+        # json items are appended as JSON Lines instead of rewriting the whole array per item
+        self.json_lines = config.SAVE_DATA_OPTION == "jsonl" if json_lines is None else json_lines
+        # built on first use: it loads the stopwords and registers the jieba words
+        self.wordcloud_generator: Optional[AsyncWordCloudGenerator] = None
 
     def _get_file_path(self, file_type: str, item_type: str) -> str:
         if config.SAVE_DATA_PATH:
@@ -44,34 +48,52 @@ class AsyncFileWriter:
         return f"{base_path}/{file_name}"
 
     async def write_to_csv(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('csv', item_type)
-        async with self.lock:
-            file_exists = os.path.exists(file_path)
-            async with aiofiles.open(file_path, 'a', newline='', encoding='utf-8-sig') as f:
-                writer = csv.DictWriter(f, fieldnames=item.keys())
-                if not file_exists or await f.tell() == 0:
-                    await writer.writeheader()
-                await writer.writerow(item)
+        await get_record_writer(self.platform, self.crawler_type, item_type, FORMAT_CSV).write(item)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('json', item_type)
-        async with self.lock:
-            existing_data = []
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        content = await f.read()
-                        if content:
-                            existing_data = json.loads(content)
-                        if not isinstance(existing_data, list):
-                            existing_data = [existing_data]
-                    except json.JSONDecodeError:
-                        existing_data = []
-
-            existing_data.append(item)
-
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+        if self.json_lines:
+            await self.write_single_item_to_jsonl(item, item_type)
+            return
+        # the array file is rewritten once per buffered batch instead of once per item
+        await get_record_writer(self.platform, self.crawler_type, item_type, FORMAT_JSON).write(item)
+
+    async def write_single_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        Append one compact line per item, the cost of a write does not grow with the file
+        """
+        await get_record_writer(self.platform, self.crawler_type, item_type, FORMAT_JSONL).write(item)
+
+    async def write_items_to_csv(self, items: List[Dict], item_type: str):
+        await get_record_writer(self.platform, self.crawler_type, item_type, FORMAT_CSV).write_many(items)
+
+    async def write_items_to_json(self, items: List[Dict], item_type: str):
+        """
+        Buffer a batch of items (json or jsonl, like write_single_item_to_json) in one append
+        """
+        file_format = FORMAT_JSONL if self.json_lines else FORMAT_JSON
+        await get_record_writer(self.platform, self.crawler_type, item_type, file_format).write_many(items)
+
+    async def compact_jsonl_files(self) -> Dict[str, int]:
+        """
+        Write today's jsonl files of this crawler type as the legacy JSON array files
+        (data/<platform>/json/...), which scripts/process-xhs-posts.mjs and the wordcloud read.
+        Safe to call while the crawl is still appending.
+        Returns:
+            jsonl file path -> number of records compacted, files whose JSON target was left alone are omitted
+        """
+        await flush_record_writers()
+        jsonl_dir = os.path.dirname(self._get_file_path('jsonl', 'contents'))
+        pattern = os.path.join(jsonl_dir, f"{self.crawler_type}_*_{utils.get_current_date()}.jsonl")
+        compacted = {}
+        for jsonl_path in sorted(glob.glob(pattern)):
+            item_type = os.path.basename(jsonl_path)[len(self.crawler_type) + 1:].rsplit('_', 1)[0]
+            json_path = self._get_file_path('json', item_type)
+            count = await asyncio.to_thread(compact_jsonl_file, jsonl_path, json_path)
+            if count is None:
+                continue
+            compacted[jsonl_path] = count
+            utils.logger.info(f"[AsyncFileWriter.compact_jsonl_files] {jsonl_path} -> {json_path} ({count} records)")
+        return compacted
 
     async def generate_wordcloud_from_comments(self):
         """
@@ -82,9 +104,10 @@ class AsyncFileWriter:
             return
 
         if not self.wordcloud_generator:
-            return
+            self.wordcloud_generator = AsyncWordCloudGenerator()
 
         try:
+            await flush_record_writers()
             # Read comments from JSON file
             comments_file_path = self._get_file_path('json', 'comments')
             if not os.path.exists(comments_file_path) or os.path.getsize(comments_file_path) == 0:
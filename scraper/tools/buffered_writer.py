@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/buffered_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Process wide buffered record writers for the file stores
+#
+# One writer per (platform, crawler_type, item_type, format), shared by every store instance,
+# so all coroutines writing a file go through the same lock and the same open handle.
+# Records are buffered in memory and written in batches: when SAVE_BUFFER_FLUSH_RECORDS are
+# buffered, every SAVE_BUFFER_FLUSH_INTERVAL_SEC and on shutdown.
+# Every writer counts the records it accepted and the ones it wrote, a crawl checkpoint waits
+# for the positions it depends on instead of forcing a flush (a note the checkpoint marks done
+# is on disk).
+#
+# Flushes do blocking file I/O on the event loop thread without awaiting in between; a batch
+# is one write, and it keeps a flush atomic for the coroutines.
+
+import asyncio
+import csv
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import config
+from tools import utils
+
+FORMAT_CSV = "csv"
+FORMAT_JSON = "json"  # legacy JSON array, rewritten once per batch
+FORMAT_JSONL = "jsonl"
+
+
+class BufferedRecordWriter:
+
+    def __init__(
+        self,
+        platform: str,
+        crawler_type: str,
+        item_type: str,
+        file_format: str,
+        flush_records: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            platform: xhs | dy | ...
+            crawler_type: search | detail | creator
+            item_type: contents | comments | creators ...
+            file_format: csv | json | jsonl
+            flush_records: buffered records that trigger a flush, defaults to config.SAVE_BUFFER_FLUSH_RECORDS
+            flush_interval: seconds a record may stay buffered, defaults to config.SAVE_BUFFER_FLUSH_INTERVAL_SEC
+        """
+        self.platform = platform
+        self.crawler_type = crawler_type
+        self.item_type = item_type
+        self.file_format = file_format
+        self.flush_records = max(1, flush_records or config.SAVE_BUFFER_FLUSH_RECORDS)
+        self.flush_interval = config.SAVE_BUFFER_FLUSH_INTERVAL_SEC if flush_interval is None else flush_interval
+        self.lock = asyncio.Lock()
+        self.buffer: List[Dict] = []
+        self.flushes = 0
+        self.seq = 0  # records accepted so far
+        self.flushed_seq = 0  # records written so far
+        self.closed = False
+        self.flushed = asyncio.Event()  # set after every flush
+        self._file: Optional[TextIO] = None
+        self._file_path: Optional[str] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def file_path(self) -> str:
+        """Today's file, resolved once per flush so a run that crosses midnight rolls over"""
+        base_path = f"{config.SAVE_DATA_PATH or 'data'}/{self.platform}/{self.file_format}"
+        file_name = f"{self.crawler_type}_{self.item_type}_{utils.get_current_date()}.{self.file_format}"
+        return f"{base_path}/{file_name}"
+
+    async def write(self, item: Dict) -> None:
+        await self.write_many([item])
+
+    async def write_many(self, items: List[Dict]) -> None:
+        """Buffer a batch of records at once, it is flushed at most once"""
+        if not items:
+            return
+        async with self.lock:
+            self.buffer.extend(items)
+            self.seq += len(items)
+            if len(self.buffer) >= self.flush_records:
+                self.flush_sync()
+        if self.flush_interval and (self._flusher is None or self._flusher.done()):
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def flush(self) -> None:
+        async with self.lock:
+            self.flush_sync()
+
+    def flush_sync(self) -> None:
+        """Write the buffered records"""
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        file_path = self.file_path()
+        try:
+            if self.file_format == FORMAT_JSON:
+                self._merge_json_array(file_path, batch)
+            else:
+                self._append(file_path, batch)
+        except OSError:
+            # keep the records for the next flush
+            self.buffer[:0] = batch
+            self._close_file()
+            raise
+        self.flushes += 1
+        self.flushed_seq = self.seq
+        self.flushed.set()
+
+    def _append(self, file_path: str, batch: List[Dict]) -> None:
+        if file_path != self._file_path:
+            self._close_file()
+            pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            if self.file_format == FORMAT_CSV:
+                self._file = open(file_path, "a", newline="", encoding="utf-8-sig")
+            else:
+                self._file = open(file_path, "a", encoding="utf-8")
+            self._file_path = file_path
+
+        if self.file_format == FORMAT_CSV:
+            for item in batch:
+                writer = csv.DictWriter(self._file, fieldnames=item.keys())
+                if self._file.tell() == 0:
+                    writer.writeheader()
+                writer.writerow(item)
+        else:
+            self._file.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in batch))
+        self._file.flush()
+
+    @staticmethod
+    def _merge_json_array(file_path: str, batch: List[Dict]) -> None:
+        pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        existing_data = []
+        if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
+            with open(file_path, "r", encoding="utf-8") as f:
+                try:
+                    existing_data = json.load(f)
+                except json.JSONDecodeError:
+                    existing_data = []
+            if not isinstance(existing_data, list):
+                existing_data = [existing_data]
+        existing_data.extend(batch)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_path = None
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        async with self.lock:
+            try:
+                self.flush_sync()
+                self._close_file()
+            finally:
+                self.closed = True
+                self.flushed.set()
+
+
+_writers: Dict[Tuple[str, str, str, str], BufferedRecordWriter] = {}
+
+
+def get_record_writer(platform: str, crawler_type: str, item_type: str, file_format: str) -> BufferedRecordWriter:
+    key = (platform, crawler_type, item_type, file_format)
+    writer = _writers.get(key)
+    if writer is None:
+        writer = _writers[key] = BufferedRecordWriter(platform, crawler_type, item_type, file_format)
+    return writer
+
+
+def record_writer_positions() -> Dict[Tuple[str, str, str, str], int]:
+    """Records accepted so far by the writers that still buffer some"""
+    return {key: writer.seq for key, writer in _writers.items() if writer.flushed_seq < writer.seq}
+
+
+async def wait_records_flushed(positions: Dict[Tuple[str, str, str, str], int]) -> None:
+    """Wait until the writers wrote their records up to the given positions, or were closed"""
+    for key, seq in positions.items():
+        writer = _writers.get(key)
+        while writer is not None and writer.flushed_seq < seq and not writer.closed:
+            writer.flushed.clear()
+            await writer.flushed.wait()
+
+
+async def flush_record_writers() -> None:
+    for writer in list(_writers.values()):
+        await writer.flush()
+
+
+async def close_record_writers() -> None:
+    """Flush every buffered record and close the files, called on shutdown"""
+    while _writers:
+        _, writer = _writers.popitem()
+        await writer.close()
+
+
+def reset_record_writers() -> None:
+    """Forget the writers and whatever they still buffer, without a running loop (tests)"""
+    while _writers:
+        _, writer = _writers.popitem()
+        if writer._flusher is not None:
+            writer._flusher.cancel()
+        writer._close_file()
+        writer.closed = True
+        writer.flushed.set()
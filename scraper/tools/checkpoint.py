@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/checkpoint.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Crash-resumable crawl checkpoints
+#
+# The checkpoint is a small JSON document per platform and crawler type, rewritten
+# atomically (temp file + os.replace) after units of work finish:
+#   keywords: next search page, search_id, notes handed to the pipeline but not finished yet
+#   comments: comment cursor and count per note still being paged
+#   creators: pagination cursor and the notes listed so far per creator still being crawled
+#   comments_done / creators_done: ids of the notes and creators that are finished
+# Finished comment and creator entries are dropped from their section, so the document only
+# grows by an id per finished note. Changes are coalesced into at most one write every
+# CRAWLER_CHECKPOINT_SAVE_INTERVAL_SEC, done on a worker thread.
+# A run started with --resume picks the document up and continues where it stopped; a run
+# that finishes everything deletes it.
+
+import asyncio
+import json
+import os
+import pathlib
+from typing import Any, Dict, List, Optional, Set
+
+import config
+from tools import utils
+from tools.buffered_writer import record_writer_positions, wait_records_flushed
+
+
+class CrawlCheckpoint:
+
+    def __init__(self, path: str, state: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.state: Dict[str, Any] = state or {}
+        self.finished_comments: Set[str] = set(self.state.pop("comments_done", []))
+        self.finished_creators: Set[str] = set(self.state.pop("creators_done", []))
+        for section in ("keywords", "comments", "creators"):
+            self.state.setdefault(section, {})
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self._saver: Optional[asyncio.Task] = None
+
+    @classmethod
+    def load(cls, path: str) -> "CrawlCheckpoint":
+        """Load the checkpoint left by the previous run, an unreadable one is ignored"""
+        state = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                utils.logger.info(f"[CrawlCheckpoint.load] Resume from checkpoint {path}")
+            except (OSError, ValueError) as e:
+                utils.logger.warning(f"[CrawlCheckpoint.load] Ignore unreadable checkpoint {path}: {e}")
+        return cls(path, state)
+
+    def save(self) -> None:
+        """Mark the state changed, the write is coalesced with the changes that follow it"""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no crawl running (tests, tools), write right away
+            self._write(self._dump())
+            self._dirty = False
+            return
+        if self._saver is None or self._saver.done():
+            self._saver = loop.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        # changes made while a write waited for the store files are saved by the next round
+        while self._dirty:
+            await asyncio.sleep(config.CRAWLER_CHECKPOINT_SAVE_INTERVAL_SEC)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write the pending changes now"""
+        async with self._lock:
+            if not self._dirty:
+                return
+            data, positions, self._dirty = self._dump(), record_writer_positions(), False
+            # records the checkpoint marks as done must be on disk before it says so, the
+            # buffered writers get there on their own flushes
+            await wait_records_flushed(positions)
+            try:
+                await asyncio.to_thread(self._write, data)
+            except OSError as e:
+                self._dirty = True
+                utils.logger.error(f"[CrawlCheckpoint.flush] Save of {self.path} failed: {e}")
+
+    def _dump(self) -> str:
+        return json.dumps({
+            **self.state,
+            "comments_done": sorted(self.finished_comments),
+            "creators_done": sorted(self.finished_creators),
+        }, ensure_ascii=False)
+
+    def _write(self, data: str) -> None:
+        pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    # ---------------- search keywords ----------------
+
+    def keyword(self, keyword: str) -> Dict[str, Any]:
+        """State of a keyword: next_page, search_id, pending notes, done"""
+        return self.state["keywords"].setdefault(
+            keyword, {"next_page": None, "search_id": None, "pending": {}, "done": False}
+        )
+
+    def save_search_page(self, keyword: str, next_page: int, search_id: Optional[str] = None,
+                         pending: Optional[Dict[str, Dict]] = None) -> None:
+        """A search page was fetched, its notes (note id -> search item) are now pending"""
+        state = self.keyword(keyword)
+        state["next_page"] = next_page
+        if search_id:
+            state["search_id"] = search_id
+        state["pending"].update(pending or {})
+        self.save()
+
+    def finish_note(self, keyword: str, note_id: str) -> None:
+        """Every stage of a note handed out by a search page is done"""
+        if self.keyword(keyword)["pending"].pop(note_id, None) is not None:
+            self.save()
+
+    def finish_keyword(self, keyword: str) -> None:
+        self.keyword(keyword)["done"] = True
+        self.save()
+
+    # ---------------- comments ----------------
+
+    def comments(self, note_id: str) -> Dict[str, Any]:
+        """State of a note's comments: cursor, count, done"""
+        if note_id in self.finished_comments:
+            return {"cursor": "", "count": 0, "done": True}
+        return self.state["comments"].setdefault(note_id, {"cursor": "", "count": 0, "done": False})
+
+    def save_comment_cursor(self, note_id: str, cursor: str, count: int) -> None:
+        state = self.comments(note_id)
+        state["cursor"], state["count"] = cursor, count
+        self.save()
+
+    def finish_comments(self, note_id: str) -> None:
+        self.state["comments"].pop(note_id, None)
+        self.finished_comments.add(note_id)
+        self.save()
+
+    # ---------------- creators ----------------
+
+    def creator(self, user_id: str) -> Dict[str, Any]:
+        """State of a creator: cursor, notes listed so far, done (all notes listed)"""
+        if user_id in self.finished_creators:
+            return {"cursor": "", "notes": [], "done": True}
+        return self.state["creators"].setdefault(user_id, {"cursor": "", "notes": [], "done": False})
+
+    def save_creator_page(self, user_id: str, cursor: str, notes: List[Dict]) -> None:
+        state = self.creator(user_id)
+        state["cursor"] = cursor
+        state["notes"].extend(notes)
+        self.save()
+
+    def finish_creator(self, user_id: str) -> None:
+        """All notes of the creator are listed, their comments may still be running"""
+        self.creator(user_id)["done"] = True
+        self.save()
+
+    def complete_creator(self, user_id: str) -> None:
+        """The creator's notes and comments are crawled, nothing of it is needed anymore"""
+        self.state["creators"].pop(user_id, None)
+        self.finished_creators.add(user_id)
+        self.save()
+
+    # ---------------- lifecycle ----------------
+
+    def unfinished(self) -> bool:
+        return (
+            any(not s["done"] or s["pending"] for s in self.state["keywords"].values())
+            or bool(self.state["comments"])
+            or bool(self.state["creators"])
+        )
+
+    async def complete(self) -> None:
+        """Delete the checkpoint when the run left nothing unfinished"""
+        if self.unfinished():
+            utils.logger.info(f"[CrawlCheckpoint.complete] Unfinished work kept in {self.path}, rerun with --resume")
+            await self.close()
+            return
+        async with self._lock:
+            self._dirty = False
+            self._cancel_saver()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    async def close(self) -> None:
+        """Write what is still pending, called on shutdown"""
+        await self.flush()
+        self._cancel_saver()
+
+    def _cancel_saver(self) -> None:
+        if self._saver is not None and not self._saver.done():
+            self._saver.cancel()
+        self._saver = None
+
+
+_checkpoint: Optional[CrawlCheckpoint] = None
+
+
+def checkpoint_path(platform: str, crawler_type: str) -> str:
+    base_dir = config.CRAWLER_CHECKPOINT_DIR or os.path.join(config.SAVE_DATA_PATH or "data", "checkpoints")
+    return os.path.join(base_dir, f"{platform}_{crawler_type}.json")
+
+
+def get_checkpoint() -> Optional[CrawlCheckpoint]:
+    """
+    Checkpoint of the current run, None when CRAWLER_CHECKPOINT_ENABLED is off
+    With CRAWLER_RESUME the previous run's checkpoint is loaded, otherwise the run starts a new one
+    """
+    global _checkpoint
+    if not config.CRAWLER_CHECKPOINT_ENABLED:
+        return None
+    if _checkpoint is None:
+        path = checkpoint_path(config.PLATFORM, config.CRAWLER_TYPE)
+        _checkpoint = CrawlCheckpoint.load(path) if config.CRAWLER_RESUME else CrawlCheckpoint(path)
+    return _checkpoint
+
+
+async def complete_checkpoint() -> None:
+    """Called after a crawl returned normally"""
+    global _checkpoint
+    if _checkpoint is not None:
+        checkpoint, _checkpoint = _checkpoint, None
+        await checkpoint.complete()
+
+
+async def close_checkpoint() -> None:
+    """Write the pending state of an interrupted crawl, called on shutdown"""
+    global _checkpoint
+    if _checkpoint is not None:
+        checkpoint, _checkpoint = _checkpoint, None
+        await checkpoint.close()
+
+
+def reset_checkpoint() -> None:
+    global _checkpoint
+    if _checkpoint is not None:
+        _checkpoint._cancel_saver()
+    _checkpoint = None
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/comment_fanout.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Bounded concurrent expansion of sub-comment threads
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+import config
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def expand_comment_threads(
+    roots: Iterable[T],
+    expand_thread: Callable[[T], Awaitable[Optional[List[R]]]],
+    max_in_flight: Optional[int] = None,
+) -> List[R]:
+    """
+    Expand the sub-comment threads of independent root comments concurrently.
+
+    expand_thread pages one thread serially, so its callbacks keep their order within the
+    thread; at most max_in_flight threads (and so sub-comment requests) of one call are in
+    flight. The requests still go through the platform rate limiter, and the tasks inherit
+    the caller's context, so they count against the comment concurrency limiter it holds.
+
+    Args:
+        roots: root comments whose threads need expanding
+        expand_thread: coroutine function fetching all sub-comments of one root
+        max_in_flight: per-note cap, defaults to config.CRAWLER_SUB_COMMENT_CONCURRENCY
+
+    Returns:
+        sub-comments of all threads, in root order
+    """
+    roots = list(roots)
+    if not roots:
+        return []
+    slots = asyncio.Semaphore(max(1, max_in_flight or config.CRAWLER_SUB_COMMENT_CONCURRENCY))
+
+    async def run_thread(root: T) -> Optional[List[R]]:
+        async with slots:
+            return await expand_thread(root)
+
+    tasks = [asyncio.create_task(run_thread(root)) for root in roots]
+    try:
+        thread_results = await asyncio.gather(*tasks)
+    except BaseException:
+        # one thread failed (or we were cancelled), do not leave the others running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    result: List[R] = []
+    for sub_comments in thread_results:
+        if sub_comments:
+            result.extend(sub_comments)
+    return result
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/crawl_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Staged producer/consumer pipeline for crawl flows (search -> detail -> store / media / comments)
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+from tools import utils
+
+_STOP = object()
+
+
+class PipelineStage:
+    """
+    One stage of a CrawlPipeline: a bounded queue drained by `concurrency` workers.
+
+    Every non-None value returned by the handler is passed on to all downstream stages,
+    so results flow on as soon as they are ready instead of waiting for a whole batch.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        maxsize: int = 0,
+    ):
+        """
+        Args:
+            name: stage name, used in logs
+            handler: coroutine function processing one item
+            concurrency: number of workers
+            maxsize: queue capacity, a full queue makes the upstream wait (backpressure), 0 = unbounded
+        """
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.downstream: List["PipelineStage"] = []
+        self.processed = 0
+        self.failed = 0
+        self._workers: List[asyncio.Task] = []
+
+    def then(self, *stages: "PipelineStage") -> "PipelineStage":
+        """Feed the results of this stage into the given stages"""
+        self.downstream.extend(stages)
+        return self
+
+    async def put(self, item: Any) -> None:
+        await self.queue.put(item)
+
+    def start(self) -> None:
+        # worker tasks copy the current context, so contextvars such as source_keyword_var carry over
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"pipeline-{self.name}-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                try:
+                    result = await self.handler(item)
+                except Exception as e:
+                    self.failed += 1
+                    utils.logger.error(f"[PipelineStage._worker] stage {self.name} failed on {item!r}: {e}")
+                    continue
+                self.processed += 1
+                if result is not None:
+                    for stage in self.downstream:
+                        await stage.put(result)
+            finally:
+                self.queue.task_done()
+
+    async def close(self) -> None:
+        """Process everything queued so far, then stop the workers"""
+        for _ in self._workers:
+            await self.queue.put(_STOP)
+        await asyncio.gather(*self._workers)
+        self._workers = []
+
+    def cancel(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+
+
+class CrawlPipeline:
+    """
+    A set of PipelineStage objects started and drained together.
+
+    Stages must be added upstream first; on exit each stage is drained before its
+    downstream stages are closed, so nothing in flight is dropped.
+
+    Example:
+        pipeline = CrawlPipeline("xhs.search")
+        detail = pipeline.stage("detail", fetch_detail, concurrency=4, maxsize=20)
+        store = pipeline.stage("store", save_note)
+        detail.then(store)
+        async with pipeline:
+            for item in search_results:
+                await detail.put(item)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: List[PipelineStage] = []
+
+    def stage(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 1,
+        maxsize: int = 0,
+    ) -> PipelineStage:
+        stage = PipelineStage(name, handler, concurrency=concurrency, maxsize=maxsize)
+        self.stages.append(stage)
+        return stage
+
+    async def __aenter__(self) -> "CrawlPipeline":
+        for stage in self.stages:
+            stage.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> Optional[bool]:
+        if exc_type is not None and issubclass(exc_type, (asyncio.CancelledError, KeyboardInterrupt)):
+            for stage in self.stages:
+                stage.cancel()
+            return None
+        for stage in self.stages:
+            await stage.close()
+        summary = ", ".join(f"{s.name}: {s.processed} ok / {s.failed} failed" for s in self.stages)
+        utils.logger.info(f"[CrawlPipeline] {self.name} finished, {summary}")
+        return None
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/http_transport.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Long-lived pooled httpx transport shared by the platform API clients
+
+import asyncio
+import time
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+import config
+from tools import utils
+from tools.adaptive_concurrency import report_response
+
+_live_transports: "weakref.WeakSet[HttpTransport]" = weakref.WeakSet()
+_http2_checked: Optional[bool] = None
+
+
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package, check it once per process"""
+    global _http2_checked
+    if _http2_checked is None:
+        try:
+            import h2  # noqa: F401
+            _http2_checked = True
+        except ImportError:
+            utils.logger.warning("[HttpTransport] HTTP_ENABLE_HTTP2 is on but `h2` is not installed, falling back to HTTP/1.1")
+            _http2_checked = False
+    return _http2_checked
+
+
+class HttpTransport:
+    """
+    Keeps one httpx.AsyncClient (and with it one keep-alive connection pool) alive
+    for the whole lifetime of an API client.
+
+    The underlying client is bound to a proxy; when the proxy changes the client is
+    rebuilt, and the old one is closed as soon as its in-flight requests finish.
+    """
+
+    def __init__(
+        self,
+        proxy: Optional[str] = None,
+        timeout: float = 60,
+        http2: Optional[bool] = None,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Args:
+            proxy: httpx proxy url, None for direct connection
+            timeout: default request timeout (seconds)
+            http2: enable HTTP/2, defaults to config.HTTP_ENABLE_HTTP2
+            limits: connection pool limits, defaults to the HTTP_* pool settings in config
+            transport: custom httpx transport (mainly for tests)
+        """
+        self._proxy = proxy
+        self._timeout = timeout
+        self._http2 = config.HTTP_ENABLE_HTTP2 if http2 is None else http2
+        self._limits = limits or httpx.Limits(
+            max_connections=config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[httpx.AsyncClient, int] = {}
+        self._closed = False
+        _live_transports.add(self)
+
+    @property
+    def proxy(self) -> Optional[str]:
+        return self._proxy
+
+    def _build_client(self) -> httpx.AsyncClient:
+        kwargs = {
+            "timeout": self._timeout,
+            "limits": self._limits,
+            "http2": bool(self._http2) and _http2_available(),
+        }
+        if self._transport is not None:
+            kwargs["transport"] = self._transport
+        else:
+            kwargs["proxy"] = self._proxy
+        return httpx.AsyncClient(**kwargs)
+
+    def _acquire_client(self) -> httpx.AsyncClient:
+        if self._closed:
+            raise RuntimeError("HttpTransport is closed")
+        if self._client is None:
+            self._client = self._build_client()
+            self._inflight[self._client] = 0
+        self._inflight[self._client] += 1
+        return self._client
+
+    async def _release_client(self, client: httpx.AsyncClient) -> None:
+        if client not in self._inflight:
+            # aclose() already closed it under the request
+            return
+        self._inflight[client] -= 1
+        if client is not self._client and self._inflight[client] == 0:
+            # Retired by a proxy swap and now idle
+            del self._inflight[client]
+            await client.aclose()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request over the pooled connection, accepts the same kwargs as httpx.AsyncClient.request
+        """
+        client = self._acquire_client()
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        finally:
+            await self._release_client(client)
+        report_response(time.perf_counter() - start, response.status_code)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def set_proxy(self, proxy: Optional[str]) -> None:
+        """
+        Switch to a new proxy, the pool is rebuilt on the next request
+        Args:
+            proxy: new httpx proxy url
+        """
+        if proxy == self._proxy:
+            return
+        self._proxy = proxy
+        old_client, self._client = self._client, None
+        if old_client is not None and self._inflight.get(old_client, 0) == 0:
+            self._inflight.pop(old_client, None)
+            await old_client.aclose()
+
+    async def retire(self) -> None:
+        """Stop taking new requests, the pool is closed once its in-flight requests finish"""
+        self._closed = True
+        old_client, self._client = self._client, None
+        if old_client is not None and self._inflight.get(old_client, 0) == 0:
+            self._inflight.pop(old_client, None)
+            await old_client.aclose()
+
+    async def aclose(self) -> None:
+        """Close every pooled client, in-flight requests on them will fail"""
+        self._closed = True
+        clients = list(self._inflight.keys())
+        self._client = None
+        self._inflight.clear()
+        for client in clients:
+            await client.aclose()
+
+
+async def close_all_transports() -> None:
+    """Close every transport still alive in this process, called on shutdown"""
+    transports = list(_live_transports)
+    if not transports:
+        return
+    await asyncio.gather(*(t.aclose() for t in transports), return_exceptions=True)
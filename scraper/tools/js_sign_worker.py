@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/js_sign_worker.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Persistent node workers for the JS sign libs (libs/douyin.js, libs/zhihu.js)
+#
+# execjs spawns a fresh node process and re-parses the whole sign lib on every .call(),
+# and blocks the event loop while doing it. The workers here load the lib once and then
+# answer newline framed JSON requests over stdin/stdout, so a signature is just an IPC
+# round trip and many of them can be in flight at once.
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+import config
+from tools import utils
+
+WORKER_SCRIPT = os.path.join("libs", "sign_worker.js")
+
+# a single response line may be a long signature string, give the reader some room
+_STREAM_LIMIT = 1024 * 1024
+
+_sign_worker_pools: Dict[str, "JsSignWorkerPool"] = {}
+
+
+class JsSignError(Exception):
+    """Raised when the sign lib throws, or the worker process dies mid call"""
+
+
+class JsSignWorker:
+    """One long-lived node process with a sign lib loaded, supports pipelined calls"""
+
+    def __init__(self, lib_path: str, node_path: str, worker_script: str = WORKER_SCRIPT):
+        self.lib_path = lib_path
+        self._node_path = node_path
+        self._worker_script = worker_script
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self._pending)
+
+    @property
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None and not (
+            self._reader_task is not None and self._reader_task.done()
+        )
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            self._node_path, self._worker_script, self.lib_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=_STREAM_LIMIT,
+        )
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    utils.logger.warning(f"[JsSignWorker._read_loop] invalid worker output: {line[:200]!r}")
+                    continue
+                future = self._pending.pop(message.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(JsSignError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except Exception as e:
+            utils.logger.error(f"[JsSignWorker._read_loop] reader stopped: {e}")
+        finally:
+            self._fail_pending(JsSignError(f"sign worker for {self.lib_path} exited"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def call(self, fn: str, *args: Any) -> Any:
+        if not self.is_alive:
+            raise JsSignError(f"sign worker for {self.lib_path} is not running")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        payload = json.dumps({"id": request_id, "fn": fn, "args": list(args)}, ensure_ascii=False)
+        try:
+            self._process.stdin.write(payload.encode("utf-8") + b"\n")
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            self._pending.pop(request_id, None)
+            raise JsSignError(f"sign worker for {self.lib_path} is gone: {e}") from e
+        return await future
+
+    async def close(self) -> None:
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        if process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout=2)
+            except (asyncio.TimeoutError, ProcessLookupError, BrokenPipeError):
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+
+class JsSignWorkerPool:
+    """
+    A fixed set of JsSignWorker processes for one sign lib.
+
+    Calls go to the worker with the fewest outstanding requests; a worker that has
+    died is restarted on the next call and the failed call is retried once.
+    Falls back to execjs on a thread when node is not installed.
+    """
+
+    def __init__(self, lib_path: str, size: Optional[int] = None, node_path: Optional[str] = None):
+        """
+        Args:
+            lib_path: path of the sign lib, e.g. libs/douyin.js
+            size: number of node processes, defaults to config.JS_SIGN_WORKER_NUM
+            node_path: node executable, looked up on PATH by default
+        """
+        self.lib_path = lib_path
+        self.size = max(1, size or config.JS_SIGN_WORKER_NUM)
+        self._node_path = node_path or shutil.which("node")
+        self._workers: List[JsSignWorker] = []
+        self._start_lock = asyncio.Lock()
+        self._execjs_ctx = None
+        self.closed = False
+
+    async def _ensure_started(self) -> None:
+        if self._workers and all(worker.is_alive for worker in self._workers):
+            return
+        async with self._start_lock:
+            if not self._workers:
+                self._workers = [JsSignWorker(self.lib_path, self._node_path) for _ in range(self.size)]
+            for index, worker in enumerate(self._workers):
+                if worker.is_alive:
+                    continue
+                if worker._process is not None:
+                    utils.logger.warning(f"[JsSignWorkerPool._ensure_started] restarting dead sign worker #{index} for {self.lib_path}")
+                    await worker.close()
+                await worker.start()
+
+    def _pick_worker(self) -> JsSignWorker:
+        alive = [worker for worker in self._workers if worker.is_alive]
+        return min(alive or self._workers, key=lambda worker: worker.outstanding)
+
+    async def call(self, fn: str, *args: Any) -> Any:
+        """Call a global function of the sign lib and return its result"""
+        if self.closed:
+            raise JsSignError(f"sign worker pool for {self.lib_path} is closed")
+        if not self._node_path:
+            return await self._call_execjs(fn, *args)
+
+        await self._ensure_started()
+        worker = self._pick_worker()
+        try:
+            return await worker.call(fn, *args)
+        except JsSignError:
+            if worker.is_alive:
+                raise  # the sign lib itself threw, retrying will not help
+        utils.logger.warning(f"[JsSignWorkerPool.call] sign worker crashed while calling {fn}, retrying once")
+        await self._ensure_started()
+        return await self._pick_worker().call(fn, *args)
+
+    async def _call_execjs(self, fn: str, *args: Any) -> Any:
+        if self._execjs_ctx is None:
+            import execjs
+            utils.logger.warning(f"[JsSignWorkerPool._call_execjs] node not found, falling back to execjs for {self.lib_path}")
+            with open(self.lib_path, mode="r", encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return await asyncio.to_thread(self._execjs_ctx.call, fn, *args)
+
+    async def close(self) -> None:
+        self.closed = True
+        workers, self._workers = self._workers, []
+        await asyncio.gather(*[worker.close() for worker in workers], return_exceptions=True)
+
+
+def get_sign_worker_pool(lib_path: str) -> JsSignWorkerPool:
+    """Process wide pool per sign lib, created on first use"""
+    pool = _sign_worker_pools.get(lib_path)
+    if pool is None or pool.closed:
+        pool = JsSignWorkerPool(lib_path)
+        _sign_worker_pools[lib_path] = pool
+    return pool
+
+
+async def close_all_sign_worker_pools() -> None:
+    """Stop every sign worker process, called on program exit"""
+    pools = list(_sign_worker_pools.values())
+    _sign_worker_pools.clear()
+    await asyncio.gather(*[pool.close() for pool in pools], return_exceptions=True)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/jsonl_compact.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Compact append-only JSON Lines files into the legacy JSON array files
+#
+# With SAVE_DATA_OPTION = "jsonl" the stores append one line per record to
+# data/<platform>/jsonl/<crawler_type>_<item_type>_<date>.jsonl. Downstream consumers
+# (scripts/process-xhs-posts.mjs, the wordcloud, the data API) read the JSON array at
+# data/<platform>/json/<same name>.json, which this module writes in one streaming pass.
+#
+# Usage: python -m tools.jsonl_compact data/xhs/jsonl/search_contents_2025-01-01.jsonl [...]
+
+import argparse
+import json
+import os
+import pathlib
+from typing import Any, Iterator, Optional
+
+from tools import utils
+
+_MISSING = object()
+
+
+def legacy_json_path(jsonl_path: str) -> str:
+    """data/xhs/jsonl/search_contents_DATE.jsonl -> data/xhs/json/search_contents_DATE.json"""
+    path = pathlib.Path(jsonl_path)
+    return str(path.parent.parent / "json" / f"{path.stem}.json")
+
+
+def _iter_records(jsonl_path: str, log_skipped: bool = True) -> Iterator[Any]:
+    """Parsed records of a JSON Lines file, skipping blank and unreadable lines"""
+    with open(jsonl_path, "r", encoding="utf-8") as src:
+        for line_no, line in enumerate(src, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if log_skipped:
+                    utils.logger.warning(f"[jsonl_compact] Skip unreadable line {line_no} of {jsonl_path}")
+
+
+def _written_by_compaction(json_path: str, jsonl_path: str) -> bool:
+    """
+    Whether json_path is missing or holds an earlier compaction of jsonl_path. The jsonl file
+    only grows, so an earlier compaction is a prefix of its records; anything else, e.g. an
+    array the json save option appended to on the same day, is not ours to replace.
+    """
+    if not os.path.exists(json_path):
+        return True
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return False
+    if not isinstance(existing, list):
+        return False
+    records = _iter_records(jsonl_path, log_skipped=False)
+    return all(item == next(records, _MISSING) for item in existing)
+
+
+def compact_jsonl_file(jsonl_path: str, json_path: Optional[str] = None) -> Optional[int]:
+    """
+    Write the records of a JSON Lines file as the JSON array the json store used to write
+    (same indent=4 layout), replacing the target atomically. Lines that do not parse, e.g. a
+    line torn by a crash, are skipped. A target that is not an earlier compaction of this
+    file, e.g. written by a json run on the same day, is left alone with a warning.
+    Args:
+        jsonl_path: append-only file written by the jsonl store
+        json_path: target file, defaults to legacy_json_path(jsonl_path)
+
+    Returns:
+        number of records written, None if the target was left alone
+    """
+    json_path = json_path or legacy_json_path(jsonl_path)
+    if not _written_by_compaction(json_path, jsonl_path):
+        utils.logger.warning(
+            f"[jsonl_compact] {json_path} holds records that did not come from {jsonl_path}, "
+            f"not overwriting it"
+        )
+        return None
+    pathlib.Path(json_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{json_path}.tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as dst:
+        dst.write("[")
+        for item in _iter_records(jsonl_path):
+            # json.dumps(list, indent=4) layout: every line of an element indented one level
+            element = json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+            dst.write(("," if count else "") + "\n    " + element)
+            count += 1
+        dst.write("\n]" if count else "]")
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.replace(tmp_path, json_path)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact jsonl store files into legacy JSON array files")
+    parser.add_argument("files", nargs="+", help="jsonl files written with --save_data_option jsonl")
+    args = parser.parse_args()
+    for jsonl_path in args.files:
+        json_path = legacy_json_path(jsonl_path)
+        count = compact_jsonl_file(jsonl_path, json_path)
+        if count is not None:
+            print(f"{jsonl_path} -> {json_path} ({count} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/keyword_scheduler.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Concurrent keyword crawling with per-keyword quotas and fair search page scheduling
+
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from tools import utils
+from var import source_keyword_var
+
+
+def parse_keywords(keywords: str) -> List[str]:
+    """Split the comma separated KEYWORDS config, dropping blanks and duplicates"""
+    result: List[str] = []
+    for keyword in keywords.split(","):
+        keyword = keyword.strip()
+        if keyword and keyword not in result:
+            result.append(keyword)
+    return result
+
+
+class KeywordScheduler:
+    """
+    Runs one crawl task per keyword, at most `concurrency` keywords at a time.
+
+    Every keyword task runs in its own context with source_keyword_var set, so stored
+    items are tagged with the right keyword. Search pages are handed out through turn():
+    when keywords compete for a page slot, the keyword that got the fewest pages so far
+    goes first, so a deep keyword cannot starve the others. Requests are still paced by
+    the platform token buckets and the shared detail / comment concurrency limiters.
+    """
+
+    def __init__(
+        self,
+        keywords: List[str],
+        concurrency: Optional[int] = None,
+        page_slots: int = 1,
+        quotas: Optional[Dict[str, int]] = None,
+        default_quota: Optional[int] = None,
+    ):
+        """
+        Args:
+            keywords: keywords to crawl
+            concurrency: keywords crawled at the same time, defaults to config.CRAWLER_KEYWORD_CONCURRENCY
+            page_slots: search pages fetched at the same time across all keywords
+            quotas: max notes per keyword, defaults to config.CRAWLER_KEYWORD_NOTE_QUOTAS
+            default_quota: quota of keywords missing from quotas, defaults to config.CRAWLER_MAX_NOTES_COUNT
+        """
+        self.keywords = keywords
+        self.concurrency = max(1, concurrency or config.CRAWLER_KEYWORD_CONCURRENCY)
+        self.page_slots = max(1, page_slots)
+        self._quotas = config.CRAWLER_KEYWORD_NOTE_QUOTAS if quotas is None else quotas
+        self._default_quota = default_quota
+        self.pages_served: Dict[str, int] = {keyword: 0 for keyword in keywords}
+        self._busy_slots = 0
+        # (pages served, arrival order, future)
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._arrival = itertools.count()
+
+    def quota(self, keyword: str) -> int:
+        """Max number of notes to crawl for keyword"""
+        default = config.CRAWLER_MAX_NOTES_COUNT if self._default_quota is None else self._default_quota
+        return self._quotas.get(keyword, default)
+
+    async def run(self, crawl_keyword: Callable[[str], Awaitable[None]]) -> None:
+        """
+        Crawl every keyword with crawl_keyword(keyword), a failing keyword does not stop the others
+        """
+        keyword_slots = asyncio.Semaphore(self.concurrency)
+
+        async def run_keyword(keyword: str) -> None:
+            async with keyword_slots:
+                source_keyword_var.set(keyword)
+                utils.logger.info(f"[KeywordScheduler.run] Begin keyword: {keyword}, quota: {self.quota(keyword)}")
+                try:
+                    await crawl_keyword(keyword)
+                except Exception as e:
+                    utils.logger.error(f"[KeywordScheduler.run] keyword {keyword} failed: {e}")
+                utils.logger.info(f"[KeywordScheduler.run] Finished keyword: {keyword}, search pages: {self.pages_served[keyword]}")
+
+        # each task copies the current context, so source_keyword_var stays local to its keyword
+        await asyncio.gather(*[asyncio.create_task(run_keyword(keyword), name=f"keyword-{keyword}") for keyword in self.keywords])
+
+    @asynccontextmanager
+    async def turn(self, keyword: str) -> AsyncIterator[None]:
+        """Hold one search page slot for keyword, granted fewest-pages-first"""
+        await self._acquire(keyword)
+        try:
+            yield
+        finally:
+            self._busy_slots -= 1
+            self._grant()
+
+    async def _acquire(self, keyword: str) -> None:
+        served = self.pages_served.setdefault(keyword, 0)
+        if self._busy_slots < self.page_slots and not self._waiters:
+            self._busy_slots += 1
+            self.pages_served[keyword] = served + 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (served, next(self._arrival), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._busy_slots -= 1
+                self._grant()
+            raise
+        self.pages_served[keyword] += 1
+
+    def _grant(self) -> None:
+        while self._waiters and self._busy_slots < self.page_slots:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._busy_slots += 1
+                waiter.set_result(None)
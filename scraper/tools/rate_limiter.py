@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/rate_limiter.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Token bucket rate limiting keyed by platform and endpoint class
+#
+# Politeness used to be enforced by sleeping CRAWLER_MAX_SLEEP_SEC inside the concurrency
+# semaphore, which left every slot idle most of the time. Every client request now takes a
+# token from the bucket of its (platform, endpoint class) instead, so the request rate is
+# bounded no matter how many workers are running.
+
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import config
+
+ENDPOINT_SEARCH = "search"
+ENDPOINT_DETAIL = "detail"
+ENDPOINT_COMMENTS = "comments"
+ENDPOINT_MEDIA = "media"
+
+# Path keywords used to classify api urls, checked in order, anything else is "detail"
+_ENDPOINT_KEYWORDS = (
+    (ENDPOINT_SEARCH, ("search",)),
+    (ENDPOINT_COMMENTS, ("comment", "reply", "hotflow")),
+)
+
+
+def classify_endpoint(url_or_name: str) -> str:
+    """
+    Map an api url (or a graphql operation name) to its endpoint class
+    Args:
+        url_or_name: request url, path or operation name
+
+    Returns:
+        search | comments | detail
+    """
+    path = urlparse(url_or_name).path if "://" in url_or_name else url_or_name
+    path = path.lower()
+    for endpoint, keywords in _ENDPOINT_KEYWORDS:
+        if any(keyword in path for keyword in keywords):
+            return endpoint
+    return ENDPOINT_DETAIL
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `burst` stored.
+
+    acquire() reserves a token right away and sleeps off the debt when the bucket is
+    empty, so callers are served in arrival order without a lock.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: tokens refilled per second, <= 0 disables limiting
+            burst: bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return
+        try:
+            await asyncio.sleep(-self._tokens / self.rate)
+        except asyncio.CancelledError:
+            self._tokens += 1  # give the reserved token back
+            raise
+
+
+class RateLimiter:
+    """Token buckets per (platform, endpoint class), created lazily from a limits table"""
+
+    def __init__(self, limits: Dict[str, Dict[str, Tuple[float, int]]]):
+        """
+        Args:
+            limits: {platform | "default": {endpoint class: (requests per second, burst)}}
+        """
+        self._limits = limits
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+
+    def _limit_of(self, platform: str, endpoint: str) -> Tuple[float, int]:
+        for key in (platform, "default"):
+            limit = self._limits.get(key, {}).get(endpoint)
+            if limit is not None:
+                return limit
+        return self._limits.get("default", {}).get(ENDPOINT_DETAIL, (0, 1))
+
+    def bucket(self, platform: str, endpoint: str) -> TokenBucket:
+        key = (platform, endpoint)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self._limit_of(platform, endpoint)
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, platform: str, endpoint: str) -> None:
+        await self.bucket(platform, endpoint).acquire()
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process wide limiter built from config.CRAWLER_RATE_LIMITS"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(config.CRAWLER_RATE_LIMITS)
+    return _rate_limiter
+
+
+def reset_rate_limiter() -> None:
+    """Drop all buckets, the next call rebuilds them from config"""
+    global _rate_limiter
+    _rate_limiter = None
+
+
+async def rate_limit(platform: str, endpoint: str) -> None:
+    """Wait for a token of the given platform / endpoint class"""
+    await get_rate_limiter().acquire(platform, endpoint)
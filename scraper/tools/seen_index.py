@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/seen_index.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Persistent index of crawled content, used by the incremental crawl mode
+
+import asyncio
+import json
+import os
+import pathlib
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional
+
+import aiosqlite
+
+import config
+from tools import utils
+
+REFRESH_POLICY_NEVER = "never"  # content in the index is never crawled again
+REFRESH_POLICY_INTERVAL = "interval"  # crawled again once the refresh interval has passed
+REFRESH_POLICY_CHANGED = "changed"  # like interval, and also as soon as it changed on the platform
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS seen_content (
+    platform TEXT NOT NULL,
+    content_id TEXT NOT NULL,
+    last_update_time INTEGER,
+    interactions TEXT,
+    last_crawl_time INTEGER NOT NULL,
+    PRIMARY KEY (platform, content_id)
+)
+"""
+
+_CREATE_COMMENT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS seen_comment_threads (
+    platform TEXT NOT NULL,
+    note_id TEXT NOT NULL,
+    comments TEXT NOT NULL,
+    newest_create_time INTEGER,
+    last_crawl_time INTEGER NOT NULL,
+    PRIMARY KEY (platform, note_id)
+)
+"""
+
+_COUNT_PATTERN = re.compile(r"^([\d.]+)\s*([万千wWkK]?)")
+_COUNT_UNITS = {"万": 10000, "w": 10000, "W": 10000, "千": 1000, "k": 1000, "K": 1000}
+
+
+def parse_count(value) -> Optional[int]:
+    """
+    Normalize an interaction count as the platforms display it ("1.2万", "10+", "1,234", 56)
+    Returns None when the value is not a count
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if not isinstance(value, str):
+        return None
+    match = _COUNT_PATTERN.match(value.strip().replace(",", ""))
+    if not match:
+        return None
+    try:
+        number = float(match.group(1))
+    except ValueError:
+        return None
+    return int(number * _COUNT_UNITS.get(match.group(2), 1))
+
+
+class CommentDelta:
+    """
+    What the last crawl of a note's comments stored: the newest comment ids with their
+    sub-comment counts, and the newest comment time.
+
+    A comment is known when its id is stored or it is not newer than the newest stored
+    comment. get_note_all_comments stops paging after a page of known comments and only
+    expands the sub-comment threads whose count changed.
+    """
+
+    def __init__(self, known: Optional[Dict[str, Optional[int]]] = None, newest_create_time: Optional[int] = None):
+        self.known: Dict[str, Optional[int]] = known or {}
+        self.newest_create_time = newest_create_time
+        self.observed: Dict[str, Optional[int]] = {}
+        self.observed_newest_time = newest_create_time
+
+    def observe(self, comment_id: str, create_time: Optional[int] = None, sub_comment_count=None) -> None:
+        self.observed[str(comment_id)] = parse_count(sub_comment_count)
+        if create_time and (self.observed_newest_time is None or int(create_time) > self.observed_newest_time):
+            self.observed_newest_time = int(create_time)
+
+    def is_known(self, comment_id: str, create_time: Optional[int] = None) -> bool:
+        if str(comment_id) in self.known:
+            return True
+        return bool(create_time and self.newest_create_time and int(create_time) <= self.newest_create_time)
+
+    def sub_comments_changed(self, comment_id: str, sub_comment_count) -> bool:
+        """Whether the comment's thread has replies we have not stored"""
+        count = parse_count(sub_comment_count)
+        if not count:
+            return False
+        return self.known.get(str(comment_id)) != count
+
+
+@dataclass
+class SeenEntry:
+    platform: str
+    content_id: str
+    last_update_time: Optional[int]
+    interactions: Dict[str, int]
+    last_crawl_time: int
+
+
+class SeenIndex:
+    """
+    SQLite index keyed by (platform, content_id) that remembers when a piece of content was
+    last crawled, its last update time and its interaction counts.
+
+    Search mode asks should_crawl() with what the search result already tells (counts,
+    update time) before spending the detail, media and comment requests on a note, and
+    calls record() once the note has been stored.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        policy: Optional[str] = None,
+        refresh_interval_hours: Optional[float] = None,
+        change_ratio: Optional[float] = None,
+    ):
+        """
+        Args:
+            db_path: sqlite file, created on first use
+            policy: never | interval | changed, defaults to config.INCREMENTAL_REFRESH_POLICY
+            refresh_interval_hours: content older than this is crawled again, 0 disables, defaults to config
+            change_ratio: relative change of an interaction count that counts as changed, defaults to config
+        """
+        self.db_path = db_path
+        self.policy = policy or config.INCREMENTAL_REFRESH_POLICY
+        self.refresh_interval_hours = (
+            config.INCREMENTAL_REFRESH_INTERVAL_HOURS if refresh_interval_hours is None else refresh_interval_hours
+        )
+        self.change_ratio = config.INCREMENTAL_INTERACTION_CHANGE_RATIO if change_ratio is None else change_ratio
+        self.skipped = 0
+        self.crawled = 0
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                pathlib.Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(_CREATE_TABLE_SQL)
+                await db.execute(_CREATE_COMMENT_TABLE_SQL)
+                await db.commit()
+                self._db = db
+            return self._db
+
+    async def get(self, platform: str, content_id: str) -> Optional[SeenEntry]:
+        db = await self._connection()
+        async with db.execute(
+            "SELECT last_update_time, interactions, last_crawl_time FROM seen_content WHERE platform = ? AND content_id = ?",
+            (platform, str(content_id)),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return SeenEntry(
+            platform=platform,
+            content_id=str(content_id),
+            last_update_time=row[0],
+            interactions=json.loads(row[1]) if row[1] else {},
+            last_crawl_time=row[2],
+        )
+
+    async def should_crawl(
+        self,
+        platform: str,
+        content_id: str,
+        last_update_time: Optional[int] = None,
+        interactions: Optional[Mapping] = None,
+    ) -> bool:
+        """
+        Whether the content needs its detail / media / comments crawled in this run
+        Args:
+            platform: xhs | wb | ...
+            content_id: note id
+            last_update_time: update time seen in the search result, if the platform shows one
+            interactions: interaction counts seen in the search result
+
+        Returns:
+            False when the index has the content and the refresh policy lets us skip it
+        """
+        entry = await self.get(platform, content_id)
+        crawl = entry is None or self._needs_refresh(entry, last_update_time, interactions)
+        if crawl:
+            self.crawled += 1
+        else:
+            self.skipped += 1
+            utils.logger.info(f"[SeenIndex.should_crawl] Skip {platform} {content_id}, unchanged since last crawl")
+        return crawl
+
+    def _needs_refresh(self, entry: SeenEntry, last_update_time: Optional[int], interactions: Optional[Mapping]) -> bool:
+        if self.policy == REFRESH_POLICY_NEVER:
+            return False
+        if self.refresh_interval_hours and time.time() - entry.last_crawl_time > self.refresh_interval_hours * 3600:
+            return True
+        if self.policy != REFRESH_POLICY_CHANGED:
+            return False
+        if last_update_time and entry.last_update_time and int(last_update_time) != entry.last_update_time:
+            return True
+        for key, value in _normalize_interactions(interactions).items():
+            old = entry.interactions.get(key)
+            if old is not None and abs(value - old) > self.change_ratio * max(old, 1):
+                return True
+        return False
+
+    async def record(
+        self,
+        platform: str,
+        content_id: str,
+        last_update_time: Optional[int] = None,
+        interactions: Optional[Mapping] = None,
+    ) -> None:
+        """Remember that the content was crawled now"""
+        db = await self._connection()
+        await db.execute(
+            """
+            INSERT INTO seen_content (platform, content_id, last_update_time, interactions, last_crawl_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (platform, content_id) DO UPDATE SET
+                last_update_time = COALESCE(excluded.last_update_time, seen_content.last_update_time),
+                interactions = excluded.interactions,
+                last_crawl_time = excluded.last_crawl_time
+            """,
+            (
+                platform,
+                str(content_id),
+                int(last_update_time) if last_update_time else None,
+                json.dumps(_normalize_interactions(interactions)),
+                int(time.time()),
+            ),
+        )
+        await db.commit()
+
+    async def comment_delta(self, platform: str, note_id: str) -> CommentDelta:
+        """What the previous crawls stored of the note's comments, empty for a new note"""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT comments, newest_create_time FROM seen_comment_threads WHERE platform = ? AND note_id = ?",
+            (platform, str(note_id)),
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return CommentDelta()
+        return CommentDelta(json.loads(row[0]), row[1])
+
+    async def record_comments(self, platform: str, note_id: str, delta: CommentDelta) -> None:
+        """Remember the comments observed by this crawl, keeping the newest COMMENT_DELTA_KNOWN_IDS ids"""
+        # this crawl's comments first (pages come newest first), then the ones known before
+        known = dict(delta.observed)
+        for comment_id, sub_comment_count in delta.known.items():
+            known.setdefault(comment_id, sub_comment_count)
+        known = dict(list(known.items())[: config.INCREMENTAL_COMMENT_DELTA_KNOWN_IDS])
+        db = await self._connection()
+        await db.execute(
+            """
+            INSERT INTO seen_comment_threads (platform, note_id, comments, newest_create_time, last_crawl_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (platform, note_id) DO UPDATE SET
+                comments = excluded.comments,
+                newest_create_time = excluded.newest_create_time,
+                last_crawl_time = excluded.last_crawl_time
+            """,
+            (platform, str(note_id), json.dumps(known), delta.observed_newest_time, int(time.time())),
+        )
+        await db.commit()
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+def _normalize_interactions(interactions: Optional[Mapping]) -> Dict[str, int]:
+    result: Dict[str, int] = {}
+    for key, value in (interactions or {}).items():
+        count = parse_count(value)
+        if count is not None:
+            result[key] = count
+    return result
+
+
+_seen_index: Optional[SeenIndex] = None
+
+
+def get_seen_index() -> Optional[SeenIndex]:
+    """Process wide index, None when INCREMENTAL_CRAWL_ENABLED is off"""
+    global _seen_index
+    if not config.INCREMENTAL_CRAWL_ENABLED:
+        return None
+    if _seen_index is None:
+        db_path = config.INCREMENTAL_INDEX_PATH or os.path.join(config.SAVE_DATA_PATH or "data", "seen_index.db")
+        _seen_index = SeenIndex(db_path)
+    return _seen_index
+
+
+async def close_seen_index() -> None:
+    global _seen_index
+    if _seen_index is not None:
+        utils.logger.info(
+            f"[SeenIndex] Incremental crawl: {_seen_index.crawled} crawled, {_seen_index.skipped} skipped as unchanged"
+        )
+        await _seen_index.close()
+        _seen_index = None
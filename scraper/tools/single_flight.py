@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/single_flight.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Single-flight coalescing of identical API requests
+#
+# Overlapping keywords return the same notes, so the same detail / comment page request is
+# often issued twice at nearly the same time. The clients' request methods are wrapped with
+# @coalesce_requests: identical requests (method, url, params, body and cookie; the other
+# headers are left out because they carry per-call signatures) share one in-flight call, and
+# finished results are memoized for REQUEST_MEMO_TTL_SEC. A caller that needs a fresh answer
+# passes memoize=False to the request method.
+
+import asyncio
+import copy
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import config
+
+T = TypeVar("T")
+
+# request kwargs that do not change what the platform returns
+_IGNORED_REQUEST_KWARGS = ("headers", "timeout", "proxy")
+
+
+def request_key(method: str, url: str, kwargs: Dict[str, Any]) -> str:
+    """
+    Normalized identity of a request: dict keys are sorted, headers are ignored except the
+    cookie, so a request made after login is not answered with a result from before it
+    """
+    params = {key: value for key, value in kwargs.items() if key not in _IGNORED_REQUEST_KWARGS}
+    headers = kwargs.get("headers") or {}
+    cookie = next((value for name, value in headers.items() if name.lower() == "cookie"), None)
+    return json.dumps([method.upper(), url, params, cookie], sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _copy_result(result: Any) -> Any:
+    # callers may mutate what they get (e.g. note_detail.update(...)), give each one its own copy
+    return copy.deepcopy(result) if isinstance(result, (dict, list)) else result
+
+
+class SingleFlight:
+    """Runs one call per key at a time, concurrent callers of the same key share its result"""
+
+    def __init__(self, memo_ttl: Optional[float] = None, memo_size: int = 1024):
+        """
+        Args:
+            memo_ttl: seconds a finished result is reused, 0 disables, defaults to config.REQUEST_MEMO_TTL_SEC
+            memo_size: max memoized results, oldest dropped first
+        """
+        self.memo_ttl = config.REQUEST_MEMO_TTL_SEC if memo_ttl is None else memo_ttl
+        self.memo_size = memo_size
+        self.calls = 0
+        self.coalesced = 0
+        self.memo_hits = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._memo: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]], memoize: bool = True) -> T:
+        """
+        Args:
+            key: request identity
+            fn: the call
+            memoize: False skips the memoized result, an identical call already in flight is still shared
+        """
+        memoized = self._memo.get(key) if memoize else None
+        if memoized is not None:
+            if memoized[0] > time.monotonic():
+                self.memo_hits += 1
+                return _copy_result(memoized[1])
+            del self._memo[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # the call runs in the first caller's context and outlives it if that caller is cancelled
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._inflight[key] = task
+        else:
+            self.coalesced += 1
+        return _copy_result(await asyncio.shield(task))
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await fn()
+        finally:
+            self._inflight.pop(key, None)
+        if self.memo_ttl > 0:
+            self._memo[key] = (time.monotonic() + self.memo_ttl, result)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+
+def coalesce_requests(func: Callable) -> Callable:
+    """
+    Decorator for the clients' request(self, method, url, **kwargs) methods, put it above @retry
+    so duplicates also share the retries. Uses the client's single_flight group.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, method, url, memoize: bool = True, **kwargs):
+        if not config.REQUEST_COALESCING_ENABLED:
+            return await func(self, method, url, **kwargs)
+        key = request_key(method, url, kwargs)
+        return await self.single_flight.do(key, lambda: func(self, method, url, **kwargs), memoize=memoize)
+
+    return wrapper
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/work_queue.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : Redis backed work queue shared by a coordinator and crawl worker processes
+#
+# Keys of a queue named <name> under <prefix>:
+#   <prefix>:<name>:tasks   HASH  item id -> item json (payload, attempts, last error)
+#   <prefix>:<name>:ready   LIST  item ids waiting for a worker
+#   <prefix>:<name>:leased  ZSET  item id -> lease deadline (unix time)
+#   <prefix>:<name>:dead    LIST  item ids that failed max_attempts times
+# A worker leases an item (ready -> leased), keeps extending the lease while it works on it,
+# and acks (deleted) or nacks it (back to ready, or to dead after max_attempts). Leases of
+# crashed workers expire and are reclaimed by whichever worker polls next. Delivery is at
+# least once, handlers should be idempotent (the stores upsert).
+
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from redis.asyncio import Redis
+
+import config
+from cache.redis_cache import redis_connection_kwargs
+from tools import utils
+
+# enqueue once per id: a coordinator restarted mid-way does not duplicate queued work
+_ENQUEUE_SCRIPT = """
+if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[1])
+    return 1
+end
+return 0
+"""
+
+_LEASE_SCRIPT = """
+local id = redis.call('LPOP', KEYS[1])
+if not id then
+    return nil
+end
+redis.call('ZADD', KEYS[2], ARGV[1], id)
+local raw = redis.call('HGET', KEYS[3], id)
+if not raw then
+    return {id, ''}
+end
+return {id, raw}
+"""
+
+# only the holder of the lease may move the item, so a reclaimed item is not moved twice
+_RELEASE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('RPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+_ACK_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+return redis.call('HDEL', KEYS[2], ARGV[1])
+"""
+
+
+@dataclass
+class WorkItem:
+    kind: str
+    payload: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    last_error: str = ""
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, raw) -> "WorkItem":
+        return cls(**json.loads(raw))
+
+
+class RedisWorkQueue:
+    """Visibility-timeout work queue with retries and a dead-letter list"""
+
+    def __init__(
+        self,
+        name: str,
+        redis_client: Optional[Redis] = None,
+        lease_timeout: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        prefix: Optional[str] = None,
+    ):
+        """
+        Args:
+            name: queue name, one queue per platform
+            redis_client: redis.asyncio client, defaults to a client on the cache's redis settings
+            lease_timeout: seconds a leased item stays invisible, defaults to config.CRAWLER_WORK_QUEUE_LEASE_SECONDS
+            max_attempts: deliveries before an item goes to the dead-letter list, defaults to config
+            prefix: key prefix, defaults to config.CRAWLER_WORK_QUEUE_PREFIX
+        """
+        self.name = name
+        self.redis = redis_client or Redis(**redis_connection_kwargs())
+        self.lease_timeout = lease_timeout or config.CRAWLER_WORK_QUEUE_LEASE_SECONDS
+        self.max_attempts = max_attempts or config.CRAWLER_WORK_QUEUE_MAX_ATTEMPTS
+        base = f"{prefix or config.CRAWLER_WORK_QUEUE_PREFIX}:{name}"
+        self.tasks_key = f"{base}:tasks"
+        self.ready_key = f"{base}:ready"
+        self.leased_key = f"{base}:leased"
+        self.dead_key = f"{base}:dead"
+        self._enqueue = self.redis.register_script(_ENQUEUE_SCRIPT)
+        self._lease = self.redis.register_script(_LEASE_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        self._ack = self.redis.register_script(_ACK_SCRIPT)
+
+    async def enqueue(self, kind: str, payload: Dict[str, Any], item_id: Optional[str] = None) -> bool:
+        """
+        Add a unit of work
+        Returns:
+            False when an item with the same id is still queued, leased or dead
+        """
+        item = WorkItem(kind=kind, payload=payload, id=item_id) if item_id else WorkItem(kind=kind, payload=payload)
+        return bool(await self._enqueue(keys=[self.tasks_key, self.ready_key], args=[item.id, item.dumps()]))
+
+    async def lease(self) -> Optional[WorkItem]:
+        """Take the next ready item for lease_timeout seconds, None when nothing is ready"""
+        while True:
+            result = await self._lease(
+                keys=[self.ready_key, self.leased_key, self.tasks_key], args=[time.time() + self.lease_timeout]
+            )
+            if not result:
+                return None
+            item_id, raw = result
+            if raw:
+                return WorkItem.loads(raw)
+            # acked while a reclaimed copy of its id was still in the ready list
+            await self.redis.zrem(self.leased_key, item_id)
+
+    async def extend(self, item: WorkItem) -> bool:
+        """Push the lease deadline of an item we are still working on, False when the lease was lost"""
+        changed = await self.redis.zadd(
+            self.leased_key, {item.id: time.time() + self.lease_timeout}, xx=True, ch=True
+        )
+        return bool(changed)
+
+    async def ack(self, item: WorkItem) -> None:
+        await self._ack(keys=[self.leased_key, self.tasks_key], args=[item.id])
+
+    async def nack(self, item: WorkItem, error: str = "") -> bool:
+        """
+        Give a leased item back after a failure: ready again, or dead after max_attempts deliveries
+        Returns:
+            False when the lease had already expired and the item was reclaimed
+        """
+        item.attempts += 1
+        item.last_error = error
+        target = self.dead_key if item.attempts >= self.max_attempts else self.ready_key
+        moved = await self._release(keys=[self.leased_key, self.tasks_key, target], args=[item.id, item.dumps()])
+        if moved and target == self.dead_key:
+            utils.logger.error(f"[RedisWorkQueue.nack] {self.name} item {item.id} ({item.kind}) dead after {item.attempts} attempts: {error}")
+        return bool(moved)
+
+    async def reclaim_expired(self) -> int:
+        """Give the items of expired leases (crashed or stuck workers) back, counting it as a failed attempt"""
+        expired = await self.redis.zrangebyscore(self.leased_key, "-inf", time.time())
+        reclaimed = 0
+        for item_id in expired:
+            raw = await self.redis.hget(self.tasks_key, item_id)
+            if raw is None:
+                await self.redis.zrem(self.leased_key, item_id)
+                continue
+            if await self.nack(WorkItem.loads(raw), "lease expired"):
+                reclaimed += 1
+        if reclaimed:
+            utils.logger.warning(f"[RedisWorkQueue.reclaim_expired] {self.name} reclaimed {reclaimed} expired leases")
+        return reclaimed
+
+    async def dead_letters(self) -> List[WorkItem]:
+        items = []
+        for item_id in await self.redis.lrange(self.dead_key, 0, -1):
+            raw = await self.redis.hget(self.tasks_key, item_id)
+            if raw is not None:
+                items.append(WorkItem.loads(raw))
+        return items
+
+    async def requeue_dead(self) -> int:
+        """Give every dead item a fresh set of attempts"""
+        count = 0
+        for item in await self.dead_letters():
+            item.attempts = 0
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.dead_key, 0, item.id)
+                pipe.hset(self.tasks_key, item.id, item.dumps())
+                pipe.rpush(self.ready_key, item.id)
+                await pipe.execute()
+            count += 1
+        return count
+
+    async def stats(self) -> Dict[str, int]:
+        return {
+            "ready": await self.redis.llen(self.ready_key),
+            "leased": await self.redis.zcard(self.leased_key),
+            "dead": await self.redis.llen(self.dead_key),
+        }
+
+    async def drained(self) -> bool:
+        """Nothing ready and nothing in flight"""
+        stats = await self.stats()
+        return stats["ready"] == 0 and stats["leased"] == 0
+
+    async def purge(self) -> None:
+        await self.redis.delete(self.tasks_key, self.ready_key, self.leased_key, self.dead_key)
+
+    async def close(self) -> None:
+        await self.redis.close()
+
+
+WorkHandler = Callable[[WorkItem], Awaitable[None]]
+
+
+class WorkQueueWorker:
+    """Runs `concurrency` lease -> handle -> ack loops against one queue"""
+
+    def __init__(
+        self,
+        queue: RedisWorkQueue,
+        handlers: Dict[str, WorkHandler],
+        concurrency: Optional[int] = None,
+        poll_interval: float = 1.0,
+    ):
+        """
+        Args:
+            queue: the work queue
+            handlers: item kind -> coroutine function processing one item, raising means failed
+            concurrency: items processed at the same time, defaults to config.CRAWLER_WORK_QUEUE_WORKER_CONCURRENCY
+            poll_interval: seconds between polls of an empty queue
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = max(1, concurrency or config.CRAWLER_WORK_QUEUE_WORKER_CONCURRENCY)
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+
+    async def run(self, stop_when_drained: bool = True) -> None:
+        """Process items until the queue is drained (or forever when stop_when_drained is off)"""
+        utils.logger.info(f"[WorkQueueWorker.run] Start {self.concurrency} loops on queue {self.queue.name}")
+        await asyncio.gather(*[self._loop(stop_when_drained) for _ in range(self.concurrency)])
+        utils.logger.info(f"[WorkQueueWorker.run] Queue {self.queue.name} done, processed: {self.processed}, failed: {self.failed}")
+
+    async def _loop(self, stop_when_drained: bool) -> None:
+        while True:
+            await self.queue.reclaim_expired()
+            item = await self.queue.lease()
+            if item is None:
+                if stop_when_drained and await self.queue.drained():
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._process(item)
+
+    async def _process(self, item: WorkItem) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(item))
+        try:
+            handler = self.handlers.get(item.kind)
+            if handler is None:
+                raise ValueError(f"no handler for work item kind {item.kind!r}")
+            await handler(item)
+        except Exception as e:
+            heartbeat.cancel()
+            self.failed += 1
+            utils.logger.error(f"[WorkQueueWorker._process] {item.kind} {item.id} failed (attempt {item.attempts + 1}): {e}")
+            await self.queue.nack(item, repr(e))
+        else:
+            heartbeat.cancel()
+            self.processed += 1
+            await self.queue.ack(item)
+
+    async def _heartbeat(self, item: WorkItem) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_timeout / 3)
+            if not await self.queue.extend(item):
+                utils.logger.warning(f"[WorkQueueWorker._heartbeat] Lost the lease of {item.kind} {item.id}")
+                return
+
+
+_queues: Dict[str, RedisWorkQueue] = {}
+
+
+def get_work_queue(name: str) -> RedisWorkQueue:
+    """Process wide queue of a platform"""
+    queue = _queues.get(name)
+    if queue is None:
+        queue = _queues[name] = RedisWorkQueue(name)
+    return queue
+
+
+async def close_work_queues() -> None:
+    for queue in _queues.values():
+        await queue.close()
+    _queues.clear()